@@ -0,0 +1,723 @@
+"""Benchmark sederhana untuk latihan.py.
+
+Contoh:
+    python benchmark.py storage --users 10000 --media 500000
+    python benchmark.py range --size-mb 100
+    python benchmark.py templates
+    python benchmark.py stress --workers 4
+    python benchmark.py login --p99-ms 250
+    python benchmark.py upload --size-mb 100
+    python benchmark.py suite --output baseline.json
+    python benchmark.py suite --compare baseline.json --threshold 0.2
+    python benchmark.py reencode --images 40
+    python benchmark.py html
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_app(data_dir):
+    """Import latihan.py dengan DATA_DIR sementara supaya data asli tidak tersentuh"""
+    os.environ["DATA_DIR"] = data_dir
+    sys.path.insert(0, BASE_DIR)
+    import latihan
+    return latihan
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Ringkasan dalam milidetik"""
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def synthetic_state(user_count, media_count):
+    users = {}
+    pages = {}
+    per_user = max(1, media_count // user_count)
+    for i in range(user_count):
+        name = f"user{i:06d}"
+        users[name] = {"password": "x" * 12, "msg": f"Halo {name}", "role": "user",
+                       "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"}
+        kinds = {"images": [], "audio": [], "video": []}
+        for j in range(per_user):
+            kind = ("images", "images", "audio", "video")[j % 4]
+            kinds[kind].append({"filename": f"{name}_{j}_file{j}.bin",
+                                "visibility": "public" if j % 3 == 0 else "private"})
+        pages[name] = {"title": f"Personal Page - {name}", "description": "Benchmark",
+                       "bg_color": "#1a1a2e", "text_color": "#ffffff",
+                       "background_image": None, **kinds}
+    pending = {f"pending{i:05d}": {"password": "secret"} for i in range(user_count // 20)}
+    return users, pending, pages
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_storage(args):
+    workdir = tempfile.mkdtemp(prefix="bench-storage-")
+    app = import_app(workdir)
+    users, pending, pages = synthetic_state(args.users, args.media)
+    usernames = sorted(users)
+    results = {}
+
+    # Baseline: perilaku lama, seluruh personal_pages.json ditulis ulang per perubahan
+    legacy_file = os.path.join(workdir, "legacy_pages.json")
+
+    def legacy_save(_):
+        with open(legacy_file, 'w') as f:
+            json.dump(pages, f, indent=2)
+    results["legacy-json-rewrite"] = {"save_page": summarize(time_calls(legacy_save, max(3, args.iterations // 20)))}
+
+    backends = {
+        "json": app.JsonStorage(os.path.join(workdir, "users.json"), os.path.join(workdir, "pages.json")),
+        "sqlite": app.SQLiteStorage(os.path.join(workdir, "bench.sqlite3")),
+    }
+    for name, storage in backends.items():
+        row = {}
+        start = time.perf_counter()
+        storage.save_users(users, pending, True)
+        storage.save_pages(pages)
+        row["initial_write_s"] = time.perf_counter() - start
+
+        def upload(i):
+            owner = usernames[i % len(usernames)]
+            pages[owner]["images"].append({"filename": f"{owner}_new{i}.png", "visibility": "private"})
+            storage.save_pages(pages, [owner])
+        row["save_page"] = summarize(time_calls(upload, args.iterations))
+
+        def approve(i):
+            username = f"pending{i % max(1, len(pending)):05d}"
+            users[username] = {"password": "secret", "msg": "", "role": "user"}
+            storage.save_users(users, pending, True, [username])
+        row["save_user"] = summarize(time_calls(approve, args.iterations))
+
+        start = time.perf_counter()
+        storage.load_users()
+        loaded = storage.load_pages()
+        row["load_s"] = time.perf_counter() - start
+        row["loaded_pages"] = len(loaded)
+        results[name] = row
+    return results
+
+
+def login_client(app, username, password):
+    client = app.app.test_client()
+    client.post("/login", data={"username": username, "password": password})
+    return client
+
+
+def register_media_file(app, owner, filename, payload, kind="video"):
+    """Taruh file langsung di UPLOAD_FOLDER dan daftarkan seperti upload biasa"""
+    with open(os.path.join(app.UPLOAD_FOLDER, filename), 'wb') as f:
+        f.write(payload)
+    page = app.get_user_personal_page(owner)
+    page[kind].append({"filename": filename, "visibility": "private"})
+    app.index_media(owner, kind, page[kind][-1])
+
+
+def first_byte_and_total(client, url, headers, stop_after=None):
+    """Waktu sampai byte pertama dan sampai `stop_after` byte (atau selesai) diterima"""
+    start = time.perf_counter()
+    response = client.get(url, headers=headers, buffered=False)
+    ttfb = None
+    received = 0
+    for chunk in response.response:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        received += len(chunk)
+        if stop_after is not None and received >= stop_after:
+            break
+    response.close()
+    return ttfb, time.perf_counter() - start, response.status_code
+
+
+def bench_range(args):
+    app = import_app(tempfile.mkdtemp(prefix="bench-range-"))
+    size = args.size_mb * 1024 * 1024
+    register_media_file(app, "arya", "arya_0_bench.mp4", os.urandom(1024 * 1024) * args.size_mb)
+    client = login_client(app, "arya", "4321")
+    url = "/uploads/arya_0_bench.mp4"
+    middle = size // 2
+    cases = {
+        # Tanpa Range browser harus membaca sampai tengah file dulu
+        "no_range_read_to_middle": ({}, middle),
+        "seek_middle_open_ended": ({"Range": f"bytes={middle}-"}, 1),
+        "seek_middle_1mb": ({"Range": f"bytes={middle}-{middle + 1024 * 1024 - 1}"}, None),
+    }
+    results = {}
+    for name, (headers, stop_after) in cases.items():
+        ttfbs, totals = [], []
+        for _ in range(args.iterations):
+            ttfb, total, status = first_byte_and_total(client, url, headers, stop_after)
+            ttfbs.append(ttfb)
+            totals.append(total)
+        results[name] = {"status": status, "ttfb": summarize(ttfbs), "time_to_playable": summarize(totals)}
+    return results
+
+
+def template_contexts(media_count):
+    images = [{"filename": f"arya_{i}_foto{i}.jpg", "visibility": "public"} for i in range(media_count)]
+    audio = [{"filename": f"arya_{i}_lagu{i}.mp3", "visibility": "public"} for i in range(media_count // 5)]
+    video = [{"filename": f"arya_{i}_video{i}.mp4", "visibility": "public"} for i in range(media_count // 10)]
+    page = {"title": "Personal Page - arya", "description": "Halo", "bg_color": "#1a1a2e",
+            "text_color": "#ffffff", "images": images, "audio": audio, "video": video,
+            "background_image": None, "owner": "arya", "current_user": "arya", "is_admin": False}
+    return {
+        "login.html": {"msg": None},
+        "home.html": {"user": "arya", "msg": "Halo", "bg_color": "#000000", "text_color": "#ffffff", "is_admin": False},
+        "public.html": {},
+        "personal_page.html": page,
+        "image_gallery.html": {"images": images, "audio": audio, "video": video},
+        "user_not_found.html": {"search_username": "tidak-ada"},
+    }
+
+
+def bench_templates(args):
+    app = import_app(tempfile.mkdtemp(prefix="bench-templates-"))
+    import flask
+    sources = {name: source for name, source in app.TEMPLATES.items()}
+    results = {}
+    with app.app.test_request_context("/"):
+        for name, context in template_contexts(args.media).items():
+            source = sources[name]
+            if name == "user_not_found.html":
+                # Versi lama membangun source baru per request (tidak pernah ter-cache)
+                def old(i, source=source):
+                    flask.render_template_string(source.replace("{{ search_username }}", f"user{i}"))
+            else:
+                def old(i, source=source, context=context):
+                    flask.render_template_string(source, **context)
+
+            def new(i, name=name, context=context):
+                flask.render_template(name, **context)
+            old(0)
+            new(0)
+            results[name] = {"render_template_string": summarize(time_calls(old, args.iterations)),
+                             "render_template": summarize(time_calls(new, args.iterations))}
+    return results
+
+
+def stress_worker(data_dir, env, worker_id, operations, barrier, results):
+    """Satu "worker gunicorn": upload ke halaman yang sama + register/approve user"""
+    os.environ.update(env)
+    app = import_app(data_dir)
+    uploader = login_client(app, "arya", "4321")
+    admin = login_client(app, "admin", "1234")
+    visitor = app.app.test_client()
+    barrier.wait()
+    start = time.perf_counter()
+    for i in range(operations):
+        data = {"image": (io.BytesIO(b"x" * 1024), f"w{worker_id}_{i}.png")}
+        uploader.post("/upload-image-instant", data=data, content_type="multipart/form-data")
+        username = f"stress{worker_id}x{i}"
+        visitor.post("/register", data={"username": username, "password": "secret",
+                                        "confirm_password": "secret"})
+        admin.post("/admin", data={"action": "approve", "username": username})
+    results.put(time.perf_counter() - start)
+    # Proses keluar normal -> atexit flush_state() menulis sisa perubahan
+
+
+def stress_count(data_dir, env, results):
+    os.environ.update(env)
+    app = import_app(data_dir)
+    images = app.PERSONAL_PAGES.get("arya", {}).get("images", [])
+    on_disk = [item for item in images if os.path.exists(app.media_path(item))]
+    results.put({"uploads": len(images), "upload_files_on_disk": len(on_disk),
+                 "approved_users": sum(1 for u in app.USERS if u.startswith("stress"))})
+
+
+def bench_stress(args):
+    ctx = multiprocessing.get_context("spawn")
+    expected = args.workers * args.operations
+    results = {}
+    for mode in ("0", "1"):
+        env = {"MULTI_WORKER": mode, "STORAGE_BACKEND": args.backend}
+        data_dir = tempfile.mkdtemp(prefix=f"bench-stress-{mode}-")
+        barrier = ctx.Barrier(args.workers)
+        queue = ctx.Queue()
+        workers = [ctx.Process(target=stress_worker, args=(data_dir, env, w, args.operations, barrier, queue))
+                   for w in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        elapsed = max(queue.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        counter = ctx.Process(target=stress_count, args=(data_dir, env, queue))
+        counter.start()
+        found = queue.get()
+        counter.join()
+        results[f"MULTI_WORKER={mode}"] = {
+            **found,
+            "expected_each": expected,
+            "lost_uploads": expected - found["uploads"],
+            "lost_approvals": expected - found["approved_users"],
+            "elapsed_s": elapsed,
+            "ops_per_s": 3 * expected / elapsed,
+        }
+    # MULTI_WORKER=1 harus koheren; tanpa itu lost update memang yang ingin ditunjukkan
+    coherent = results["MULTI_WORKER=1"]
+    if coherent["lost_uploads"] or coherent["lost_approvals"]:
+        print(json.dumps(results, indent=2))
+        sys.exit(1)
+    return results
+
+
+def run_logins(app, concurrency, requests_per_thread):
+    """Login paralel dari `concurrency` thread, return (latency per login, durasi total)"""
+    samples = []
+    samples_lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def worker(thread_id):
+        client = app.app.test_client()
+        own = []
+        barrier.wait()
+        for i in range(requests_per_thread):
+            username = f"login{(thread_id * requests_per_thread + i) % 64:02d}"
+            start = time.perf_counter()
+            client.post("/login", data={"username": username, "password": "rahasia"})
+            own.append(time.perf_counter() - start)
+        with samples_lock:
+            samples.extend(own)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def bench_login(args):
+    app = import_app(tempfile.mkdtemp(prefix="bench-login-"))
+    stored = app.hash_password("rahasia")
+    for i in range(64):
+        app.USERS[f"login{i:02d}"] = {"password": stored, "msg": "", "role": "user"}
+    results = {"scrypt_n": app.PASSWORD_HASH_N, "target_ms": app.PASSWORD_HASH_TARGET_MS,
+               "cpu_count": os.cpu_count(), "pools": {}}
+    for pool_size in args.pools:
+        app._password_pool = ThreadPoolExecutor(max_workers=pool_size)
+        levels = {}
+        for concurrency in args.concurrency:
+            samples, elapsed = run_logins(app, concurrency, args.requests)
+            levels[concurrency] = {**summarize(samples), "logins_per_s": len(samples) / elapsed}
+        # Throughput tertinggi yang p99-nya masih di bawah batas
+        within = [row["logins_per_s"] for row in levels.values() if row["p99_ms"] <= args.p99_ms]
+        results["pools"][pool_size] = {"by_concurrency": levels,
+                                       f"max_logins_per_s_at_p99_{args.p99_ms:g}ms": max(within, default=0)}
+    return results
+
+
+def written_bytes():
+    """Byte yang ditulis proses ini lewat write() (Linux), atau None"""
+    try:
+        with open("/proc/self/io") as f:
+            return int(next(line for line in f if line.startswith("wchar:")).split()[1])
+    except (OSError, StopIteration):
+        return None
+
+
+def upload_worker(mode, size_mb, iterations, results):
+    """Satu proses per mode supaya peak RSS (ru_maxrss) bisa dibandingkan"""
+    app = import_app(tempfile.mkdtemp(prefix=f"bench-upload-{mode}-"))
+    from flask import request
+    # Body multipart sedikit lebih besar dari isi file; batas 100 MB jangan sampai memotong
+    app.app.config["MAX_CONTENT_LENGTH"] = None
+
+    @app.app.route("/bench-legacy-upload", methods=["POST"])
+    def legacy_upload():
+        # Jalur lama: Werkzeug menampung ke file sementara, lalu file.save() menyalin
+        file = request.files["image"]
+        return app.register_upload("arya", file.filename, file.save)
+
+    boundary = "benchboundary"
+    body_path = os.path.join(app.DATA_DIR, "body.bin")
+    with open(body_path, "wb") as f:
+        f.write(f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="video.mp4"\r\n'
+                f'Content-Type: video/mp4\r\n\r\n'.encode())
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            f.write(block)
+        f.write(f"\r\n--{boundary}--\r\n".encode())
+    body_size = os.path.getsize(body_path)
+    client = login_client(app, "arya", "4321")
+    url = "/upload-image-instant" if mode == "streaming" else "/bench-legacy-upload"
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    written_before = written_bytes()
+    samples = []
+    for _ in range(iterations):
+        with open(body_path, "rb") as body:
+            start = time.perf_counter()
+            response = client.post(url, input_stream=body, content_length=body_size,
+                                   content_type=f"multipart/form-data; boundary={boundary}")
+            samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    written_after = written_bytes()
+    results.put({"upload": summarize(samples),
+                 "mb_per_s": size_mb / statistics.fmean(samples),
+                 "peak_rss_growth_mb": (rss_after - rss_before) / 1024,
+                 "written_mb_per_upload": None if written_before is None
+                 else (written_after - written_before) / iterations / (1024 * 1024)})
+
+
+def bench_upload(args):
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for mode in ("legacy", "streaming"):
+        queue = ctx.Queue()
+        worker = ctx.Process(target=upload_worker, args=(mode, args.size_mb, args.iterations, queue))
+        worker.start()
+        results[mode] = queue.get()
+        worker.join()
+    return results
+
+
+def suite_setup(app, args):
+    """Data sintetis: banyak user + satu user "arya" dengan galeri besar + file untuk diserve"""
+    rng = random.Random(args.seed)
+    users, pending, pages = synthetic_state(args.users, args.users * 10)
+    password_hash = app.hash_password("rahasia")
+    for data in users.values():
+        data["password"] = password_hash
+    app.USERS.update(users)
+    app.PERSONAL_PAGES.update(pages)
+    page = app.get_user_personal_page("arya")
+    for i in range(args.media):
+        kind = ("images", "images", "images", "audio", "video")[i % 5]
+        page[kind].append({"filename": f"arya_{i}_bench{i}.bin", "visibility": "public" if i % 2 else "private"})
+    app.rebuild_media_index()
+    app.rebuild_media_views()
+    app.invalidate_page_cache()
+    register_media_file(app, "arya", "arya_img_small.png", rng.randbytes(32 * 1024), kind="images")
+    register_media_file(app, "arya", "arya_vid_large.mp4", rng.randbytes(args.video_mb * 1024 * 1024))
+    app.USERS["arya"]["password"] = password_hash
+    app.USERS["friend"]["password"] = password_hash
+    app.USERS["admin"]["password"] = password_hash
+    return rng
+
+
+def bench_suite(args):
+    # Cost hash tetap supaya hasil antar mesin/run bisa dibandingkan
+    os.environ.setdefault("PASSWORD_HASH_N", "16384")
+    app = import_app(tempfile.mkdtemp(prefix="bench-suite-"))
+    rng = suite_setup(app, args)
+    owner = login_client(app, "arya", "rahasia")
+    visitor = login_client(app, "friend", "rahasia")
+    admin = login_client(app, "admin", "rahasia")
+    anonymous = app.app.test_client()
+    video_size = args.video_mb * 1024 * 1024
+    n = args.iterations
+
+    def fetch(client, *call_args, **kwargs):
+        response = client.open(*call_args, **kwargs)
+        response.get_data()
+        response.close()
+        assert response.status_code < 400, (call_args, response.status_code)
+        return response
+
+    def upload(i):
+        data = {"image": (io.BytesIO(rng.randbytes(64 * 1024)), f"upload{i}.png")}
+        fetch(owner, "/upload-image-instant", method="POST", data=data, content_type="multipart/form-data")
+
+    def view_user_uncached(i):
+        app.invalidate_page_cache("arya")
+        fetch(visitor, "/view-user?username=arya")
+
+    def video_range(i):
+        start = rng.randrange(0, video_size - 1024 * 1024)
+        fetch(owner, "/uploads/arya_vid_large.mp4", headers={"Range": f"bytes={start}-{start + 1024 * 1024 - 1}"})
+
+    cases = {
+        "login": lambda i: fetch(anonymous, "/login", method="POST",
+                                 data={"username": "friend", "password": "rahasia"}),
+        "view_user": lambda i: fetch(visitor, "/view-user?username=arya"),
+        "view_user_uncached": view_user_uncached,
+        "personal_page": lambda i: fetch(owner, "/personal-page"),
+        "image_gallery": lambda i: fetch(owner, "/image-gallery"),
+        "uploaded_file_small_image": lambda i: fetch(owner, "/uploads/arya_img_small.png"),
+        "uploaded_file_video_range": video_range,
+        "upload_image_instant": upload,
+        "toggle_visibility": lambda i: fetch(owner, "/toggle-visibility", method="POST",
+                                             data={"image": "arya_img_small.png"}),
+    }
+    results = {}
+    for name, fn in cases.items():
+        for i in range(args.warmup):
+            fn(i)
+        results[name] = summarize(time_calls(fn, n))
+
+    # Delete dan approve butuh target baru per iterasi (disiapkan di luar pengukuran)
+    targets = [f"arya_{i}_bench{i}.bin" for i in range(0, args.media, 5)][:n]
+    samples = time_calls(lambda i: fetch(owner, "/delete-image", method="POST", data={"image": targets[i]}),
+                         len(targets))
+    results["delete_image"] = summarize(samples)
+    pending = [f"benchpending{i:05d}" for i in range(n)]
+    for username in pending:
+        app.PENDING_USERS[username] = {"password": app.USERS["arya"]["password"]}
+    samples = time_calls(lambda i: fetch(admin, "/admin", method="POST",
+                                         data={"action": "approve", "username": pending[i]}), n)
+    results["admin_approve"] = summarize(samples)
+
+    report = {
+        "meta": {"python": sys.version.split()[0], "platform": sys.platform, "cpu_count": os.cpu_count(),
+                 "users": args.users, "media": args.media, "video_mb": args.video_mb,
+                 "iterations": n, "seed": args.seed, "storage": app.STORAGE_BACKEND},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare_reports(json.load(f), report, args.threshold)
+        if any(row["regression"] for row in report["comparison"].values()):
+            print(json.dumps(report, indent=2))
+            sys.exit(1)
+    return report
+
+
+def compare_reports(baseline, current, threshold):
+    """Bandingkan p50/p95 per kasus; regresi kalau lebih lambat dari baseline * (1 + threshold)"""
+    comparison = {}
+    for name, row in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratios = {f"{p}_ratio": row[f"{p}_ms"] / base[f"{p}_ms"] if base[f"{p}_ms"] else 1.0
+                  for p in ("p50", "p95")}
+        comparison[name] = {**ratios, "regression": any(r > 1 + threshold for r in ratios.values())}
+    return comparison
+
+
+def sample_corpus(count, seed):
+    """Corpus contoh: foto (JPEG), screenshot (PNG) dan GIF statis dengan ukuran acak tapi tetap (seed)"""
+    from PIL import Image, ImageDraw, ImageFilter
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        width, height = rng.choice([(1600, 1200), (1200, 1600), (1920, 1080), (1024, 768)])
+        kind = ("jpg", "jpg", "jpg", "png", "gif")[i % 5]
+        img = Image.effect_mandelbrot((width, height), (-2 + rng.random(), -1.2, 1, 1.2), rng.randint(20, 100))
+        noise = Image.effect_noise((width, height), rng.randint(10, 40))
+        img = Image.merge("RGB", (img, noise, img.filter(ImageFilter.GaussianBlur(3))))
+        if kind != "jpg":
+            # Screenshot: bidang warna datar + teks, pola yang disukai PNG
+            img = Image.new("RGB", (width, height), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            draw = ImageDraw.Draw(img)
+            for y in range(0, height, 40):
+                draw.text((20, y), f"baris {y} " * 8, fill=(0, 0, 0))
+        buffer = io.BytesIO()
+        if kind == "jpg":
+            img.save(buffer, "JPEG", quality=92)
+        elif kind == "png":
+            img.save(buffer, "PNG")
+        else:
+            img.convert("P").save(buffer, "GIF")
+        corpus.append((f"sample{i:03d}.{kind}", buffer.getvalue()))
+    return corpus
+
+
+def bench_reencode(args):
+    os.environ.setdefault("IMAGE_REENCODE_FORMATS", "avif,webp")
+    os.environ.setdefault("PASSWORD_HASH_N", "16384")
+    app = import_app(tempfile.mkdtemp(prefix="bench-reencode-"))
+    if args.corpus:
+        corpus = [(name, open(os.path.join(args.corpus, name), "rb").read())
+                  for name in sorted(os.listdir(args.corpus)) if app.allowed_file(name)
+                  and app.get_file_type(name) == "image"]
+    else:
+        corpus = sample_corpus(args.images, args.seed)
+    client = login_client(app, "arya", "4321")
+
+    start = time.perf_counter()
+    filenames = []
+    for name, payload in corpus:
+        response = client.post("/upload-image-instant", data={"image": (io.BytesIO(payload), name)},
+                               content_type="multipart/form-data")
+        filenames.append(response.get_json()["filename"])
+    records = [app.MEDIA_INDEX[filename][2] for filename in filenames]
+    while not all("variants" in record for record in records):
+        time.sleep(0.05)
+    encode_seconds = time.perf_counter() - start
+
+    formats = app.IMAGE_REENCODE_FORMATS
+    original = sum(len(payload) for _, payload in corpus)
+    storage = {fmt: sum(record["variants"].get(fmt, 0) for record in records) for fmt in formats}
+    accept_headers = {
+        "legacy": "*/*",
+        "webp": "image/webp,*/*",
+        "modern": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+    }
+    bandwidth = {}
+    for label, accept in accept_headers.items():
+        row = {}
+        for variant, query in (("full", ""), ("w640", "?w=640")):
+            total = 0
+            for filename in filenames:
+                response = client.get(f"/uploads/{filename}{query}", headers={"Accept": accept})
+                total += len(response.get_data())
+            row[f"{variant}_bytes"] = total
+        bandwidth[label] = row
+    for label, row in bandwidth.items():
+        for key in ("full_bytes", "w640_bytes"):
+            row[key.replace("bytes", "saving_pct")] = round(100 * (1 - row[key] / bandwidth["legacy"][key]), 1)
+    return {
+        "images": len(corpus),
+        "formats": formats,
+        "quality": {fmt: app.REENCODE_QUALITY[fmt] for fmt in formats},
+        "encode_ms_per_image": round(encode_seconds / len(corpus) * 1000, 1),
+        "storage": {"original_bytes": original,
+                    **{f"{fmt}_bytes": size for fmt, size in storage.items()},
+                    **{f"{fmt}_vs_original_pct": round(100 * size / original, 1) for fmt, size in storage.items()},
+                    "skipped": sum(1 for record in records if not record["variants"])},
+        "bandwidth": bandwidth,
+    }
+
+
+HTML_PAGES = [
+    (None, "/login"), (None, "/register"), (None, "/register-success"), (None, "/public"),
+    ("arya", "/home"), ("arya", "/edit-profile"), ("arya", "/personal-page"), ("arya", "/edit-personal-page"),
+    ("arya", "/image-gallery"), ("friend", "/view-user?username=arya"), ("friend", "/view-user?username=nobody"),
+    ("admin", "/admin"),
+]
+
+
+def bench_html(args):
+    os.environ.setdefault("PASSWORD_HASH_N", "16384")
+    app = import_app(tempfile.mkdtemp(prefix="bench-html-"))
+    page = app.get_user_personal_page("arya")
+    for i in range(args.media):
+        kind = ("images", "images", "audio", "video")[i % 4]
+        page[kind].append({"filename": f"arya_{i}_file{i}.bin", "visibility": "public", "size": 123456,
+                           "meta": {"duration": 185.0, "container": "mp3"}})
+    app.save_personal_pages("arya")
+    clients = {None: app.app.test_client()}
+    for username, password in (("arya", "4321"), ("friend", "1111"), ("admin", "1234")):
+        clients[username] = login_client(app, username, password)
+
+    pages = {}
+    seen_assets = {}
+    for username, url in HTML_PAGES:
+        client = clients[username]
+        html = client.get(url).get_data()
+        assets = sorted(set(re.findall(rb'(?:href|src)="(/assets/[^"]+)"', html)))
+        for asset in assets:
+            if asset not in seen_assets:
+                seen_assets[asset] = len(client.get(asset.decode()).get_data())
+        asset_bytes = sum(seen_assets[asset] for asset in assets)
+        pages[url] = {"html_bytes": len(html), "asset_bytes": asset_bytes,
+                      "first_visit_bytes": len(html) + asset_bytes}
+    html_total = sum(row["html_bytes"] for row in pages.values())
+    return {
+        "media": args.media,
+        "pages": pages,
+        # Kunjungan berulang: asset sudah di cache browser (immutable), hanya HTML yang dikirim
+        "total_html_bytes": html_total,
+        "total_unique_asset_bytes": sum(seen_assets.values()),
+        "total_cold_bytes": html_total + sum(seen_assets.values()),
+    }
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    storage = sub.add_parser("storage", help="bandingkan backend JSON dan SQLite")
+    storage.add_argument("--users", type=int, default=10000)
+    storage.add_argument("--media", type=int, default=500000)
+    storage.add_argument("--iterations", type=int, default=200)
+    storage.set_defaults(func=bench_storage)
+
+    range_ = sub.add_parser("range", help="time-to-first-byte saat seek ke tengah video besar")
+    range_.add_argument("--size-mb", type=int, default=100)
+    range_.add_argument("--iterations", type=int, default=20)
+    range_.set_defaults(func=bench_range)
+
+    templates = sub.add_parser("templates", help="waktu render per template: string vs registry")
+    templates.add_argument("--media", type=int, default=50, help="jumlah gambar di personal page/galeri")
+    templates.add_argument("--iterations", type=int, default=500)
+    templates.set_defaults(func=bench_templates)
+
+    stress = sub.add_parser("stress", help="beberapa proses sekaligus: cek lost update, MULTI_WORKER 0 vs 1 (exit 1 kalau MULTI_WORKER=1 kehilangan update)")
+    stress.add_argument("--workers", type=int, default=4)
+    stress.add_argument("--operations", type=int, default=50, help="upload + approve per worker")
+    stress.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    stress.set_defaults(func=bench_stress)
+
+    login = sub.add_parser("login", help="throughput login (scrypt di thread pool) pada p99 tetap")
+    login.add_argument("--pools", type=int_list, default=[1, 2, 4], help="ukuran pool hashing, mis. 1,2,4")
+    login.add_argument("--concurrency", type=int_list, default=[1, 2, 4, 8, 16])
+    login.add_argument("--requests", type=int, default=20, help="login per thread")
+    login.add_argument("--p99-ms", type=float, default=250)
+    login.set_defaults(func=bench_login)
+
+    upload = sub.add_parser("upload", help="throughput + peak RSS upload: request.files vs streaming")
+    upload.add_argument("--size-mb", type=int, default=100)
+    upload.add_argument("--iterations", type=int, default=5)
+    upload.set_defaults(func=bench_upload)
+
+    suite = sub.add_parser("suite", help="semua hot path lewat test client, p50/p95/p99 + compare baseline")
+    suite.add_argument("--users", type=int, default=1000)
+    suite.add_argument("--media", type=int, default=500, help="jumlah media user arya")
+    suite.add_argument("--video-mb", type=int, default=64)
+    suite.add_argument("--iterations", type=int, default=100)
+    suite.add_argument("--warmup", type=int, default=5)
+    suite.add_argument("--seed", type=int, default=1234)
+    suite.add_argument("--output", help="tulis hasil JSON ke file ini (mis. baseline.json)")
+    suite.add_argument("--compare", help="baseline JSON; exit 1 kalau ada regresi")
+    suite.add_argument("--threshold", type=float, default=0.2, help="toleransi regresi (0.2 = 20%% lebih lambat)")
+    suite.set_defaults(func=bench_suite)
+
+    reencode = sub.add_parser("reencode", help="hemat storage/bandwidth dari re-encode AVIF/WebP saat upload")
+    reencode.add_argument("--images", type=int, default=40, help="jumlah gambar corpus contoh")
+    reencode.add_argument("--corpus", help="folder gambar sendiri (menggantikan corpus contoh)")
+    reencode.add_argument("--seed", type=int, default=1234)
+    reencode.set_defaults(func=bench_reencode)
+
+    html = sub.add_parser("html", help="ukuran HTML per halaman + asset CSS/JS yang dirujuk")
+    html.add_argument("--media", type=int, default=40, help="jumlah media di personal page arya")
+    html.set_defaults(func=bench_html)
+
+    args = parser.parse_args()
+    print(json.dumps(args.func(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
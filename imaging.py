@@ -0,0 +1,62 @@
+"""Resize dan re-encode gambar untuk process pool di latihan.py.
+
+Sengaja hanya mengimpor Pillow: worker pool (forkserver/spawn) memuat modul
+ini tanpa ikut menjalankan inisialisasi aplikasi Flask.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+# Format yang bisa di-resize tanpa kehilangan fitur (GIF animasi dikirim asli)
+RESIZE_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+def _encodable(img, fmt):
+    """Siapkan image untuk disimpan sebagai fmt: orientasi EXIF diterapkan, mode disesuaikan"""
+    img = ImageOps.exif_transpose(img)
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    if fmt in ("WEBP", "AVIF") and img.mode not in ("RGB", "RGBA"):
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        return img.convert("RGBA" if has_alpha else "RGB")
+    return img
+
+
+def _save_options(fmt, quality, avif_speed):
+    """Argumen Image.save(): tanpa EXIF, plus opsi kecepatan encoder AVIF"""
+    options = {"quality": quality, "optimize": True, "exif": b""}
+    if fmt == "AVIF":
+        options["speed"] = avif_speed
+    return options
+
+
+def resize_image(source, target, width, quality, out_format=None, avif_speed=8):
+    """Resize source ke target, return (ukuran, mimetype) atau None kalau format tidak di-resize.
+
+    out_format ("WEBP"/"AVIF") = simpan dalam format itu, bukan format asli.
+    """
+    with Image.open(source) as img:
+        fmt = img.format
+        if fmt not in RESIZE_FORMATS:
+            return None
+        fmt = out_format or fmt
+        img = _encodable(img, fmt)
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        img.save(tmp_path, format=fmt, **_save_options(fmt, quality, avif_speed))
+        os.replace(tmp_path, target)
+    return os.path.getsize(target), Image.MIME[fmt]
+
+
+def encode_image(source, target, fmt, quality, avif_speed=8):
+    """Simpan source sebagai fmt tanpa EXIF, return ukuran (None = dilewati)"""
+    with Image.open(source) as img:
+        # GIF animasi tetap dikirim asli
+        if getattr(img, "n_frames", 1) > 1:
+            return None
+        img = _encodable(img, fmt)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        img.save(tmp_path, format=fmt, **_save_options(fmt, quality, avif_speed))
+        os.replace(tmp_path, target)
+    return os.path.getsize(target)
@@ -1,7 +1,40 @@
-from flask import Flask, request, render_template_string, redirect, url_for, session, send_from_directory
+from flask import Flask, g, request, render_template, redirect, url_for, session
+import atexit
+import bisect
+import hashlib
+import hmac
 import json
+import logging
+import logging.handlers
+import mimetypes
+import mmap
+import multiprocessing
 import os
+import queue
+import random
+import re
+import secrets
+import shutil
+import signal
+import sqlite3
+import struct
+import subprocess
+import sys
+import threading
+import time
+import wave
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from jinja2 import DictLoader, FileSystemBytecodeCache
+from werkzeug.http import is_resource_modified, parse_if_range_header, parse_range_header
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import wrap_file
+from markupsafe import Markup
 
 try:
     from dotenv import load_dotenv
@@ -10,6 +43,28 @@ except ImportError:
     # App tetap berjalan walau python-dotenv belum terpasang.
     pass
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: mode MULTI_WORKER tidak tersedia.
+    fcntl = None
+
+try:
+    from PIL import Image, features
+    import imaging
+except ImportError:
+    # Tanpa Pillow, parameter ?w= diabaikan dan gambar asli yang dikirim.
+    Image = None
+
+if __name__ == "__main__":
+    # `python latihan.py` diteruskan ke run.py, yang mengimpor file ini sebagai
+    # modul "latihan". Worker pool gambar (forkserver/spawn) mengimpor ulang
+    # __main__; dengan begitu yang dimuat ulang hanya run.py, bukan
+    # inisialisasi aplikasi di bawah (storage, thread log, template, atexit).
+    import runpy
+    runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "run.py"), run_name="__main__")
+    sys.exit(0)
+
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "change-this-secret-key-in-production")
 
@@ -20,2237 +75,5238 @@ os.makedirs(DATA_DIR, exist_ok=True)
 # File untuk menyimpan data user
 USERS_FILE = os.path.join(DATA_DIR, "users_data.json")
 PERSONAL_PAGES_FILE = os.path.join(DATA_DIR, "personal_pages.json")
+# Perubahan personal page dicatat ke PERSONAL_PAGES_FILE + ".journal" (satu baris per mutasi)
+# Journal di-compact ke snapshot di background setelah melewati ukuran ini (byte)
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+# Backend penyimpanan: "json" (default, file di atas) atau "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SQLITE_FILE = os.path.join(DATA_DIR, "app_data.sqlite3")
+# Jendela durabilitas: perubahan disimpan di background paling lambat setelah N ms
+PERSIST_INTERVAL_MS = int(os.getenv("PERSIST_INTERVAL_MS", "200"))
 
 # Folder untuk menyimpan gambar, lagu, dan video
 UPLOAD_FOLDER = os.path.join(DATA_DIR, "uploads")
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'mp3', 'wav', 'ogg', 'm4a', 'flac', 'aac', 'mp4', 'webm', 'avi', 'mov', 'mkv', 'flv', 'm4v', 'wmv'}
-
-# Buat folder uploads jika belum ada
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # Max 100MB per file (upgraded from 16MB)
-
-def allowed_file(filename):
-    """Cek apakah file adalah gambar atau lagu"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def get_file_type(filename):
-    """Tentukan tipe file: image, audio, atau video"""
-    audio_ext = {'mp3', 'wav', 'ogg', 'm4a', 'flac', 'aac'}
-    video_ext = {'mp4', 'webm', 'avi', 'mov', 'mkv', 'flv', 'm4v', 'wmv'}
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    if ext in video_ext:
-        return 'video'
-    elif ext in audio_ext:
-        return 'audio'
-    else:
-        return 'image'
-
-def get_audio_mime_type(filename):
-    """Tentukan MIME type berdasarkan ekstensi audio"""
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    mime_types = {
-        'mp3': 'audio/mpeg',
-        'wav': 'audio/wav',
-        'ogg': 'audio/ogg',
-        'm4a': 'audio/mp4',
-        'flac': 'audio/flac',
-        'aac': 'audio/aac'
-    }
-    return mime_types.get(ext, 'audio/mpeg')
-
-def get_video_mime_type(filename):
-    """Tentukan MIME type berdasarkan ekstensi video"""
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    mime_types = {
-        'mp4': 'video/mp4',
-        'webm': 'video/webm',
-        'avi': 'video/x-msvideo',
-        'mov': 'video/quicktime',
-        'mkv': 'video/x-matroska',
-        'flv': 'video/x-flv',
-        'm4v': 'video/x-m4v',
-        'wmv': 'video/x-ms-wmv'
-    }
-    return mime_types.get(ext, 'video/mp4')
-
-# Default users (akan digunakan jika file tidak ada)
-DEFAULT_USERS = {
-    "admin": {"password": "1234", "msg": "Selamat datang, Admin. Dunia aman di tanganmu.", "role": "admin", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
-    "arya": {"password": "4321", "msg": "Halo User. Hidup memang absurd, tapi jalan terus.", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
-    "guest": {"password": "0000", "msg": "Selamat datang, tamu yang terhormat. Janganlah engkau terlalu banyak berfikir tentang hal yang tak perlu.", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
-    "friend": {"password": "1111", "msg": "halo teman semoga kau selalu sehat dan mendapatkan apa yang kau inginkan", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
-    "ma biche": {"password": "151225", "msg": "je t'aime,ma biche", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"}
-}
-
-def load_users():
-    """Memuat user data dari file JSON"""
-    global USERS, PENDING_USERS, ADMIN_PANEL_ENABLED
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, 'r') as f:
-                data = json.load(f)
-                USERS = data.get("users", DEFAULT_USERS)
-                PENDING_USERS = data.get("pending_users", {})
-                ADMIN_PANEL_ENABLED = data.get("admin_panel_enabled", True)
-        except:
-            USERS = DEFAULT_USERS.copy()
-            PENDING_USERS = {}
-            ADMIN_PANEL_ENABLED = True
-    else:
-        USERS = DEFAULT_USERS.copy()
-        PENDING_USERS = {}
-        ADMIN_PANEL_ENABLED = True
-
-def save_users():
-    """Menyimpan user data ke file JSON"""
-    data = {
-        "users": USERS,
-        "pending_users": PENDING_USERS,
-        "admin_panel_enabled": ADMIN_PANEL_ENABLED
-    }
-    with open(USERS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-
-def load_personal_pages():
-    """Memuat personal page data dari file JSON"""
-    global PERSONAL_PAGES
-    if os.path.exists(PERSONAL_PAGES_FILE):
-        try:
-            with open(PERSONAL_PAGES_FILE, 'r') as f:
-                PERSONAL_PAGES = json.load(f)
-        except:
-            PERSONAL_PAGES = {}
-    else:
-        PERSONAL_PAGES = {}
-
-def save_personal_pages():
-    """Menyimpan personal page data ke file JSON"""
-    with open(PERSONAL_PAGES_FILE, 'w') as f:
-        json.dump(PERSONAL_PAGES, f, indent=2)
-
-def get_user_personal_page(username):
-    """Dapatkan data personal page user, buat default jika belum ada"""
-    if username not in PERSONAL_PAGES:
-        PERSONAL_PAGES[username] = {
-            "title": f"Personal Page - {username}",
-            "description": "Selamat datang di halaman personal saya!",
-            "bg_color": "#1a1a2e",
-            "text_color": "#ffffff",
-            "images": [],
-            "audio": [],
-            "video": [],
-            "background_image": None
-        }
-        save_personal_pages()
-    # Ensure audio array exists for backward compatibility
-    if "audio" not in PERSONAL_PAGES[username]:
-        PERSONAL_PAGES[username]["audio"] = []
-    # Ensure video array exists for backward compatibility
-    if "video" not in PERSONAL_PAGES[username]:
-        PERSONAL_PAGES[username]["video"] = []
-    return PERSONAL_PAGES[username]
-
-# Load users saat aplikasi dimulai
-load_users()
-load_personal_pages()
-
-USERS = USERS if USERS else DEFAULT_USERS.copy()
-PENDING_USERS = PENDING_USERS if PENDING_USERS else {}
-ADMIN_PANEL_ENABLED = ADMIN_PANEL_ENABLED if 'ADMIN_PANEL_ENABLED' in globals() else True
-
-REGISTER_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Register</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-position: center;
-            font-family: Arial, sans-serif;
-        }
-        .box {
-            background: rgba(0,0,0,0.65);
-            color: white;
-            padding: 30px;
-            width: 320px;
-            margin: auto;
-            margin-top: 8%;
-            border-radius: 10px;
-            text-align: center;
-        }
-        input, button {
-            width: 100%;
-            padding: 10px;
-            margin-top: 10px;
-            border-radius: 5px;
-            border: none;
-        }
-        button {
-            background: #00c6ff;
-            cursor: pointer;
-        }
-        button:hover {
-            background: #00a8d4;
-        }
-        .msg {
-            color: #ffdd57;
-            font-size: 12px;
-            margin-top: 10px;
-        }
-        .login-link {
-            margin-top: 15px;
-        }
-        .login-link a {
-            color: #00c6ff;
-            text-decoration: none;
-        }
-    </style>
-</head>
-<body>
-    <div class="box">
-        <h2>Register</h2>
-        {% if error %}
-            <p style="color: #ff4444;">{{ error }}</p>
-        {% endif %}
-        <form method="post">
-            <input name="username" placeholder="Username" required>
-            <input name="password" type="password" placeholder="Password" required>
-            <input name="confirm_password" type="password" placeholder="Confirm Password" required>
-            <button>Register</button>
-        </form>
-        <p class="msg">Akun Anda akan menunggu persetujuan admin</p>
-        <div class="login-link">
-            Sudah punya akun? <a href="/login">Login</a>
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-ADMIN_PANEL_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Admin Panel</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.jpg") }}');
-            background-size: cover;
-            background-position: center;
-            font-family: Arial, sans-serif;
-        }
-        .container {
-            background: rgba(0,0,0,0.85);
-            color: white;
-            padding: 20px;
-            height: 100vh;
-            display: flex;
-            flex-direction: column;
-        }
-        .navbar {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            padding-bottom: 20px;
-            border-bottom: 2px solid #00c6ff;
-        }
-        .navbar h1 {
-            margin: 0;
-        }
-        .navbar a {
-            color: white;
-            background: #00c6ff;
-            padding: 10px 20px;
-            text-decoration: none;
-            border-radius: 5px;
-            cursor: pointer;
-        }
-        .navbar a:hover {
-            background: #00a8d4;
-        }
-        .menu {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-            flex-wrap: wrap;
-        }
-        .menu button {
-            background: #333;
-            color: white;
-            border: 2px solid #00c6ff;
-            padding: 10px 20px;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 14px;
-        }
-        .menu button:hover {
-            background: #00c6ff;
-            color: black;
-        }
-        .menu button.active {
-            background: #00c6ff;
-            color: black;
-        }
-        .content {
-            flex: 1;
-            overflow-y: auto;
-        }
-        .request-card {
-            background: rgba(0,0,0,0.6);
-            border: 1px solid #00c6ff;
-            padding: 15px;
-            margin-bottom: 10px;
-            border-radius: 5px;
-        }
-        .request-card h3 {
-            margin-top: 0;
-            color: #00c6ff;
-        }
-        .request-card .actions {
-            display: flex;
-            gap: 10px;
-            margin-top: 10px;
-        }
-        .request-card button {
-            padding: 8px 15px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 12px;
-        }
-        .approve {
-            background: #00c600;
-            color: white;
-        }
-        .approve:hover {
-            background: #00a800;
-        }
-        .reject {
-            background: #c60000;
-            color: white;
-        }
-        .reject:hover {
-            background: #a80000;
-        }
-        .no-requests {
-            color: #888;
-            text-align: center;
-            padding: 50px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="navbar">
-            <div style="display: flex; align-items: center; gap: 15px;">
-                <h1 style="margin: 0;">⚙️ Admin Panel</h1>
-                <form method="post" style="margin: 0; display: inline;">
-                    <input type="hidden" name="action" value="toggle_admin">
-                    <button type="submit" title="{% if admin_panel_enabled %}Tutup Admin Panel{% else %}Buka Admin Panel{% endif %}" style="padding: 8px 12px; background: {% if admin_panel_enabled %}#00c600{% else %}#c60000{% endif %}; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 16px; transition: 0.3s;">
-                        {% if admin_panel_enabled %}🔓{% else %}🔒{% endif %}
-                    </button>
-                </form>
-            </div>
-            <a href="/logout">Logout</a>
-        </div>
-        
-        <div class="menu">
-            <button class="menu-btn active" onclick="showSection('pending')">📋 Permintaan Pendaftaran</button>
-            <button class="menu-btn" onclick="showSection('users')">👥 Daftar Pengguna</button>
-            <button class="menu-btn" onclick="showSection('home')">🏠 Home</button>
-        </div>
-        
-        <div class="content">
-            {% if not admin_panel_enabled %}
-            <div style="background: rgba(198,0,0,0.3); border: 2px solid #ff4444; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
-                <p style="color: #ff4444; margin: 0; font-weight: bold;">⚠️ ADMIN PANEL SEDANG DITUTUP</p>
-                <p style="margin: 5px 0 0 0; color: #ffdd57;">Fitur moderasi tidak tersedia untuk pengguna reguler</p>
-            </div>
-            {% endif %}
-            <div id="pending" class="section" style="display: block;">
-                <h2>Permintaan Pendaftaran Menunggu</h2>
-                {% if pending_users %}
-                    {% for username, data in pending_users.items() %}
-                        <div class="request-card">
-                            <h3>{{ username }}</h3>
-                            <p>Status: <span style="color: #ffdd57;">Menunggu Persetujuan</span></p>
-                            <div class="actions">
-                                <form method="post" style="display: inline;">
-                                    <input type="hidden" name="action" value="approve">
-                                    <input type="hidden" name="username" value="{{ username }}">
-                                    <button type="submit" class="approve">✓ Setujui</button>
-                                </form>
-                                <form method="post" style="display: inline;">
-                                    <input type="hidden" name="action" value="reject">
-                                    <input type="hidden" name="username" value="{{ username }}">
-                                    <button type="submit" class="reject">✗ Tolak</button>
-                                </form>
-                            </div>
-                        </div>
-                    {% endfor %}
-                {% else %}
-                    <div class="no-requests">Tidak ada permintaan pendaftaran yang menunggu</div>
-                {% endif %}
-            </div>
-            
-            <div id="users" class="section" style="display: none;">
-                <h2>Daftar Pengguna</h2>
-                {% for username, data in users.items() %}
-                    <div class="request-card">
-                        <h3>{{ username }}</h3>
-                        <p>Role: <span style="color: #00c6ff;">{{ data.role }}</span></p>
-                        <div class="actions">
-                            {% if data.role == "user" %}
-                                <form method="post" style="display: inline;">
-                                    <input type="hidden" name="action" value="make_admin">
-                                    <input type="hidden" name="username" value="{{ username }}">
-                                    <button type="submit" style="padding: 8px 15px; background: #ffaa00; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">👑 Jadikan Admin</button>
-                                </form>
-                            {% elif data.role == "admin" and username != session.get('user') %}
-                                <form method="post" style="display: inline;">
-                                    <input type="hidden" name="action" value="remove_admin">
-                                    <input type="hidden" name="username" value="{{ username }}">
-                                    <button type="submit" style="padding: 8px 15px; background: #c60000; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">👤 Hapus Admin</button>
-                                </form>
-                            {% endif %}
-                        </div>
-                    </div>
-                {% endfor %}
-            </div>
-            
-            <div id="home" class="section" style="display: none;">
-                <h2>Dashboard Admin</h2>
-                <div class="request-card">
-                    <h3>📊 Statistik</h3>
-                    <p>Total Pengguna: {{ user_count }}</p>
-                    <p>Permintaan Menunggu: {{ pending_count }}</p>
-                </div>
-                <div class="request-card">
-                    <h3>🔐 Kontrol Admin Panel</h3>
-                    <p>Status Admin Panel: 
-                        <span style="color: {% if admin_panel_enabled %}#00c600{% else %}#ff4444{% endif %};">
-                            {% if admin_panel_enabled %}✓ AKTIF{% else %}✗ NONAKTIF{% endif %}
-                        </span>
-                    </p>
-                    <form method="post" style="margin-top: 10px;">
-                        <input type="hidden" name="action" value="toggle_admin">
-                        <button type="submit" style="width: auto; padding: 8px 15px; background: {% if admin_panel_enabled %}#c60000{% else %}#00c600{% endif %}; color: white; border: none; border-radius: 5px; cursor: pointer;">
-                            {% if admin_panel_enabled %}🔒 Tutup Admin Panel{% else %}🔓 Buka Admin Panel{% endif %}
-                        </button>
-                    </form>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        function showSection(id) {
-            // Hide all sections
-            document.querySelectorAll('.section').forEach(el => el.style.display = 'none');
-            document.querySelectorAll('.menu-btn').forEach(btn => btn.classList.remove('active'));
-            
-            // Show selected section
-            document.getElementById(id).style.display = 'block';
-            event.target.classList.add('active');
-        }
-    </script>
-</body>
-</html>
-"""
-
-HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Login</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-position: center;
-            font-family: Arial, sans-serif;
-        }
-        .box {
-            background: rgba(0,0,0,0.65);
-            color: white;
-            padding: 30px;
-            width: 320px;
-            margin: auto;
-            margin-top: 12%;
-            border-radius: 10px;
-            text-align: center;
-        }
-        input, button {
-            width: 100%;
-            padding: 10px;
-            margin-top: 10px;
-            border-radius: 5px;
-            border: none;
-        }
-        button {
-            background: #00c6ff;
-            cursor: pointer;
-        }
-        .bottom-text {
-            position: fixed;
-            bottom: 100px;
-            left: 50%;
-            transform: translateX(-50%);
-            color: white;
-            font-size: 24px;
-            text-align: center;
-            background: transparent;
-            padding: 0;
-            z-index: 10;
-        }
-        .bottom-text h2 {
-            background: transparent;
-            margin: 0;
-            padding: 0;
-        }
-        .bottom-text a {
-            text-decoration: none;
-        }
-        .bottom-text button {
-            background: transparent !important;
-            color: white !important;
-            border: 1px solid white !important;
-            padding: 10px 20px !important;
-            width: auto !important;
-        }
-    </style>
-</head>
-<body>
-    {% if user == "ma biche" %}
-        <div class="bottom-text">
-            <h2>{{ msg }}</h2>
-            <a href="/logout"><button>Logout</button></a>
-        </div>
-    {% else %}
-        <div class="box">
-            {% if msg %}
-                <h2>{{ msg }}</h2>
-                <a href="/logout"><button>Logout</button></a>
-            {% else %}
-                <h2>Login</h2>
-                <form method="post">
-                    <input name="username" placeholder="Username">
-                    <input name="password" type="password" placeholder="Password">
-                    <button>Login</button>
-                </form>
-                <p style="margin-top: 15px;">Belum punya akun? <a href="/register" style="color: #00c6ff;">Daftar</a></p>
-            {% endif %}
-        </div>
-    {% endif %}
-</body>
-</html>
-"""
-
-HOME_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Home</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-position: center;
-            background-color: {{ bg_color }};
-            font-family: Arial, sans-serif;
-        }
-        .navbar {
-            background: rgba(0,0,0,0.7);
-            padding: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        .navbar h2 {
-            color: {{ text_color }};
-            margin: 0;
-        }
-        .navbar-buttons {
-            display: flex;
-            gap: 10px;
-        }
-        .navbar a {
-            color: white;
-            text-decoration: none;
-            background: #00c6ff;
-            padding: 10px 20px;
-            border-radius: 5px;
-            cursor: pointer;
-        }
-        .navbar a:hover {
-            background: #00a8d4;
-        }
-        .content {
-            color: {{ text_color }};
-            text-align: center;
-            padding: 50px 20px;
-        }
-        .content h1 {
-            font-size: 48px;
-            margin-bottom: 20px;
-            color: {{ text_color }};
-        }
-        .content p {
-            font-size: 20px;
-            max-width: 600px;
-            margin: 0 auto;
-            color: {{ text_color }};
-        }
-        .links {
-            margin-top: 50px;
-            display: flex;
-            gap: 20px;
-            justify-content: center;
-            flex-wrap: wrap;
-        }
-        .links a {
-            color: white;
-            text-decoration: none;
-            background: rgba(0,0,0,0.6);
-            padding: 15px 30px;
-            border-radius: 5px;
-            border: 2px solid #00c6ff;
-            font-size: 16px;
-            transition: 0.3s;
-        }
-        .links a:hover {
-            background: #00c6ff;
-            color: black;
-        }
-    </style>
-</head>
-<body>
-    <div class="navbar">
-        <h2>Welcome, {{ user }}!</h2>
-        <div class="navbar-buttons">
-            {% if is_admin %}
-                <a href="/admin">⚙️ Admin Panel</a>
-            {% endif %}
-            <a href="/personal-page">🎨 Personal Page</a>
-            <a href="/edit-profile">✏️ Edit Profile</a>
-            <a href="/logout">Logout</a>
-        </div>
-    </div>
-    <div class="content">
-        <h1>Home</h1>
-        <p>{{ msg }}</p>
-        <div class="links">
-            <a href="https://www.instagram.com/muhammadaryamenoza/" target="_blank">My Instagram</a>
-            <a href="https://www.instagram.com" target="_blank">Instagram</a>
-            <a href="https://mail.google.com" target="_blank">Gmail</a>
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-EDIT_PROFILE_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Edit Profile</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-position: center;
-            font-family: Arial, sans-serif;
-        }
-        .container {
-            background: rgba(0,0,0,0.85);
-            color: white;
-            padding: 30px;
-            width: 90%;
-            max-width: 600px;
-            margin: 20px auto;
-            border-radius: 10px;
-        }
-        .container h2 {
-            color: #00c6ff;
-            margin-top: 0;
-        }
-        .form-group {
-            margin-bottom: 20px;
-        }
-        .form-group label {
-            display: block;
-            margin-bottom: 5px;
-            font-weight: bold;
-            color: #00c6ff;
-        }
-        .form-group input,
-        .form-group textarea {
-            width: 100%;
-            padding: 10px;
-            border: 2px solid #00c6ff;
-            border-radius: 5px;
-            background: rgba(0,0,0,0.5);
-            color: white;
-            font-family: Arial, sans-serif;
-            box-sizing: border-box;
-        }
-        .form-group textarea {
-            resize: vertical;
-            min-height: 80px;
-        }
-        .form-group input::placeholder,
-        .form-group textarea::placeholder {
-            color: #888;
-        }
-        .color-preview {
-            display: inline-block;
-            width: 50px;
-            height: 50px;
-            border: 2px solid white;
-            border-radius: 5px;
-            margin-left: 10px;
-        }
-        .preview {
-            background: rgba(0,0,0,0.6);
-            padding: 20px;
-            border-radius: 5px;
-            margin-top: 20px;
-            border: 2px solid #00c6ff;
-        }
-        .preview h3 {
-            color: #00c6ff;
-        }
-        .preview-text {
-            padding: 10px;
-            border-radius: 5px;
-            margin: 10px 0;
-        }
-        .button-group {
-            display: flex;
-            gap: 10px;
-            margin-top: 20px;
-        }
-        .button-group button,
-        .button-group a {
-            flex: 1;
-            padding: 12px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 16px;
-            text-decoration: none;
-            text-align: center;
-        }
-        .button-group button {
-            background: #00c600;
-            color: white;
-        }
-        .button-group button:hover {
-            background: #00a800;
-        }
-        .button-group a {
-            background: #666;
-            color: white;
-        }
-        .button-group a:hover {
-            background: #888;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h2>✏️ Edit Profile</h2>
-        <form method="post">
-            <div class="form-group">
-                <label for="msg">Pesan di Home Page:</label>
-                <textarea name="msg" id="msg" placeholder="Tulis pesan Anda..." required>{{ msg }}</textarea>
-            </div>
-            
-            <div class="form-group">
-                <label for="bg_color">Warna Background:</label>
-                <input type="color" name="bg_color" id="bg_color" value="{{ bg_color }}">
-                <span class="color-preview" id="bg_preview" style="background: {{ bg_color }};"></span>
-            </div>
-            
-            <div class="form-group">
-                <label for="text_color">Warna Text:</label>
-                <input type="color" name="text_color" id="text_color" value="{{ text_color }}">
-                <span class="color-preview" id="text_preview" style="background: {{ text_color }};"></span>
-            </div>
-            
-            <div class="preview">
-                <h3>Preview:</h3>
-                <div class="preview-text" id="preview" style="background-color: {{ bg_color }}; color: {{ text_color }};">
-                    {{ msg }}
-                </div>
-            </div>
-            
-            <div class="button-group">
-                <button type="submit">💾 Simpan Perubahan</button>
-                <a href="/home">Batal</a>
-            </div>
-        </form>
-    </div>
-    
-    <script>
-        // Update preview saat user mengetik
-        document.getElementById('msg').addEventListener('input', updatePreview);
-        document.getElementById('bg_color').addEventListener('change', updatePreview);
-        document.getElementById('text_color').addEventListener('change', updatePreview);
-        
-        function updatePreview() {
-            const msg = document.getElementById('msg').value;
-            const bgColor = document.getElementById('bg_color').value;
-            const textColor = document.getElementById('text_color').value;
-            
-            const preview = document.getElementById('preview');
-            preview.style.backgroundColor = bgColor;
-            preview.style.color = textColor;
-            preview.textContent = msg;
-            
-            document.getElementById('bg_preview').style.background = bgColor;
-            document.getElementById('text_preview').style.background = textColor;
-        }
-    </script>
-</body>
-</html>
-"""
-
-PUBLIC_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Public Home</title>
-    <style>
-        body {
-            margin: 0;
-            height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-position: center;
-            font-family: Arial, sans-serif;
-        }
-        .navbar {
-            background: rgba(0,0,0,0.7);
-            padding: 20px;
-            text-align: right;
-        }
-        .navbar h2 {
-            color: white;
-            margin: 0 0 10px 0;
-        }
-        .navbar a {
-            color: white;
-            text-decoration: none;
-            background: #00c6ff;
-            padding: 10px 20px;
-            border-radius: 5px;
-            cursor: pointer;
-            margin-left: 10px;
-        }
-        .navbar a:hover {
-            background: #00a8d4;
-        }
-        .content {
-            color: white;
-            text-align: center;
-            padding: 50px 20px;
-        }
-        .content h1 {
-            font-size: 48px;
-            margin-bottom: 20px;
-        }
-        .content p {
-            font-size: 20px;
-            max-width: 600px;
-            margin: 0 auto;
-        }
-        .links {
-            margin-top: 50px;
-            display: flex;
-            gap: 20px;
-            justify-content: center;
-            flex-wrap: wrap;
-        }
-        .links a {
-            color: white;
-            text-decoration: none;
-            background: rgba(0,0,0,0.6);
-            padding: 15px 30px;
-            border-radius: 5px;
-            border: 2px solid #00c6ff;
-            font-size: 16px;
-            transition: 0.3s;
-        }
-        .links a:hover {
-            background: #00c6ff;
-            color: black;
-        }
-    </style>
-</head>
-<body>
-    <div class="navbar">
-        <h2>Welcome to My Site!</h2>
-        <div style="display: flex; gap: 10px;">
-            <a href="/register">📝 Register</a>
-            <a href="/login">🔐 Login</a>
-        </div>
-    </div>
-    <div class="content">
-        <h1>Welcome</h1>
-        <p>Access my social media and contact accounts</p>
-        <div class="links">
-            <a href="https://www.instagram.com/muhammadaryamenoza/" target="_blank">My Instagram</a>
-            <a href="https://www.instagram.com" target="_blank">Instagram</a>
-            <a href="https://mail.google.com" target="_blank">Gmail</a>
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-PERSONAL_PAGE_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>{{ title }}</title>
-    <style>
-        body {
-            margin: 0;
-            min-height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-attachment: fixed;
-            background-color: {{ bg_color }};
-            font-family: Arial, sans-serif;
-            {% if background_image %}
-            background-image: url('/uploads/{{ background_image }}') !important;
-            background-attachment: fixed;
-            background-position: center;
-            background-repeat: no-repeat;
-            {% endif %}
-        }
-        body::before {
-            content: '';
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: rgba(0,0,0,0.4);
-            pointer-events: none;
-            z-index: -1;
-        }
-        .navbar {
-            background: rgba(0,0,0,0.8);
-            padding: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            gap: 20px;
-            flex-wrap: wrap;
-        }
-        .navbar h2 {
-            color: {{ text_color }};
-            margin: 0;
-        }
-        .search-form {
-            display: flex;
-            gap: 10px;
-            align-items: center;
-        }
-        .search-form input {
-            padding: 10px 15px;
-            border: 2px solid #00c6ff;
-            border-radius: 5px;
-            background: rgba(0,0,0,0.5);
-            color: white;
-            min-width: 200px;
-        }
-        .search-form input::placeholder {
-            color: #888;
-        }
-        .search-form input:focus {
-            outline: none;
-            border-color: #00ff00;
-            box-shadow: 0 0 10px rgba(0,255,0,0.3);
-        }
-        .search-form button {
-            padding: 10px 20px;
-            background: #00c6ff;
-            color: black;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-weight: bold;
-        }
-        .search-form button:hover {
-            background: #00a8d4;
-        }
-        .navbar-buttons {
-            display: flex;
-            gap: 10px;
-        }
-        .navbar a {
-            color: white;
-            text-decoration: none;
-            background: #00c6ff;
-            padding: 10px 20px;
-            border-radius: 5px;
-            cursor: pointer;
-        }
-        .navbar a:hover {
-            background: #00a8d4;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 40px auto;
-            padding: 20px;
-            background: rgba(0,0,0,0.7);
-            border-radius: 10px;
-            color: {{ text_color }};
-        }
-        .header {
-            text-align: center;
-            margin-bottom: 40px;
-        }
-        .header h1 {
-            font-size: 36px;
-            margin: 0 0 10px 0;
-            color: {{ text_color }};
-        }
-        .header p {
-            font-size: 18px;
-            margin: 0;
-            color: {{ text_color }};
-        }
-        .gallery {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 40px;
-        }
-        .gallery-item {
-            background: rgba(0,0,0,0.5);
-            border-radius: 8px;
-            overflow: hidden;
-            border: 2px solid #00c6ff;
-            position: relative;
-        }
-        .gallery-item img {
-            width: 100%;
-            height: 250px;
-            object-fit: cover;
-            display: block;
-        }
-        .gallery-item .delete-btn {
-            position: absolute;
-            top: 5px;
-            right: 5px;
-            background: #c60000;
-            color: white;
-            border: none;
-            padding: 5px 10px;
-            border-radius: 3px;
-            cursor: pointer;
-            font-size: 12px;
-        }
-        .gallery-item .delete-btn:hover {
-            background: #a80000;
-        }
-    </style>
-</head>
-<body>
-    <div class="navbar">
-        <h2>🎨 Personal Page</h2>
-        <form method="get" action="/view-user" class="search-form">
-            <input type="text" name="username" placeholder="Cari user..." required>
-            <button type="submit">🔍 Cari</button>
-        </form>
-        <div class="navbar-buttons">
-            <a href="/edit-personal-page">✏️ Edit</a>
-            <a href="/home">🏠 Home</a>
-            <a href="/logout">Logout</a>
-        </div>
-    </div>
-    
-    <div class="container">
-        <div class="header">
-            <h1>{{ title }}</h1>
-            <p>{{ description }}</p>
-        </div>
-        
-        <div class="gallery">
-            {% if images %}
-                {% for image in images %}
-                    <div class="gallery-item">
-                        <img src="/uploads/{{ image.filename }}" alt="Image">
-                        {% if current_user == owner or is_admin %}
-                        <form method="post" style="display: inline;" action="/delete-image">
-                            <input type="hidden" name="image" value="{{ image.filename }}">
-                            <button type="submit" class="delete-btn">🗑️ Hapus</button>
-                        </form>
-                        {% endif %}
-                    </div>
-                {% endfor %}
-            {% else %}
-                <div style="grid-column: 1 / -1; text-align: center; padding: 40px; color: #888;">
-                    <p>Belum ada gambar. Klik Edit untuk menambahkan!</p>
-                </div>
-            {% endif %}
-        </div>
-
-        {% if audio %}
-        <h2 style="color: {{ text_color }}; margin-top: 40px;">🎵 Lagu</h2>
-        <div style="display: flex; flex-direction: column; gap: 15px;">
-            {% for track in audio %}
-                <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border: 2px solid #00c6ff; display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
-                    <div style="flex: 1; min-width: 200px;">
-                        <p style="margin: 0 0 8px 0; color: {{ text_color }}; font-weight: bold;">🎵 {{ track.filename.split('_')[-1] }}</p>
-                        <audio style="width: 100%; max-width: 400px;" controls preload="metadata">
-                            <source src="/uploads/{{ track.filename }}">
-                            Browser Anda tidak mendukung audio. <a href="/uploads/{{ track.filename }}">Download lagu</a>
-                        </audio>
-                    </div>
-                    {% if current_user == owner or is_admin %}
-                    <form method="post" style="display: inline;" action="/delete-image">
-                        <input type="hidden" name="image" value="{{ track.filename }}">
-                        <button type="submit" class="delete-btn">🗑️ Hapus</button>
-                    </form>
-                    {% endif %}
-                </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-
-        {% if video %}
-        <h2 style="color: {{ text_color }}; margin-top: 40px;">🎬 Video</h2>
-        <div style="display: flex; flex-direction: column; gap: 15px;">
-            {% for vid in video %}
-                <div style="background: rgba(0,0,0,0.5); padding: 15px; border-radius: 8px; border: 2px solid #00c6ff; display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
-                    <div style="flex: 1; min-width: 250px;">
-                        <p style="margin: 0 0 8px 0; color: {{ text_color }}; font-weight: bold;">🎬 {{ vid.filename.split('_')[-1] }}</p>
-                        <video style="width: 100%; max-width: 500px; border-radius: 5px;" controls preload="metadata">
-                            <source src="/uploads/{{ vid.filename }}">
-                            Browser Anda tidak mendukung video. <a href="/uploads/{{ vid.filename }}">Download video</a>
-                        </video>
-                    </div>
-                    {% if current_user == owner or is_admin %}
-                    <form method="post" style="display: inline;" action="/delete-image">
-                        <input type="hidden" name="image" value="{{ vid.filename }}">
-                        <button type="submit" class="delete-btn">🗑️ Hapus</button>
-                    </form>
-                    {% endif %}
-                </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-    </div>
-</body>
-</html>
-"""
-
-EDIT_PERSONAL_PAGE_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Edit Personal Page</title>
-    <style>
-        body {
-            margin: 0;
-            min-height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-color: #1a1a2e;
-            font-family: Arial, sans-serif;
-        }
-        .container {
-            background: rgba(0,0,0,0.85);
-            color: white;
-            padding: 30px;
-            width: 90%;
-            max-width: 600px;
-            margin: 20px auto;
-            border-radius: 10px;
-        }
-        .container h2 {
-            color: #00c6ff;
-            margin-top: 0;
-        }
-        .form-group {
-            margin-bottom: 20px;
-        }
-        .form-group label {
-            display: block;
-            margin-bottom: 5px;
-            font-weight: bold;
-            color: #00c6ff;
-        }
-        .form-group input,
-        .form-group textarea {
-            width: 100%;
-            padding: 10px;
-            border: 2px solid #00c6ff;
-            border-radius: 5px;
-            background: rgba(0,0,0,0.5);
-            color: white;
-            font-family: Arial, sans-serif;
-            box-sizing: border-box;
-        }
-        .form-group textarea {
-            resize: vertical;
-            min-height: 80px;
-        }
-        .form-group input::placeholder,
-        .form-group textarea::placeholder {
-            color: #888;
-        }
-        .upload-area {
-            border: 2px dashed #00c6ff;
-            padding: 20px;
-            border-radius: 5px;
-            text-align: center;
-            cursor: pointer;
-            background: rgba(0,0,0,0.3);
-            margin: 20px 0;
-        }
-        .upload-area:hover {
-            background: rgba(0,198,255,0.1);
-        }
-        .upload-area input[type="file"] {
-            display: none;
-        }
-        .color-preview {
-            display: inline-block;
-            width: 50px;
-            height: 50px;
-            border: 2px solid white;
-            border-radius: 5px;
-            margin-left: 10px;
-        }
-        .preview {
-            background: rgba(0,0,0,0.6);
-            padding: 20px;
-            border-radius: 5px;
-            margin-top: 20px;
-            border: 2px solid #00c6ff;
-        }
-        .preview h3 {
-            color: #00c6ff;
-        }
-        .preview-text {
-            padding: 10px;
-            border-radius: 5px;
-            margin: 10px 0;
-        }
-        .button-group {
-            display: flex;
-            gap: 10px;
-            margin-top: 20px;
-        }
-        .button-group button,
-        .button-group a {
-            flex: 1;
-            padding: 12px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 16px;
-            text-decoration: none;
-            text-align: center;
-        }
-        .button-group button {
-            background: #00c600;
-            color: white;
-        }
-        .button-group button:hover {
-            background: #00a800;
-        }
-        .button-group a {
-            background: #666;
-            color: white;
-        }
-        .button-group a:hover {
-            background: #888;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h2>✏️ Edit Personal Page</h2>
-        
-        <form method="post" enctype="multipart/form-data">
-            <div class="form-group">
-                <label for="title">Judul Halaman:</label>
-                <input type="text" name="title" id="title" value="{{ title }}" required>
-            </div>
-            
-            <div class="form-group">
-                <label for="description">Deskripsi:</label>
-                <textarea name="description" id="description" placeholder="Tulis deskripsi halaman Anda..." required>{{ description }}</textarea>
-            </div>
-            
-            <div class="form-group">
-                <label for="bg_color">Warna Background:</label>
-                <input type="color" name="bg_color" id="bg_color" value="{{ bg_color }}">
-                <span class="color-preview" id="bg_preview" style="background: {{ bg_color }};"></span>
-            </div>
-            
-            <div class="form-group">
-                <label for="text_color">Warna Text:</label>
-                <input type="color" name="text_color" id="text_color" value="{{ text_color }}">
-                <span class="color-preview" id="text_preview" style="background: {{ text_color }};"></span>
-            </div>
-            
-            <div class="form-group">
-                <label>Upload Gambar, Lagu, atau Video:</label>
-                <div class="upload-area" id="uploadArea" onclick="document.getElementById('image_file').click();">
-                    <p>📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini</p>
-                    <input type="file" id="image_file" name="image" accept="image/*,audio/*,video/*">
-                </div>
-                <div id="uploadStatus" style="margin-top: 10px;"></div>
-            </div>
-            
-            <div class="form-group">
-                <label>Atau Pilih dari Gallery:</label>
-                <a href="/image-gallery" style="display: inline-block; background: #00c6ff; color: black; padding: 10px 20px; border-radius: 5px; text-decoration: none; font-weight: bold;">🖼️ Buka Galeri</a>
-            </div>
-            
-            <div class="preview">
-                <h3>Preview:</h3>
-                <div class="preview-text" id="preview" style="background-color: {{ bg_color }}; color: {{ text_color }};">
-                    <strong>{{ title }}</strong><br>
-                    {{ description }}
-                </div>
-            </div>
-            
-            <div class="button-group">
-                <button type="submit">💾 Simpan Perubahan</button>
-                <a href="/personal-page">Batal</a>
-            </div>
-        </form>
-    </div>
-    
-    <script>
-        document.getElementById('title').addEventListener('input', updatePreview);
-        document.getElementById('description').addEventListener('input', updatePreview);
-        document.getElementById('bg_color').addEventListener('change', updatePreview);
-        document.getElementById('text_color').addEventListener('change', updatePreview);
-        
-        function updatePreview() {
-            const title = document.getElementById('title').value;
-            const description = document.getElementById('description').value;
-            const bgColor = document.getElementById('bg_color').value;
-            const textColor = document.getElementById('text_color').value;
-            
-            const preview = document.getElementById('preview');
-            preview.style.backgroundColor = bgColor;
-            preview.style.color = textColor;
-            preview.innerHTML = '<strong>' + title + '</strong><br>' + description;
-            
-            document.getElementById('bg_preview').style.background = bgColor;
-            document.getElementById('text_preview').style.background = textColor;
-        }
-        
-        document.getElementById('image_file').addEventListener('change', (e) => {
-            const file = e.target.files[0];
-            if (!file) return;
-            
-            const uploadArea = document.getElementById('uploadArea');
-            const uploadStatus = document.getElementById('uploadStatus');
-            
-            // Show loading
-            uploadArea.innerHTML = '⏳ Mengupload file...';
-            uploadArea.style.opacity = '0.5';
-            uploadStatus.innerHTML = '';
-            
-            // Create FormData
-            const formData = new FormData();
-            formData.append('image', file);
-            
-            // Upload via AJAX
-            fetch('/upload-image-instant', {
-                method: 'POST',
-                body: formData
-            })
-            .then(response => response.json())
-                .then(data => {
-                if (data.success) {
-                    uploadArea.innerHTML = '✅ ' + (data.message || 'File berhasil diupload!') + '<br><small>' + file.name + '</small>';
-                    uploadArea.style.opacity = '1';
-                    uploadStatus.innerHTML = '<div style="padding: 10px; background: rgba(0, 198, 0, 0.3); color: #00c600; border: 1px solid #00c600; border-radius: 5px; text-align: center;">✅ ' + data.message + '</div>';
-                    // Reset file input
-                    e.target.value = '';
-                    setTimeout(() => {
-                        uploadArea.innerHTML = '📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini';
-                        uploadStatus.innerHTML = '';
-                    }, 3000);
-                } else {
-                    throw new Error(data.error);
-                }
-            })
-            .catch(error => {
-                uploadArea.innerHTML = '📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini';
-                uploadArea.style.opacity = '1';
-                uploadStatus.innerHTML = '<div style="padding: 10px; background: rgba(198, 0, 0, 0.3); color: #ff4444; border: 1px solid #ff4444; border-radius: 5px; text-align: center;">❌ Upload gagal: ' + error.message + '</div>';
-                e.target.value = '';
-            });
-        });
-        
-        // Drag and drop
-        const uploadArea = document.getElementById('uploadArea');
-        uploadArea.addEventListener('dragover', (e) => {
-            e.preventDefault();
-            uploadArea.style.background = 'rgba(0,198,255,0.2)';
-        });
-        uploadArea.addEventListener('dragleave', () => {
-            uploadArea.style.background = 'rgba(0,0,0,0.3)';
-        });
-        uploadArea.addEventListener('drop', (e) => {
-            e.preventDefault();
-            uploadArea.style.background = 'rgba(0,0,0,0.3)';
-            const files = e.dataTransfer.files;
-            if (files.length) {
-                document.getElementById('image_file').files = files;
-                // Trigger change event
-                const event = new Event('change', { bubbles: true });
-                document.getElementById('image_file').dispatchEvent(event);
-            }
-        });
-    </script>
-</body>
-</html>
-"""
-
-IMAGE_GALLERY_HTML = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Image Gallery</title>
-    <style>
-        body {
-            margin: 0;
-            min-height: 100vh;
-            background: url('{{ url_for("static", filename="bg.png") }}');
-            background-size: cover;
-            background-color: #1a1a2e;
-            font-family: Arial, sans-serif;
-        }
-        .navbar {
-            background: rgba(0,0,0,0.8);
-            padding: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        .navbar h2 {
-            color: white;
-            margin: 0;
-        }
-        .navbar a {
-            color: white;
-            text-decoration: none;
-            background: #00c6ff;
-            padding: 10px 20px;
-            border-radius: 5px;
-        }
-        .navbar a:hover {
-            background: #00a8d4;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 40px auto;
-            padding: 20px;
-        }
-        .container h2 {
-            color: white;
-            text-align: center;
-        }
-        .gallery {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
-            gap: 20px;
-        }
-        .gallery-item {
-            background: rgba(0,0,0,0.7);
-            border-radius: 8px;
-            overflow: hidden;
-            border: 2px solid #00c6ff;
-            cursor: pointer;
-            transition: 0.3s;
-            position: relative;
-        }
-        .gallery-item:hover {
-            border-color: #00ff00;
-            box-shadow: 0 0 10px rgba(0,255,0,0.3);
-        }
-        .gallery-item img {
-            width: 100%;
-            height: 250px;
-            object-fit: cover;
-            display: block;
-        }
-        .gallery-item-info {
-            padding: 10px;
-            color: white;
-            font-size: 12px;
-        }
-        .gallery-item-info p {
-            margin: 5px 0;
-        }
-        .set-bg-btn {
-            position: absolute;
-            bottom: 10px;
-            left: 10px;
-            right: 10px;
-            background: #00c600;
-            color: white;
-            border: none;
-            padding: 8px;
-            border-radius: 5px;
-            cursor: pointer;
-            font-size: 12px;
-        }
-        .set-bg-btn:hover {
-            background: #00a800;
-        }
-        .no-images {
-            color: white;
-            text-align: center;
-            padding: 40px;
-            font-size: 18px;
-        }
-    </style>
-</head>
-<body>
-    <div class="navbar">
-        <h2>🖼️ Gallery (Images & Music)</h2>
-        <a href="/edit-personal-page">← Back</a>
-    </div>
-    
-    <div class="container">
-        <h2>Galeri Anda - Pilih Background atau Kelola File</h2>
-        <div class="gallery">
-            {% if images %}
-                <h3 style="color: white; grid-column: 1 / -1;">📸 Gambar</h3>
-                {% for image in images %}
-                    <div class="gallery-item">
-                        <img src="/uploads/{{ image.filename }}" alt="Image">
-                        <div class="gallery-item-info">
-                            <p>Uploaded by you</p>
-                            <p>Visibility: <strong>{{ image.visibility }}</strong></p>
-                        </div>
-                        <div style="display: flex; gap: 8px; width: 100%; flex-wrap: wrap;">
-                            <form method="post" style="flex: 1; min-width: 120px;" action="/set-background">
-                                <input type="hidden" name="image" value="{{ image.filename }}">
-                                <button type="submit" class="set-bg-btn" style="width: 100%;">🎨 Background</button>
-                            </form>
-                            <form method="post" style="flex: 1; min-width: 120px;" action="/toggle-visibility">
-                                <input type="hidden" name="image" value="{{ image.filename }}">
-                                <button type="submit" class="set-bg-btn" style="width: 100%;">🔁 Visibility</button>
-                            </form>
-                        </div>
-                    </div>
-                {% endfor %}
-            {% endif %}
-            
-            {% if audio %}
-                <h3 style="color: white; grid-column: 1 / -1;">🎵 Lagu</h3>
-                {% for track in audio %}
-                    <div style="grid-column: 1 / -1; background: rgba(0,0,0,0.7); padding: 15px; border: 2px solid #00c6ff; border-radius: 8px; display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
-                        <div style="flex: 1; min-width: 200px;">
-                            <p style="margin: 0 0 8px 0; color: white; font-weight: bold;">🎵 {{ track.filename.split('_')[-1] }}</p>
-                            <p style="margin: 5px 0; color: #aaa; font-size: 12px;">Visibility: <strong>{{ track.visibility }}</strong></p>
-                        </div>
-                        <div style="display: flex; gap: 8px; flex-wrap: wrap;">
-                            <form method="post" style="display: inline;" action="/toggle-visibility">
-                                <input type="hidden" name="image" value="{{ track.filename }}">
-                                <button type="submit" style="padding: 8px 12px; background: #00c600; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">🔁 Toggle</button>
-                            </form>
-                            <form method="post" style="display: inline;" action="/delete-image">
-                                <input type="hidden" name="image" value="{{ track.filename }}">
-                                <button type="submit" style="padding: 8px 12px; background: #c60000; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">🗑️ Delete</button>
-                            </form>
-                        </div>
-                    </div>
-                {% endfor %}
-            {% endif %}
-
-            {% if video %}
-                <h3 style="color: white; grid-column: 1 / -1;">🎬 Video</h3>
-                {% for vid in video %}
-                    <div style="grid-column: 1 / -1; background: rgba(0,0,0,0.7); padding: 15px; border: 2px solid #00c6ff; border-radius: 8px; display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 10px;">
-                        <div style="flex: 1; min-width: 250px;">
-                            <p style="margin: 0 0 8px 0; color: white; font-weight: bold;">🎬 {{ vid.filename.split('_')[-1] }}</p>
-                            <p style="margin: 5px 0; color: #aaa; font-size: 12px;">Visibility: <strong>{{ vid.visibility }}</strong></p>
-                        </div>
-                        <div style="display: flex; gap: 8px; flex-wrap: wrap;">
-                            <form method="post" style="display: inline;" action="/toggle-visibility">
-                                <input type="hidden" name="image" value="{{ vid.filename }}">
-                                <button type="submit" style="padding: 8px 12px; background: #00c600; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">🔁 Toggle</button>
-                            </form>
-                            <form method="post" style="display: inline;" action="/delete-image">
-                                <input type="hidden" name="image" value="{{ vid.filename }}">
-                                <button type="submit" style="padding: 8px 12px; background: #c60000; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">🗑️ Delete</button>
-                            </form>
-                        </div>
-                    </div>
-                {% endfor %}
-            {% endif %}
-            
-            {% if not images and not audio and not video %}
-                <div class="no-images">Belum ada file di galeri</div>
-            {% endif %}
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-@app.route("/public")
-def public():
-    return render_template_string(PUBLIC_HTML)
-
-@app.route('/uploads/<filename>')
-def uploaded_file(filename):
-    """Serve uploaded files but allow owner, admin, or if image/audio is public."""
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-
-    # Find owner and visibility by scanning PERSONAL_PAGES (both images and audio)
-    owner = None
-    visibility = None
-    file_type = None
-    
-    for uname, pdata in PERSONAL_PAGES.items():
-        # Search in images
-        for img in pdata.get("images", []):
-            if isinstance(img, dict) and img.get("filename") == filename:
-                owner = uname
-                visibility = img.get("visibility", "private")
-                file_type = "image"
-                break
-            if isinstance(img, str) and img == filename:
-                owner = uname
-                visibility = "private"
-                file_type = "image"
-                break
-        
-        # Search in audio
-        if not owner:
-            for track in pdata.get("audio", []):
-                if isinstance(track, dict) and track.get("filename") == filename:
-                    owner = uname
-                    visibility = track.get("visibility", "private")
-                    file_type = "audio"
-                    break
-                if isinstance(track, str) and track == filename:
-                    owner = uname
-                    visibility = "private"
-                    file_type = "audio"
-                    break
-        
-        if owner:
-            break
-
-    if not owner:
-        return "Not found", 404
-
-    # Allow if requester is owner, or file is public, or requester is admin
-    if user == owner or visibility == "public" or USERS.get(user, {}).get("role") == "admin":
-        # For audio files, set correct MIME type
-        if file_type == "audio":
-            mime_type = get_audio_mime_type(filename)
-            return send_from_directory(app.config['UPLOAD_FOLDER'], filename, mimetype=mime_type)
-        
-        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-
-    return "Forbidden", 403
-
-@app.route('/upload-image-instant', methods=['POST'])
-def upload_image_instant():
-    """Handle instant image or audio upload via AJAX"""
-    user = session.get("user")
-    if not user:
-        return {"error": "Not authenticated"}, 401
-    
-    if 'image' not in request.files:
-        return {"error": "No file provided"}, 400
-    
-    file = request.files['image']
-    if file.filename == '' or not allowed_file(file.filename):
-        return {"error": "Invalid file"}, 400
-    
-    page_data = get_user_personal_page(user)
-    file_type = get_file_type(file.filename)
-    
-    if file_type == 'audio':
-        # Store in audio array
-        total_files = len(page_data.get('audio', []))
-        filename = secure_filename(f"{user}_{total_files}_{file.filename}")
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-        
-        if "audio" not in page_data:
-            page_data["audio"] = []
-        page_data["audio"].append({"filename": filename, "visibility": "private"})
-        message = "Lagu berhasil diupload!"
-    elif file_type == 'video':
-        # Store in video array
-        total_files = len(page_data.get('video', []))
-        filename = secure_filename(f"{user}_{total_files}_{file.filename}")
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-        
-        if "video" not in page_data:
-            page_data["video"] = []
-        page_data["video"].append({"filename": filename, "visibility": "private"})
-        message = "Video berhasil diupload!"
-    else:
-        # Store in images array (existing behavior)
-        total_files = len(page_data.get('images', []))
-        filename = secure_filename(f"{user}_{total_files}_{file.filename}")
-        file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-        
-        if "images" not in page_data:
-            page_data["images"] = []
-        page_data["images"].append({"filename": filename, "visibility": "private"})
-        message = "Gambar berhasil diupload!"
-    
-    PERSONAL_PAGES[user] = page_data
-    save_personal_pages()
-    
-    return {"success": True, "filename": filename, "message": message, "type": file_type}
-
-@app.route("/home")
-def home():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    user_data = USERS.get(user, {})
-    msg = user_data.get("msg", "Welcome!")
-    bg_color = user_data.get("bg_color", "#000000")
-    text_color = user_data.get("text_color", "#ffffff")
-    is_admin = user_data.get("role") == "admin"
-    return render_template_string(HOME_HTML, user=user, msg=msg, bg_color=bg_color, text_color=text_color, is_admin=is_admin)
-
-@app.route("/edit-profile", methods=["GET", "POST"])
-def edit_profile():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    
-    if request.method == "POST":
-        msg = request.form.get("msg", "")
-        bg_color = request.form.get("bg_color", "#000000")
-        text_color = request.form.get("text_color", "#ffffff")
-        
-        # Update user data
-        if user in USERS:
-            USERS[user]["msg"] = msg
-            USERS[user]["bg_color"] = bg_color
-            USERS[user]["text_color"] = text_color
-            save_users()  # Simpan perubahan ke file
-        
-        return redirect(url_for("home"))
-    
-    user_data = USERS.get(user, {})
-    msg = user_data.get("msg", "")
-    bg_color = user_data.get("bg_color", "#000000")
-    text_color = user_data.get("text_color", "#ffffff")
-    
-    return render_template_string(EDIT_PROFILE_HTML, msg=msg, bg_color=bg_color, text_color=text_color)
-
-@app.route("/")
-def index():
-    user = session.get("user")
-    if user:
-        return redirect(url_for("home"))
-    else:
-        return redirect(url_for("public"))
-
-@app.route("/register", methods=["GET", "POST"])
-def register():
-    error = None
-    if request.method == "POST":
-        u = request.form.get("username", "").strip()
-        p = request.form.get("password", "")
-        cp = request.form.get("confirm_password", "")
-        
-        if not u or not p or not cp:
-            error = "Semua field harus diisi"
-        elif len(u) < 3:
-            error = "Username harus minimal 3 karakter"
-        elif len(p) < 3:
-            error = "Password harus minimal 3 karakter"
-        elif p != cp:
-            error = "Password tidak cocok"
-        elif u in USERS:
-            error = "Username sudah terdaftar"
-        elif u in PENDING_USERS:
-            error = "Username sudah dalam antrian persetujuan"
-        else:
-            PENDING_USERS[u] = {"password": p}
-            save_users()  # Simpan perubahan ke file
-            return redirect(url_for("register_success"))
-    
-    return render_template_string(REGISTER_HTML, error=error)
-
-@app.route("/register-success")
-def register_success():
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Registrasi Berhasil</title>
-        <style>
-            body {
-                margin: 0;
-                height: 100vh;
-                background: url('""" + url_for("static", filename="bg.png") + """');
-                background-size: cover;
-                font-family: Arial, sans-serif;
-            }
-            .box {
-                background: rgba(0,0,0,0.65);
-                color: white;
-                padding: 30px;
-                width: 320px;
-                margin: auto;
-                margin-top: 15%;
-                border-radius: 10px;
-                text-align: center;
-            }
-            a {
-                display: inline-block;
-                background: #00c6ff;
-                color: black;
-                padding: 10px 20px;
-                margin-top: 20px;
-                text-decoration: none;
-                border-radius: 5px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="box">
-            <h2>✓ Registrasi Berhasil!</h2>
-            <p>Akun Anda telah terdaftar dan menunggu persetujuan admin.</p>
-            <p>Silakan tunggu hingga admin menyetujui akun Anda.</p>
-            <a href="/login">Kembali ke Login</a>
-        </div>
-    </body>
-    </html>
-    """
-
-@app.route("/admin", methods=["GET", "POST"])
-def admin_panel():
-    global ADMIN_PANEL_ENABLED
-    user = session.get("user")
-    if not user or USERS.get(user, {}).get("role") != "admin":
-        return redirect(url_for("login"))
-    
-    if request.method == "POST":
-        action = request.form.get("action")
-        username = request.form.get("username")
-        
-        if action == "toggle_admin":
-            ADMIN_PANEL_ENABLED = not ADMIN_PANEL_ENABLED
-            save_users()
-            return redirect(url_for("admin_panel"))
-        elif action == "approve" and username in PENDING_USERS:
-            USERS[username] = {
-                "password": PENDING_USERS[username]["password"],
-                "msg": f"Selamat datang, {username}!",
-                "role": "user",
-                "bg_color": "#000000",
-                "text_color": "#ffffff",
-                "theme": "dark"
-            }
-            del PENDING_USERS[username]
-            save_users()  # Simpan perubahan ke file
-        elif action == "reject" and username in PENDING_USERS:
-            del PENDING_USERS[username]
-            save_users()  # Simpan perubahan ke file
-        elif action == "make_admin" and username in USERS:
-            USERS[username]["role"] = "admin"
-            save_users()  # Simpan perubahan ke file
-        elif action == "remove_admin" and username in USERS and username != user:
-            USERS[username]["role"] = "user"
-            save_users()  # Simpan perubahan ke file
-        
-        return redirect(url_for("admin_panel"))
-    
-    return render_template_string(
-        ADMIN_PANEL_HTML,
-        pending_users=PENDING_USERS if ADMIN_PANEL_ENABLED else {},
-        users=USERS,
-        user_count=len(USERS),
-        pending_count=len(PENDING_USERS) if ADMIN_PANEL_ENABLED else 0,
-        admin_panel_enabled=ADMIN_PANEL_ENABLED
-    )
-
-@app.route("/login", methods=["GET", "POST"])
-def login():
-    if request.method == "POST":
-        u = request.form.get("username", "")
-        p = request.form.get("password", "")
-
-        if u in USERS and USERS[u]["password"] == p:
-            session["user"] = u
-            print(f"DEBUG: Session set for user {u}")
-            # Redirect based on user type
-            if u == "guest":
-                return redirect("https://www.instagram.com/muhammadaryamenoza/")
-            else:
-                return redirect(url_for("home"))
-        else:
-            print(f"DEBUG: Login failed for user {u}")
-
-    user = session.get("user")
-    return render_template_string(HTML, msg=USERS.get(user, {}).get("msg") if user else None)
-
-@app.route("/logout")
-def logout():
-    session.clear()
-    return redirect(url_for("public"))
-
-@app.route("/personal-page")
-def personal_page():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    
-    page_data = get_user_personal_page(user)
-    audio_list = page_data.get("audio", [])
-    video_list = page_data.get("video", [])
-    print(f"DEBUG: personal_page for user={user}, audio_list={audio_list}, video_list={video_list}")
-    return render_template_string(
-        PERSONAL_PAGE_HTML,
-        title=page_data.get("title", ""),
-        description=page_data.get("description", ""),
-        bg_color=page_data.get("bg_color", "#1a1a2e"),
-        text_color=page_data.get("text_color", "#ffffff"),
-        images=page_data.get("images", []),
-        audio=audio_list,
-        video=video_list,
-        background_image=page_data.get("background_image", None),
-        owner=user,
-        current_user=user,
-        is_admin=(USERS.get(user, {}).get("role") == "admin")
-    )
-
-@app.route("/view-user")
-def view_user():
-    """Melihat personal page user lain"""
-    search_username = request.args.get("username", "").strip()
-    current_user = session.get("user")
-
-    if not current_user:
-        return redirect(url_for("login"))
-
-    # Cari pada USERS (bukan hanya PERSONAL_PAGES), karena personal page dibuat
-    # secara lazy. Jika user ada di USERS, pastikan personal page dibuat lalu tampilkan.
-    if not search_username or search_username not in USERS:
-        # User tidak ditemukan
-        return render_template_string("""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>User Tidak Ditemukan</title>
-            <style>
-                body {
-                    margin: 0;
-                    height: 100vh;
-                    background: url('""" + url_for("static", filename="bg.png") + """');
-                    background-size: cover;
-                    font-family: Arial, sans-serif;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                }
-                .box {
-                    background: rgba(0,0,0,0.85);
-                    color: white;
-                    padding: 40px;
-                    width: 400px;
-                    border-radius: 10px;
-                    text-align: center;
-                    border: 2px solid #c60000;
-                }
-                .box h2 {
-                    color: #ff4444;
-                    margin-top: 0;
-                }
-                .box p {
-                    font-size: 16px;
-                    margin: 15px 0;
-                }
-                a {
-                    display: inline-block;
-                    background: #00c6ff;
-                    color: black;
-                    padding: 10px 20px;
-                    text-decoration: none;
-                    border-radius: 5px;
-                    margin-top: 20px;
-                }
-                a:hover {
-                    background: #00a8d4;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="box">
-                <h2>❌ User Tidak Ditemukan</h2>
-                <p>Username '<strong>""" + search_username + """</strong>' tidak ditemukan.</p>
-                <a href="/personal-page">← Kembali</a>
-            </div>
-        </body>
-        </html>
-        """)
-
-    # Pastikan ada data personal page untuk user yang dicari
-    page_data = get_user_personal_page(search_username)
-
-    # Determine which images/background to expose
-    images = []
-    for img in page_data.get("images", []):
-        # img is a dict {filename, visibility}
-        if search_username == current_user or img.get("visibility") == "public" or USERS.get(current_user, {}).get("role") == "admin":
-            images.append(img)
-
-    # Determine which audio to expose
-    audio = []
-    for track in page_data.get("audio", []):
-        if search_username == current_user or track.get("visibility") == "public" or USERS.get(current_user, {}).get("role") == "admin":
-            audio.append(track)
-
-    # Determine which video to expose
-    video = []
-    for vid in page_data.get("video", []):
-        if search_username == current_user or vid.get("visibility") == "public" or USERS.get(current_user, {}).get("role") == "admin":
-            video.append(vid)
-
-    # background image should be shown only if owner or public or admin
-    bg = page_data.get("background_image", None)
-    background_image = None
-    if bg:
-        # find bg in images list to check visibility
-        found = None
-        for img in page_data.get("images", []):
-            if img.get("filename") == bg:
-                found = img
-                break
-        if found and (search_username == current_user or found.get("visibility") == "public" or USERS.get(current_user, {}).get("role") == "admin"):
-            background_image = bg
-
-    return render_template_string(
-        PERSONAL_PAGE_HTML,
-        title=page_data.get("title", ""),
-        description=page_data.get("description", ""),
-        bg_color=page_data.get("bg_color", "#1a1a2e"),
-        text_color=page_data.get("text_color", "#ffffff"),
-        images=images,
-        audio=audio,
-        video=video,
-        background_image=background_image,
-        owner=search_username,
-        current_user=current_user,
-        is_admin=(USERS.get(current_user, {}).get("role") == "admin")
-    )
-
-@app.route("/edit-personal-page", methods=["GET", "POST"])
-def edit_personal_page():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    
-    page_data = get_user_personal_page(user)
-    
-    if request.method == "POST":
-        # Update text data only (image upload sudah via AJAX)
-        title = request.form.get("title", "")
-        description = request.form.get("description", "")
-        bg_color = request.form.get("bg_color", "#1a1a2e")
-        text_color = request.form.get("text_color", "#ffffff")
-        
-        page_data["title"] = title
-        page_data["description"] = description
-        page_data["bg_color"] = bg_color
-        page_data["text_color"] = text_color
-        
-        PERSONAL_PAGES[user] = page_data
-        save_personal_pages()
-        return redirect(url_for("personal_page"))
-    
-    return render_template_string(
-        EDIT_PERSONAL_PAGE_HTML,
-        title=page_data.get("title", ""),
-        description=page_data.get("description", ""),
-        bg_color=page_data.get("bg_color", "#1a1a2e"),
-        text_color=page_data.get("text_color", "#ffffff")
-    )
-
-@app.route("/delete-image", methods=["POST"])
-def delete_image():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    
-    filename = request.form.get("image", "")
-    page_data = get_user_personal_page(user)
-
-    # Check and remove from images
-    new_images = []
-    removed = False
-    for img in page_data.get("images", []):
-        if isinstance(img, dict) and img.get("filename") == filename:
-            removed = True
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        if isinstance(img, str) and img == filename:
-            removed = True
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        new_images.append(img)
-
-    if removed:
-        page_data["images"] = new_images
-
-    # Check and remove from audio
-    new_audio = []
-    for track in page_data.get("audio", []):
-        if isinstance(track, dict) and track.get("filename") == filename:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        if isinstance(track, str) and track == filename:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        new_audio.append(track)
-
-    if page_data.get("audio", []) != new_audio:
-        page_data["audio"] = new_audio
-
-    # Check and remove from video
-    new_video = []
-    for vid in page_data.get("video", []):
-        if isinstance(vid, dict) and vid.get("filename") == filename:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        if isinstance(vid, str) and vid == filename:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            continue
-        new_video.append(vid)
-
-    if page_data.get("video", []) != new_video:
-        page_data["video"] = new_video
-
-    if removed or page_data.get("audio", []) != new_audio or page_data.get("video", []) != new_video:
-        PERSONAL_PAGES[user] = page_data
-        save_personal_pages()
-    
-    return redirect(url_for("personal_page"))
-
-@app.route("/image-gallery")
-def image_gallery():
-    """Menampilkan galeri gambar, lagu, dan video user"""
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    # Show only current user's images, audio, and video (uploads are private)
-    page_data = get_user_personal_page(user)
-    images = page_data.get("images", [])
-    audio = page_data.get("audio", [])
-    video = page_data.get("video", [])
-
-    return render_template_string(IMAGE_GALLERY_HTML, images=images, audio=audio, video=video)
-
-@app.route("/set-background", methods=["POST"])
-def set_background():
-    """Set gambar sebagai background personal page user"""
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-    
-    image = request.form.get("image", "")
-    page_data = get_user_personal_page(user)
-    # Only allow setting an image that the current user actually uploaded
-    found = False
-    for img in page_data.get("images", []):
-        if isinstance(img, dict) and img.get("filename") == image:
-            found = True
-            break
-        if isinstance(img, str) and img == image:
-            found = True
-            break
-    if found:
-        page_data["background_image"] = image
-        PERSONAL_PAGES[user] = page_data
-        save_personal_pages()
-    
-    return redirect(url_for("edit_personal_page"))
-
-
-@app.route("/toggle-visibility", methods=["POST"])
-def toggle_visibility():
-    user = session.get("user")
-    if not user:
-        return redirect(url_for("login"))
-
-    filename = request.form.get("image", "")
-    page_data = get_user_personal_page(user)
-    changed = False
-    
-    # Check images
-    for img in page_data.get("images", []):
-        if isinstance(img, dict) and img.get("filename") == filename:
-            img["visibility"] = "public" if img.get("visibility") == "private" else "private"
-            changed = True
-            break
-    
-    # Check audio if not found in images
-    if not changed:
-        for track in page_data.get("audio", []):
-            if isinstance(track, dict) and track.get("filename") == filename:
-                track["visibility"] = "public" if track.get("visibility") == "private" else "private"
-                changed = True
-                break
-    
-    if changed:
-        PERSONAL_PAGES[user] = page_data
-        save_personal_pages()
-
-    return redirect(url_for("image_gallery"))
-
-if __name__ == "__main__":
+
+# Buat folder uploads jika belum ada
+if not os.path.exists(UPLOAD_FOLDER):
+    os.makedirs(UPLOAD_FOLDER)
+
+# Isi file disimpan per hash konten (blobs/ab/abcdef...), record media menunjuk ke blob.
+# File dengan isi sama yang diupload ulang (oleh user mana pun) hanya disimpan sekali.
+BLOB_FOLDER = os.path.join(DATA_DIR, "blobs")
+os.makedirs(BLOB_FOLDER, exist_ok=True)
+
+app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # Max 100MB per file (upgraded from 16MB)
+
+# Logging terstruktur (satu baris JSON per record) lewat antrean: request hanya
+# memasukkan record ke queue, thread listener yang menulis ke stderr.
+# LOG_LEVEL=DEBUG|INFO|WARNING|ERROR. Per logger bisa diberi sampling dan rate
+# limit (record per detik), mis. LOG_SAMPLE="latihan.pages=0.01"
+# LOG_RATE_LIMIT="latihan.auth=20". WARNING ke atas tidak pernah dibuang.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+def _parse_log_settings(value, defaults):
+    settings = dict(defaults)
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, number = part.partition("=")
+        settings[name.strip()] = float(number)
+    return settings
+
+LOG_SAMPLE = _parse_log_settings(os.getenv("LOG_SAMPLE", ""), {})
+LOG_RATE_LIMIT = _parse_log_settings(os.getenv("LOG_RATE_LIMIT", ""), {"latihan.auth": 20})
+
+class SampledRateLimitFilter(logging.Filter):
+    """Loloskan sebagian record (sample_rate) dan maksimal per_second record per detik"""
+
+    def __init__(self, sample_rate=1.0, per_second=None):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.per_second = per_second
+        self._window = 0
+        self._count = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self._drop(record)
+        if self.per_second is not None:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window, self._count = window, 0
+            self._count += 1
+            if self._count > self.per_second:
+                return self._drop(record)
+        return True
+
+    @staticmethod
+    def _drop(record):
+        METRICS.inc("log_records_dropped_total", 1, (("logger", record.name),))
+        return False
+
+class JsonLogFormatter(logging.Formatter):
+    """Record -> JSON; field tambahan lewat extra={"fields": {...}}"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+log = logging.getLogger("latihan")
+log.setLevel(LOG_LEVEL)
+log.propagate = False
+_log_queue = queue.SimpleQueue()
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_output = logging.StreamHandler(sys.stderr)
+_log_output.setFormatter(JsonLogFormatter())
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output)
+_log_listener.start()
+# Didaftarkan sebelum flush_state supaya log saat shutdown masih sempat ditulis
+atexit.register(_log_listener.stop)
+# Thread listener tidak ikut ter-fork (gunicorn --preload): jalankan ulang di child
+os.register_at_fork(after_in_child=lambda: (setattr(_log_listener, "_thread", None), _log_listener.start()))
+
+for _name in set(LOG_SAMPLE) | set(LOG_RATE_LIMIT):
+    logging.getLogger(_name).addFilter(
+        SampledRateLimitFilter(LOG_SAMPLE.get(_name, 1.0), LOG_RATE_LIMIT.get(_name)))
+
+auth_log = logging.getLogger("latihan.auth")
+pages_log = logging.getLogger("latihan.pages")
+storage_log = logging.getLogger("latihan.storage")
+media_log = logging.getLogger("latihan.media")
+
+def allowed_file(filename):
+    """Cek apakah file adalah gambar atau lagu"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def get_file_type(filename):
+    """Tentukan tipe file: image, audio, atau video"""
+    audio_ext = {'mp3', 'wav', 'ogg', 'm4a', 'flac', 'aac'}
+    video_ext = {'mp4', 'webm', 'avi', 'mov', 'mkv', 'flv', 'm4v', 'wmv'}
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    if ext in video_ext:
+        return 'video'
+    elif ext in audio_ext:
+        return 'audio'
+    else:
+        return 'image'
+
+def get_audio_mime_type(filename):
+    """Tentukan MIME type berdasarkan ekstensi audio"""
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    mime_types = {
+        'mp3': 'audio/mpeg',
+        'wav': 'audio/wav',
+        'ogg': 'audio/ogg',
+        'm4a': 'audio/mp4',
+        'flac': 'audio/flac',
+        'aac': 'audio/aac'
+    }
+    return mime_types.get(ext, 'audio/mpeg')
+
+def get_video_mime_type(filename):
+    """Tentukan MIME type berdasarkan ekstensi video"""
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    mime_types = {
+        'mp4': 'video/mp4',
+        'webm': 'video/webm',
+        'avi': 'video/x-msvideo',
+        'mov': 'video/quicktime',
+        'mkv': 'video/x-matroska',
+        'flv': 'video/x-flv',
+        'm4v': 'video/x-m4v',
+        'wmv': 'video/x-ms-wmv'
+    }
+    return mime_types.get(ext, 'video/mp4')
+
+# Default users (akan digunakan jika file tidak ada)
+DEFAULT_USERS = {
+    "admin": {"password": "1234", "msg": "Selamat datang, Admin. Dunia aman di tanganmu.", "role": "admin", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
+    "arya": {"password": "4321", "msg": "Halo User. Hidup memang absurd, tapi jalan terus.", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
+    "guest": {"password": "0000", "msg": "Selamat datang, tamu yang terhormat. Janganlah engkau terlalu banyak berfikir tentang hal yang tak perlu.", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
+    "friend": {"password": "1111", "msg": "halo teman semoga kau selalu sehat dan mendapatkan apa yang kau inginkan", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"},
+    "ma biche": {"password": "151225", "msg": "je t'aime,ma biche", "role": "user", "bg_color": "#000000", "text_color": "#ffffff", "theme": "dark"}
+}
+
+def write_file_atomic(path, payload):
+    """Tulis file lewat file sementara + fsync + os.replace agar tidak pernah terpotong.
+
+    Nama sementara unik per proses + thread: compaction background dan snapshot
+    di foreground bisa menulis file yang sama bersamaan.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _default_users_state():
+    return DEFAULT_USERS.copy(), {}, True
+
+class JsonStorage:
+    """Backend lama: users_data.json + snapshot/journal personal_pages.json"""
+
+    name = "json"
+
+    def __init__(self, users_file=USERS_FILE, pages_file=PERSONAL_PAGES_FILE):
+        self.users_file = users_file
+        self.pages_file = pages_file
+        self.journal_file = pages_file + ".journal"
+        self._journal_lock = threading.Lock()
+        self._compaction_thread = None
+        # Mode multi-worker mematikan ini: compaction jalan sinkron di bawah state lock
+        self.background_compaction = True
+        # Posisi journal yang sudah dibaca + identitas file, untuk load_page_changes()
+        self._journal_pos = 0
+        self._journal_ino = None
+        self._snapshot_key = None
+
+    @staticmethod
+    def _file_key(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load_users(self):
+        """Return (users, pending_users, admin_panel_enabled)"""
+        if not os.path.exists(self.users_file):
+            return _default_users_state()
+        try:
+            with open(self.users_file, 'r') as f:
+                data = json.load(f)
+            return (data.get("users", DEFAULT_USERS), data.get("pending_users", {}),
+                    data.get("admin_panel_enabled", True))
+        except:
+            return _default_users_state()
+
+    def save_users(self, users, pending_users, admin_panel_enabled, changed=None):
+        """Format JSON selalu menulis ulang seluruh file (atomik), `changed` diabaikan"""
+        data = {
+            "users": users,
+            "pending_users": pending_users,
+            "admin_panel_enabled": admin_panel_enabled
+        }
+        # Salin dulu lewat encoder C (atomik terhadap thread lain), baru di-indent
+        data = json.loads(json.dumps(data))
+        payload = json.dumps(data, indent=2)
+        write_file_atomic(self.users_file, payload)
+        return len(payload)
+
+    def load_pages(self):
+        pages = {}
+        self._snapshot_key = self._file_key(self.pages_file)
+        if os.path.exists(self.pages_file):
+            try:
+                with open(self.pages_file, 'r') as f:
+                    pages = json.load(f)
+            except:
+                pages = {}
+        # Journal ".old" tersisa kalau compaction sebelumnya terhenti di tengah jalan
+        self._replay_journal(self.journal_file + ".old", pages)
+        self._journal_ino, self._journal_pos = self._replay_journal(self.journal_file, pages)
+        return pages
+
+    def load_page_changes(self, since):
+        """Halaman yang ditulis proses lain sejak pembacaan terakhir.
+
+        Return None kalau snapshot/journal sudah di-compact sehingga posisi
+        baca tidak berlaku lagi (pemanggil harus memuat ulang penuh).
+        """
+        if self._file_key(self.pages_file) != self._snapshot_key:
+            return None
+        try:
+            f = open(self.journal_file, 'rb')
+        except FileNotFoundError:
+            return {} if self._journal_ino is None else None
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            if self._journal_ino not in (None, ino):
+                return None
+            f.seek(self._journal_pos)
+            changes = {}
+            pos = self._journal_pos
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                changes[record["user"]] = record.get("page")
+                pos += len(line)
+            self._journal_ino, self._journal_pos = ino, pos
+        return changes
+
+    def save_pages(self, pages, changed=None):
+        """Catat halaman yang berubah sebagai record journal; tanpa `changed` langsung compact.
+
+        Return jumlah byte yang ditulis.
+        """
+        if changed is None:
+            return self.compact(pages)
+        records = "".join(json.dumps({"user": u, "page": pages.get(u)}) + "\n" for u in changed)
+        with self._journal_lock:
+            with open(self.journal_file, 'a+b') as f:
+                start = self._repair_tail(f)
+                f.write(records.encode())
+                f.flush()
+                os.fsync(f.fileno())
+                journal_size = f.tell()
+                ino = os.fstat(f.fileno()).st_ino
+            # Record milik sendiri tidak perlu dibaca ulang oleh load_page_changes()
+            if self._journal_ino in (None, ino) and self._journal_pos == start:
+                self._journal_ino, self._journal_pos = ino, journal_size
+        if journal_size >= JOURNAL_COMPACT_BYTES:
+            if self.background_compaction:
+                self._start_compaction(pages)
+            else:
+                self.compact(pages)
+        return len(records)
+
+    @staticmethod
+    def _repair_tail(f):
+        """Buang record terakhir yang terpotong (proses mati saat menulis) sebelum append.
+
+        Return ukuran journal setelah diperbaiki.
+        """
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return 0
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return end
+        f.seek(0)
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            valid_end += len(line)
+        f.truncate(valid_end)
+        return valid_end
+
+    def compact(self, pages):
+        """Tulis snapshot baru dari pages lalu buang journal yang sudah tercakup"""
+        old_journal = self.journal_file + ".old"
+        with self._journal_lock:
+            # json.dumps tanpa indent memakai encoder C yang tidak melepas GIL,
+            # jadi snapshot tetap konsisten walau thread lain sedang mengubah data
+            payload = json.dumps(pages)
+            # Record baru setelah titik ini masuk ke journal yang baru. Kalau ".old"
+            # masih ada dari compaction yang gagal, journal dibiarkan saja (replay
+            # record "put" bersifat idempotent).
+            if not os.path.exists(old_journal) and os.path.exists(self.journal_file):
+                os.replace(self.journal_file, old_journal)
+                self._journal_ino, self._journal_pos = None, 0
+        write_file_atomic(self.pages_file, payload)
+        self._snapshot_key = self._file_key(self.pages_file)
+        if os.path.exists(old_journal):
+            os.remove(old_journal)
+        return len(payload)
+
+    def _start_compaction(self, pages):
+        """Jalankan compaction di background thread (maksimal satu sekaligus)"""
+        with self._journal_lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, args=(pages,), daemon=True)
+            self._compaction_thread.start()
+
+    @staticmethod
+    def _replay_journal(path, pages):
+        """Terapkan record journal ke dict pages, return (inode, byte yang terbaca).
+
+        Record terakhir yang terpotong dilewati; save_pages() membuangnya sebelum append.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None, 0
+        valid_end = 0
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get("page") is None:
+                    pages.pop(record["user"], None)
+                else:
+                    pages[record["user"]] = record["page"]
+                valid_end += len(line)
+        return ino, valid_end
+
+MEDIA_KINDS = ("images", "audio", "video")
+
+class SQLiteStorage:
+    """Backend SQLite (WAL): satu baris per user, pendaftaran, halaman, dan item media"""
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            role TEXT NOT NULL DEFAULT 'user',
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+        CREATE TABLE IF NOT EXISTS pending_users (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pages (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS media (
+            owner TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (owner, kind, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_media_filename ON media(filename);
+    """
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self.conn.executescript(self.SCHEMA)
+        # Database lama belum punya kolom version
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if "version" not in columns:
+            self.conn.execute("ALTER TABLE pages ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_version ON pages(version)")
+        # Generation yang dicatat di baris pages saat disimpan (dipakai mode multi-worker)
+        self.write_version = 0
+
+    @property
+    def conn(self):
+        """Koneksi milik proses ini (dibuka ulang setelah fork, mis. gunicorn --preload).
+
+        Koneksi SQLite tidak boleh dipakai lintas fork; koneksi warisan parent
+        dibiarkan saja (tidak di-close) supaya tidak menyentuh lock milik parent.
+        """
+        if self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def load_users(self):
+        with self._lock:
+            users = {u: json.loads(d) for u, d in self.conn.execute("SELECT username, data FROM users")}
+            pending = {u: json.loads(d) for u, d in self.conn.execute("SELECT username, data FROM pending_users")}
+            row = self.conn.execute("SELECT value FROM settings WHERE key = 'admin_panel_enabled'").fetchone()
+        if not users:
+            # Database baru: isi dengan user default supaya penyimpanan per baris
+            # berikutnya tidak kehilangan mereka
+            users, pending, admin_panel_enabled = _default_users_state()
+            self.save_users(users, pending, admin_panel_enabled)
+            return users, pending, admin_panel_enabled
+        return users, pending, json.loads(row[0]) if row else True
+
+    def save_users(self, users, pending_users, admin_panel_enabled, changed=None):
+        """Tulis hanya baris user di `changed` (None = semua baris), return byte data yang ditulis"""
+        if changed is None:
+            changed = set(users) | set(pending_users)
+        written = 0
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('admin_panel_enabled', ?)",
+                              (json.dumps(admin_panel_enabled),))
+            for username in changed:
+                # Satu username bisa pindah tabel (approve), jadi kedua tabel disinkronkan
+                if username in users:
+                    data = users[username]
+                    payload = json.dumps(data)
+                    written += len(payload)
+                    self.conn.execute("INSERT OR REPLACE INTO users (username, role, data) VALUES (?, ?, ?)",
+                                      (username, data.get("role", "user"), payload))
+                else:
+                    self.conn.execute("DELETE FROM users WHERE username = ?", (username,))
+                if username in pending_users:
+                    payload = json.dumps(pending_users[username])
+                    written += len(payload)
+                    self.conn.execute("INSERT OR REPLACE INTO pending_users (username, data) VALUES (?, ?)",
+                                      (username, payload))
+                else:
+                    self.conn.execute("DELETE FROM pending_users WHERE username = ?", (username,))
+        return written
+
+    def load_pages(self):
+        return self._load_pages_since(None)
+
+    def load_page_changes(self, since):
+        """Halaman dengan version > since (ditulis proses lain setelah generation itu)"""
+        return self._load_pages_since(since)
+
+    def _load_pages_since(self, since):
+        pages = {}
+        with self._lock, self.conn:
+            if since is None:
+                rows = self.conn.execute("SELECT username, data FROM pages")
+            else:
+                rows = self.conn.execute("SELECT username, data FROM pages WHERE version > ?", (since,))
+            for username, data in rows:
+                page = json.loads(data)
+                for kind in MEDIA_KINDS:
+                    page[kind] = []
+                pages[username] = page
+            if since is None:
+                rows = self.conn.execute("SELECT owner, kind, data FROM media ORDER BY owner, kind, position")
+            else:
+                rows = self.conn.execute(
+                    "SELECT owner, kind, data FROM media WHERE owner IN (SELECT username FROM pages WHERE version > ?) "
+                    "ORDER BY owner, kind, position", (since,))
+            for owner, kind, data in rows:
+                if owner in pages:
+                    pages[owner][kind].append(json.loads(data))
+        return pages
+
+    def save_pages(self, pages, changed=None):
+        """Tulis baris halaman + item media milik user di `changed` (None = semua), return byte data.
+
+        `changed` boleh dict username -> filename media yang berubah (lihat
+        save_personal_pages); hanya baris item itu yang ditulis/dihapus. Nilai
+        None berarti item yang berubah tidak diketahui: dicari lewat diff.
+        """
+        if changed is None:
+            changed = list(pages)
+        if not isinstance(changed, dict):
+            changed = dict.fromkeys(changed)
+        written = 0
+        with self._lock, self.conn:
+            for username, items in changed.items():
+                page = pages.get(username)
+                if page is None:
+                    self.conn.execute("DELETE FROM media WHERE owner = ?", (username,))
+                    self.conn.execute("DELETE FROM pages WHERE username = ?", (username,))
+                    continue
+                fields = json.dumps({k: v for k, v in page.items() if k not in MEDIA_KINDS})
+                written += len(fields)
+                self.conn.execute("INSERT OR REPLACE INTO pages (username, data, version) VALUES (?, ?, ?)",
+                                  (username, fields, self.write_version))
+                if items is not None:
+                    written += self._save_media_items(username, page, items)
+                    continue
+                # Snapshot lewat encoder C supaya tidak bentrok dengan route yang sedang mengubah page
+                page = json.loads(json.dumps(page))
+                stored = {kind: [] for kind in MEDIA_KINDS}
+                for kind, position, filename, data in self.conn.execute(
+                        "SELECT kind, position, filename, data FROM media WHERE owner = ? ORDER BY kind, position",
+                        (username,)):
+                    stored.setdefault(kind, []).append((position, filename, data))
+                for kind, rows in stored.items():
+                    items = [(media_filename(item), json.dumps(item)) for item in page.get(kind, [])]
+                    upserts, deletes = _diff_media_rows(rows, items)
+                    written += sum(len(data) for _, _, data in upserts)
+                    self.conn.executemany("DELETE FROM media WHERE owner = ? AND kind = ? AND position = ?",
+                                          [(username, kind, position) for position in deletes])
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO media (owner, kind, position, filename, data) VALUES (?, ?, ?, ?, ?)",
+                        [(username, kind, position, filename, data) for position, filename, data in upserts])
+        return written
+
+    def _save_media_items(self, username, page, filenames):
+        """Sinkronkan baris media untuk filename tertentu saja (dipanggil di dalam transaksi)"""
+        written = 0
+        for filename in filenames:
+            found = next(((kind, item) for kind in MEDIA_KINDS for item in list(page.get(kind, []))
+                          if media_filename(item) == filename), None)
+            row = self.conn.execute("SELECT kind, position FROM media WHERE owner = ? AND filename = ?",
+                                    (username, filename)).fetchone()
+            if found is None:
+                if row:
+                    self.conn.execute("DELETE FROM media WHERE owner = ? AND filename = ?", (username, filename))
+                continue
+            kind, item = found
+            data = json.dumps(item)
+            written += len(data)
+            if row and row[0] == kind:
+                self.conn.execute("UPDATE media SET data = ? WHERE owner = ? AND kind = ? AND position = ?",
+                                  (data, username, kind, row[1]))
+                continue
+            # Item baru ditaruh setelah position terakhir (position boleh berlubang)
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM media WHERE owner = ? AND kind = ?",
+                                         (username, kind)).fetchone()[0]
+            self.conn.execute("INSERT INTO media (owner, kind, position, filename, data) VALUES (?, ?, ?, ?, ?)",
+                              (username, kind, position, filename, data))
+        return written
+
+def _diff_media_rows(stored, items):
+    """Baris media yang perlu ditulis/dihapus supaya tabel sama dengan `items`.
+
+    stored: [(position, filename, data)] urut position; items: [(filename, data)]
+    urut tampil. Position boleh berlubang (urutan saja yang penting), jadi hapus
+    atau ubah satu item hanya menyentuh baris item itu dan upload baru cukup
+    satu INSERT di position berikutnya. Return (upserts, position yang dihapus).
+    """
+    upserts = []
+    keep = set()
+    next_position = stored[-1][0] + 1 if stored else 0
+    i = 0
+    appending = False
+    for filename, data in items:
+        j = i
+        while not appending and j < len(stored) and stored[j][1] != filename:
+            j += 1
+        if not appending and j < len(stored):
+            position, _, old_data = stored[j]
+            keep.add(position)
+            i = j + 1
+            if old_data != data:
+                upserts.append((position, filename, data))
+        else:
+            # Item baru (atau urutan berubah): sisanya ditulis ulang setelah position terakhir
+            appending = True
+            upserts.append((next_position, filename, data))
+            next_position += 1
+    deletes = [position for position, _, _ in stored if position not in keep]
+    return upserts, deletes
+
+def create_storage(backend=STORAGE_BACKEND):
+    """Buat backend penyimpanan sesuai STORAGE_BACKEND ("json" atau "sqlite")"""
+    if backend == "sqlite":
+        return SQLiteStorage()
+    return JsonStorage()
+
+STORAGE = create_storage()
+
+class WriteBehindPersister:
+    """Tandai data yang berubah lalu simpan dari background thread.
+
+    Perubahan dalam satu jendela PERSIST_INTERVAL_MS digabung menjadi satu
+    flush, jadi request tidak menunggu disk. Interval 0 = langsung disimpan.
+    Dengan auto_flush=False hanya flush() eksplisit yang menulis (mode multi-worker).
+    """
+
+    def __init__(self, storage, interval_ms):
+        self.storage = storage
+        self.interval = interval_ms / 1000
+        self.auto_flush = True
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._users = set()
+        self._all_users = False
+        self._settings = False
+        # username -> set filename media yang berubah (None = seluruh halaman)
+        self._pages = {}
+        self._all_pages = False
+
+    def mark_users(self, username=None):
+        with self._lock:
+            if username is None:
+                self._all_users = True
+            else:
+                self._users.add(username)
+        self._schedule()
+
+    def mark_users_many(self, usernames):
+        """Tandai banyak user sekaligus: satu jadwal flush, bukan satu per user"""
+        with self._lock:
+            self._users.update(usernames)
+        self._schedule()
+
+    def mark_settings(self):
+        with self._lock:
+            self._settings = True
+        self._schedule()
+
+    def mark_pages(self, username=None, items=None):
+        with self._lock:
+            if username is None:
+                self._all_pages = True
+            else:
+                self._merge_pages({username: None if items is None else set(items)})
+        self._schedule()
+
+    def _merge_pages(self, pages):
+        for username, items in pages.items():
+            if username in self._pages and self._pages[username] is not None and items is not None:
+                self._pages[username] |= items
+            elif username not in self._pages or items is None:
+                self._pages[username] = items
+
+    def _schedule(self):
+        if not self.auto_flush:
+            return
+        if self.interval <= 0:
+            self.flush()
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Tunggu satu jendela supaya perubahan beruntun ikut di flush yang sama
+            time.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Simpan semua perubahan yang tertunda sekarang juga.
+
+        Return (users ditulis, pages ditulis).
+        """
+        with self._flush_lock:
+            with self._lock:
+                users = None if self._all_users else self._users
+                write_users = self._all_users or bool(self._users) or self._settings
+                pages = None if self._all_pages else self._pages
+                write_pages = self._all_pages or bool(self._pages)
+                self._users, self._all_users, self._settings = set(), False, False
+                self._pages, self._all_pages = {}, False
+            try:
+                if write_users:
+                    started = time.perf_counter()
+                    written = self.storage.save_users(USERS, PENDING_USERS, ADMIN_PANEL_ENABLED, users)
+                    self._record("users", started, written)
+                if write_pages:
+                    started = time.perf_counter()
+                    written = self.storage.save_pages(PERSONAL_PAGES, pages)
+                    self._record("pages", started, written)
+                return write_users, write_pages
+            except Exception as e:
+                # Tandai ulang supaya dicoba lagi di flush berikutnya
+                storage_log.error("gagal menyimpan data: %s", e, extra={"fields": {"users": write_users, "pages": write_pages}})
+                with self._lock:
+                    if write_users:
+                        self._all_users = self._all_users or users is None
+                        self._users |= users or set()
+                        self._settings = True
+                    if write_pages:
+                        self._all_pages = self._all_pages or pages is None
+                        self._merge_pages(pages or {})
+                if self.interval > 0 and self.auto_flush:
+                    self._wakeup.set()
+                return False, False
+
+    @staticmethod
+    def _record(target, started, written):
+        labels = (("target", target),)
+        METRICS.observe("storage_save_duration_seconds", time.perf_counter() - started, labels)
+        METRICS.inc("storage_save_bytes_total", written or 0, labels)
+
+PERSISTER = WriteBehindPersister(STORAGE, PERSIST_INTERVAL_MS)
+
+def flush_state():
+    """Hook shutdown: tulis semua perubahan yang belum tersimpan"""
+    if MULTI_WORKER:
+        with state_transaction():
+            pass
+    else:
+        PERSISTER.flush()
+
+atexit.register(flush_state)
+
+def load_users():
+    """Memuat user data dari backend penyimpanan"""
+    global USERS, PENDING_USERS, ADMIN_PANEL_ENABLED
+    USERS, PENDING_USERS, ADMIN_PANEL_ENABLED = STORAGE.load_users()
+    rebuild_user_index()
+
+def save_users(username=None):
+    """Tandai user data berubah; dengan username hanya baris user itu yang ditulis"""
+    PERSISTER.mark_users(username)
+
+def save_users_many(usernames):
+    """Tandai beberapa user berubah; semuanya ditulis dalam satu flush"""
+    PERSISTER.mark_users_many(usernames)
+
+# Index username terurut per koleksi ("users" aktif dan "pending") untuk
+# pencarian prefix + pagination di admin panel tanpa mengiterasi seluruh dict.
+# Entri berupa (username.lower(), username): pencarian tidak peka huruf besar.
+USER_INDEX = {"users": [], "pending": []}
+# User aktif per role, supaya filter role di admin panel juga cukup bisect
+USER_ROLE_INDEX = {}
+USER_PAGE_SIZE = 50
+USER_PAGE_MAX = 200
+_user_index_lock = threading.Lock()
+# Naik setiap index user aktif berubah; dipakai sebagai kunci cache autocomplete
+_user_index_version = 0
+
+def _user_key(username):
+    return username.lower(), username
+
+def _user_role(username):
+    return USERS.get(username, {}).get("role", "user")
+
+def rebuild_user_index():
+    global _user_index_version
+    with _user_index_lock:
+        USER_INDEX["users"] = sorted(map(_user_key, USERS))
+        USER_INDEX["pending"] = sorted(map(_user_key, PENDING_USERS))
+        USER_ROLE_INDEX.clear()
+        for key in USER_INDEX["users"]:
+            USER_ROLE_INDEX.setdefault(_user_role(key[1]), []).append(key)
+        _user_index_version += 1
+
+def _insert_sorted(entries, key):
+    i = bisect.bisect_left(entries, key)
+    if i == len(entries) or entries[i] != key:
+        entries.insert(i, key)
+        return True
+    return False
+
+def _remove_sorted(entries, key):
+    i = bisect.bisect_left(entries, key)
+    if i < len(entries) and entries[i] == key:
+        del entries[i]
+        return True
+    return False
+
+def index_user(collection, username):
+    global _user_index_version
+    key = _user_key(username)
+    with _user_index_lock:
+        if _insert_sorted(USER_INDEX[collection], key) and collection == "users":
+            _insert_sorted(USER_ROLE_INDEX.setdefault(_user_role(username), []), key)
+            _user_index_version += 1
+
+def unindex_user(collection, username):
+    global _user_index_version
+    key = _user_key(username)
+    with _user_index_lock:
+        if _remove_sorted(USER_INDEX[collection], key) and collection == "users":
+            for entries in USER_ROLE_INDEX.values():
+                _remove_sorted(entries, key)
+            _user_index_version += 1
+
+def reindex_user_role(username, old_role):
+    """Pindahkan user aktif ke index role barunya (panggil setelah USERS[...]["role"] diubah)"""
+    key = _user_key(username)
+    with _user_index_lock:
+        _remove_sorted(USER_ROLE_INDEX.get(old_role, []), key)
+        _insert_sorted(USER_ROLE_INDEX.setdefault(_user_role(username), []), key)
+
+def search_users(collection, prefix="", role=None, cursor=None, limit=USER_PAGE_SIZE):
+    """Username berawalan prefix (urut), mulai setelah cursor; return (usernames, cursor berikutnya atau None).
+
+    Cursor = username terakhir yang sudah dikirim. Filter role hanya untuk koleksi "users".
+    Biayanya O(log N + limit): bisect ke awal halaman lalu baca maju tanpa menyalin list.
+    """
+    prefix = prefix.lower()
+    found = []
+    # Di bawah lock: index_user() bisa menggeser list selagi dibaca
+    with _user_index_lock:
+        if role:
+            entries = USER_ROLE_INDEX.get(role, []) if collection == "users" else []
+        else:
+            entries = USER_INDEX[collection]
+        start = bisect.bisect_left(entries, (prefix,))
+        if cursor:
+            start = max(start, bisect.bisect_right(entries, _user_key(cursor)))
+        for i in range(start, len(entries)):
+            lowered, username = entries[i]
+            if not lowered.startswith(prefix):
+                break
+            found.append(username)
+            if len(found) == limit:
+                return found, username
+    return found, None
+
+# Autocomplete username aktif: hasil prefix dari USER_INDEX, lalu kalau kurang
+# ditambah hasil fuzzy (huruf query muncul berurutan, mis. "mbch" -> "ma biche").
+# Fuzzy dicari dengan satu regex atas semua username yang digabung per baris.
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_QUERY = 64
+AUTOCOMPLETE_CACHE_SIZE = 1024
+_autocomplete_lock = threading.Lock()
+_autocomplete_cache = OrderedDict()
+_autocomplete_names = {"version": None, "text": ""}
+
+def _autocomplete_text():
+    """Semua username aktif sebagai "lower<TAB>username" per baris (dibuat ulang kalau index berubah)"""
+    if _autocomplete_names["version"] != _user_index_version:
+        version = _user_index_version
+        lines = (f"{lowered}\t{username}" for lowered, username in USER_INDEX["users"]
+                 if len(username) <= AUTOCOMPLETE_MAX_QUERY and "\t" not in username and "\n" not in username)
+        _autocomplete_names.update(version=version, text="\n".join(lines))
+    return _autocomplete_names["text"]
+
+def autocomplete_users(query, limit=AUTOCOMPLETE_LIMIT):
+    """Username aktif yang cocok dengan query: prefix dulu, lalu substring, lalu fuzzy"""
+    query = query.strip().lower()[:AUTOCOMPLETE_MAX_QUERY]
+    if not query:
+        return []
+    key = (_user_index_version, query, limit)
+    with _autocomplete_lock:
+        if key in _autocomplete_cache:
+            _autocomplete_cache.move_to_end(key)
+            return _autocomplete_cache[key]
+
+    results, _ = search_users("users", query, limit=limit)
+    if len(results) < limit:
+        # Huruf pertama literal (regex engine melompat langsung ke kemunculannya),
+        # lalu "[^c\t\n]*c" per huruf berikutnya: tanpa backtracking mahal
+        first, rest = re.escape(query[0]), query[1:]
+        pattern = re.compile(first + "".join(f"[^{re.escape(c)}\t\n]*{re.escape(c)}" for c in rest))
+        text = _autocomplete_text()
+        seen = set(results)
+        candidates = []
+        pos = 0
+        while match := pattern.search(text, pos):
+            start = text.rfind("\n", 0, match.start()) + 1
+            tab = text.index("\t", start)
+            end = text.find("\n", tab)
+            end = len(text) if end < 0 else end
+            pos = end + 1
+            lowered, username = text[start:tab], text[tab + 1:end]
+            # Cocok di bagian nama asli (setelah tab) tidak dihitung
+            if match.start() > tab:
+                continue
+            if username in seen:
+                continue
+            position = lowered.find(query)
+            # Substring (semakin awal semakin baik) sebelum fuzzy, lalu nama yang lebih pendek
+            candidates.append((position if position >= 0 else AUTOCOMPLETE_MAX_QUERY, len(username), lowered, username))
+        results += [username for *_, username in sorted(candidates)[:limit - len(results)]]
+
+    with _autocomplete_lock:
+        _autocomplete_cache[key] = results
+        while len(_autocomplete_cache) > AUTOCOMPLETE_CACHE_SIZE:
+            _autocomplete_cache.popitem(last=False)
+    return results
+
+def save_settings():
+    """Tandai pengaturan global (status admin panel) berubah"""
+    PERSISTER.mark_settings()
+
+def load_personal_pages():
+    """Memuat personal page data dari backend penyimpanan"""
+    global PERSONAL_PAGES
+    PERSONAL_PAGES = STORAGE.load_pages()
+    rebuild_media_index()
+    rebuild_media_views()
+    invalidate_page_cache()
+
+def save_personal_pages(username=None, items=None):
+    """Tandai personal page berubah; dengan username hanya halaman user itu yang ditulis.
+
+    items: filename media yang ditambah/diubah/dihapus (() = hanya field
+    halaman), supaya backend per baris cukup menulis baris item itu.
+    """
+    if username is None:
+        rebuild_media_views()
+    else:
+        refresh_media_view(username)
+    invalidate_page_cache(username)
+    PERSISTER.mark_pages(username, items)
+
+def migrate_json_to_sqlite(sqlite_path=SQLITE_FILE):
+    """Salin sekali seluruh isi users_data.json + personal_pages.json ke SQLite"""
+    source = JsonStorage()
+    target = SQLiteStorage(sqlite_path)
+    users, pending_users, admin_panel_enabled = source.load_users()
+    pages = source.load_pages()
+    target.save_users(users, pending_users, admin_panel_enabled)
+    target.save_pages(pages)
+    media_count = sum(len(p.get(kind, [])) for p in pages.values() for kind in MEDIA_KINDS)
+    return {"users": len(users), "pending_users": len(pending_users),
+            "pages": len(pages), "media": media_count}
+
+def get_user_personal_page(username):
+    """Dapatkan data personal page user, buat default jika belum ada"""
+    if username not in PERSONAL_PAGES:
+        with state_transaction():
+            if username not in PERSONAL_PAGES:
+                create_default_personal_page(username)
+    # Ensure audio array exists for backward compatibility
+    if "audio" not in PERSONAL_PAGES[username]:
+        PERSONAL_PAGES[username]["audio"] = []
+    # Ensure video array exists for backward compatibility
+    if "video" not in PERSONAL_PAGES[username]:
+        PERSONAL_PAGES[username]["video"] = []
+    return PERSONAL_PAGES[username]
+
+def create_default_personal_page(username):
+    """Buat personal page default (dipanggil di dalam state_transaction)"""
+    PERSONAL_PAGES[username] = {
+        "title": f"Personal Page - {username}",
+        "description": "Selamat datang di halaman personal saya!",
+        "bg_color": "#1a1a2e",
+        "text_color": "#ffffff",
+        "images": [],
+        "audio": [],
+        "video": [],
+        "background_image": None
+    }
+    save_personal_pages(username)
+
+# Index global filename -> (owner, tipe file, record) supaya /uploads tidak perlu
+# memindai semua personal page. Record adalah dict yang sama dengan yang ada di
+# PERSONAL_PAGES, jadi perubahan visibility langsung terlihat di index.
+MEDIA_INDEX = {}
+MEDIA_FILE_TYPES = {"images": "image", "audio": "audio", "video": "video"}
+
+def media_filename(item):
+    """Nama file dari record media (dict baru atau string format lama)"""
+    return item.get("filename") if isinstance(item, dict) else item
+
+# Record yang menunjuk ke setiap blob (sha256 -> set filename record), dihitung
+# ulang saat load. Per record, bukan angka: melepas record yang sama dua kali
+# tidak membuat hitungan blob lain ikut turun.
+BLOB_REFS = {}
+_blob_lock = threading.RLock()
+
+def _blob_sha(item):
+    return item["sha256"] if isinstance(item, dict) and item.get("blob") else None
+
+def index_media(owner, kind, item):
+    """Daftarkan record ke index; nama yang sudah dipakai record lain ditolak (ValueError)"""
+    filename = media_filename(item)
+    existing = MEDIA_INDEX.get(filename)
+    if existing is not None and existing[2] is not item:
+        # Menimpa entri membuat dua record berbagi satu entri index: hapus salah
+        # satu ikut menghapus keduanya dan blob-nya tidak pernah dilepas.
+        raise ValueError(f"nama media sudah dipakai: {filename} (milik {existing[0]})")
+    MEDIA_INDEX[filename] = (owner, MEDIA_FILE_TYPES[kind], item)
+    sha256 = _blob_sha(item)
+    if sha256:
+        BLOB_REFS.setdefault(sha256, set()).add(filename)
+
+def release_blob(item):
+    """Lepas referensi satu record ke blob-nya (aman dipanggil berulang)"""
+    sha256 = _blob_sha(item)
+    refs = BLOB_REFS.get(sha256) if sha256 else None
+    if refs is not None:
+        refs.discard(media_filename(item))
+        if not refs:
+            del BLOB_REFS[sha256]
+
+def unindex_media(owner, filename):
+    """Hapus dari index, return record-nya (None kalau bukan milik owner)"""
+    entry = MEDIA_INDEX.get(filename)
+    if not entry or entry[0] != owner:
+        return None
+    del MEDIA_INDEX[filename]
+    release_blob(entry[2])
+    return entry[2]
+
+def new_media_filename(user, original_name):
+    """Nama file unik untuk upload baru.
+
+    Token acak (bukan jumlah file di halaman) supaya nama tidak pernah dipakai
+    ulang setelah hapus + upload lagi, dan nama asli yang sama setelah
+    secure_filename ("ma biche" / "ma_biche") tidak saling menimpa.
+    """
+    while True:
+        filename = secure_filename(f"{user}_{secrets.token_hex(6)}_{original_name}")
+        if filename not in MEDIA_INDEX and not os.path.exists(os.path.join(UPLOAD_FOLDER, filename)):
+            return filename
+
+def rebuild_media_index():
+    """Bangun ulang MEDIA_INDEX dan BLOB_REFS dari PERSONAL_PAGES (dipanggil saat load)"""
+    global MEDIA_INDEX, BLOB_REFS
+    index = {}
+    refs = {}
+    for owner, page in PERSONAL_PAGES.items():
+        for kind in MEDIA_KINDS:
+            for item in page.get(kind, []):
+                filename = media_filename(item)
+                sha256 = _blob_sha(item)
+                if sha256:
+                    refs.setdefault(sha256, set()).add(filename)
+                if filename in index:
+                    # Data lama dari skema nama sebelumnya: entri pertama tetap dipakai
+                    media_log.warning("nama media ganda di data: %s (%s dan %s)", filename, index[filename][0], owner)
+                    continue
+                index[filename] = (owner, MEDIA_FILE_TYPES[kind], item)
+    MEDIA_INDEX = index
+    BLOB_REFS = refs
+
+def blob_path(sha256):
+    return os.path.join(BLOB_FOLDER, sha256[:2], sha256)
+
+def media_path(item):
+    """Lokasi file media di disk: blob untuk upload baru, UPLOAD_FOLDER untuk file lama"""
+    sha256 = _blob_sha(item)
+    if sha256:
+        return blob_path(sha256)
+    return os.path.join(UPLOAD_FOLDER, media_filename(item))
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def store_blob(path, sha256):
+    """Pindahkan file ke blob store. Kalau isi yang sama sudah ada, file baru dibuang (return False)."""
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        os.remove(path)
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    return True
+
+def remove_media_file(item):
+    """Hapus file media yang sudah di-unindex; blob hanya dihapus saat referensi terakhir hilang"""
+    sha256 = _blob_sha(item)
+    if sha256 and BLOB_REFS.get(sha256):
+        return
+    try:
+        os.remove(media_path(item))
+    except FileNotFoundError:
+        pass
+    if sha256:
+        remove_variants(sha256)
+
+def dedup_uploads():
+    """Sekali jalan: pindahkan file lama di UPLOAD_FOLDER ke blob store, file duplikat dibuang"""
+    report = {"files": 0, "duplicates": 0, "bytes_reclaimed": 0, "missing": 0}
+    # Nama lama bisa dipakai beberapa record (lihat rebuild_media_index): file
+    # sudah pindah ke blob store saat record pertama, record berikutnya ikut hasilnya
+    converted = {}
+    with state_transaction(), _blob_lock:
+        for page in PERSONAL_PAGES.values():
+            for kind in MEDIA_KINDS:
+                items = page.get(kind, [])
+                for i, item in enumerate(items):
+                    if _blob_sha(item):
+                        continue
+                    filename = media_filename(item)
+                    if filename not in converted:
+                        path = os.path.join(UPLOAD_FOLDER, filename)
+                        if not os.path.isfile(path):
+                            report["missing"] += 1
+                            continue
+                        size = os.path.getsize(path)
+                        sha256 = file_sha256(path)
+                        report["files"] += 1
+                        if not store_blob(path, sha256):
+                            report["duplicates"] += 1
+                            report["bytes_reclaimed"] += size
+                        converted[filename] = (sha256, size)
+                    if not isinstance(item, dict):
+                        # Format lama (string) selalu dianggap private
+                        item = items[i] = {"filename": item, "visibility": "private"}
+                    sha256, size = converted[filename]
+                    item.update(sha256=sha256, size=size, blob=True)
+        rebuild_media_index()
+        save_personal_pages()
+    return report
+
+# Metadata media (dimensi gambar; durasi, codec, container audio/video) dibaca
+# sekali setelah upload oleh worker background dan disimpan di record sebagai
+# item["meta"]. Template menampilkannya langsung, jadi <audio>/<video> cukup
+# preload="none". Pakai ffprobe kalau terpasang, selain itu Pillow / header file.
+FFPROBE = shutil.which(os.getenv("FFPROBE", "ffprobe"))
+METADATA_WORKERS = int(os.getenv("METADATA_WORKERS", "1"))
+# Thread untuk pekerjaan setelah upload (metadata, re-encode gambar)
+_post_upload_pool = ThreadPoolExecutor(max_workers=METADATA_WORKERS, thread_name_prefix="post-upload")
+
+def _image_header_size(path):
+    """(format, width, height) dari header PNG/GIF/JPEG tanpa Pillow, None kalau tidak dikenal"""
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return ("PNG",) + struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return ("GIF",) + struct.unpack("<HH", head[6:10])
+        if not head.startswith(b"\xff\xd8"):
+            return None
+        f.seek(2)
+        while True:
+            marker = f.read(4)
+            if len(marker) < 4 or marker[0] != 0xFF:
+                return None
+            # SOF0..SOF15 berisi ukuran gambar (C4/C8/CC bukan SOF)
+            if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">xHH", f.read(5))
+                return "JPEG", width, height
+            f.seek(struct.unpack(">H", marker[2:])[0] - 2, os.SEEK_CUR)
+
+def _mp4_duration(path):
+    """Durasi (detik) dari box moov/mvhd file MP4/MOV/M4A/M4V"""
+    with open(path, 'rb') as f:
+        start, end = 0, os.fstat(f.fileno()).st_size
+        for wanted in (b"moov", b"mvhd"):
+            while True:
+                if start + 8 > end:
+                    return None
+                f.seek(start)
+                size, box = struct.unpack(">I4s", f.read(8))
+                header = 8
+                if size == 1:
+                    size, header = struct.unpack(">Q", f.read(8))[0], 16
+                elif size == 0:
+                    size = end - start
+                if size < header:
+                    return None
+                if box == wanted:
+                    break
+                start += size
+            start, end = start + header, start + size
+        f.seek(start)
+        if f.read(1) == b"\x01":
+            timescale, duration = struct.unpack(">3x16xIQ", f.read(31))
+        else:
+            timescale, duration = struct.unpack(">3x8xII", f.read(19))
+        return duration / timescale if timescale else None
+
+def _ffprobe(path, file_type):
+    """Metadata dari ffprobe (durasi, container, codec stream pertama sesuai jenis file)"""
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_entries",
+         "format=duration,format_name:stream=codec_type,codec_name,width,height", "-of", "json", path],
+        capture_output=True, timeout=30)
+    if result.returncode:
+        return {}
+    return _parse_ffprobe(json.loads(result.stdout), file_type)
+
+def _parse_ffprobe(data, file_type):
+    meta = {}
+    fmt = data.get("format", {})
+    if fmt.get("duration") not in (None, "N/A"):
+        meta["duration"] = round(float(fmt["duration"]), 2)
+    if fmt.get("format_name"):
+        meta["container"] = fmt["format_name"].split(",")[0]
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == file_type and "codec" not in meta:
+            meta["codec"] = stream.get("codec_name")
+            if stream.get("width"):
+                meta["width"], meta["height"] = stream["width"], stream.get("height")
+        elif stream.get("codec_type") == "audio" and file_type == "video" and "audio_codec" not in meta:
+            meta["audio_codec"] = stream.get("codec_name")
+    return meta
+
+def extract_metadata(path, filename):
+    """Metadata satu file media; field yang tidak bisa dibaca dilewati saja"""
+    file_type = get_file_type(filename)
+    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    meta = {}
+    try:
+        if file_type == "image":
+            if Image is not None:
+                with Image.open(path) as img:
+                    width, height = img.size
+                    # EXIF orientation 5-8 = diputar 90°: ukuran tampilan tertukar
+                    if img.getexif().get(0x0112) in (5, 6, 7, 8):
+                        width, height = height, width
+                    meta.update(format=img.format, width=width, height=height)
+            else:
+                header = _image_header_size(path)
+                if header:
+                    meta.update(zip(("format", "width", "height"), header))
+        elif FFPROBE:
+            meta.update(_ffprobe(path, file_type))
+        else:
+            meta["container"] = ext
+            if ext == "wav":
+                with wave.open(path) as audio:
+                    meta["duration"] = round(audio.getnframes() / audio.getframerate(), 2)
+                    meta["codec"] = f"pcm_s{audio.getsampwidth() * 8}le"
+            elif ext in ("mp4", "m4a", "m4v", "mov"):
+                duration = _mp4_duration(path)
+                if duration is not None:
+                    meta["duration"] = round(duration, 2)
+    except Exception as e:
+        media_log.warning("gagal membaca metadata %s: %s", filename, e)
+    return meta
+
+def _store_metadata(filename):
+    """Job worker: baca metadata file yang baru diupload lalu simpan ke record-nya"""
+    try:
+        entry = MEDIA_INDEX.get(filename)
+        if not entry:
+            return
+        path = media_path(entry[2])
+        meta = extract_metadata(path, filename)
+        size = os.path.getsize(path)
+        with state_transaction():
+            entry = MEDIA_INDEX.get(filename)
+            if not entry or not isinstance(entry[2], dict):
+                return
+            entry[2]["meta"] = meta
+            entry[2].setdefault("size", size)
+            save_personal_pages(entry[0], [filename])
+    except Exception as e:
+        media_log.error("gagal menyimpan metadata %s: %s", filename, e)
+
+def queue_post_upload(filename):
+    """Jadwalkan pekerjaan background untuk file yang baru diupload"""
+    _post_upload_pool.submit(_store_metadata, filename)
+    if IMAGE_REENCODE_FORMATS and get_file_type(filename) == "image":
+        _post_upload_pool.submit(_store_variants, filename)
+
+def backfill_metadata():
+    """Sekali jalan: isi item["meta"] untuk media lama yang belum punya"""
+    with state_transaction():
+        jobs = [(media_filename(item), media_path(item))
+                for page in PERSONAL_PAGES.values() for kind in MEDIA_KINDS for item in page.get(kind, [])
+                if not (isinstance(item, dict) and "meta" in item)]
+    report = {"files": 0, "missing": 0}
+
+    def extract(job):
+        filename, path = job
+        if not os.path.isfile(path):
+            return filename, None
+        return filename, (extract_metadata(path, filename), os.path.getsize(path))
+
+    # File dibaca tanpa memegang state lock; hasilnya dipasang sekaligus di akhir
+    results = dict(_post_upload_pool.map(extract, jobs))
+    report["missing"] = sum(1 for found in results.values() if found is None)
+    with state_transaction():
+        for page in PERSONAL_PAGES.values():
+            for kind in MEDIA_KINDS:
+                items = page.get(kind, [])
+                for i, item in enumerate(items):
+                    found = results.get(media_filename(item))
+                    if found is None or (isinstance(item, dict) and "meta" in item):
+                        continue
+                    if not isinstance(item, dict):
+                        # Format lama (string) selalu dianggap private
+                        item = items[i] = {"filename": item, "visibility": "private"}
+                    item["meta"] = found[0]
+                    item.setdefault("size", found[1])
+                    report["files"] += 1
+        rebuild_media_index()
+        save_personal_pages()
+    return report
+
+def _human_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+@app.template_global()
+def media_info(item):
+    """Ringkasan metadata untuk ditampilkan, mis. "1920×1080 · JPEG · 2.4 MB" atau "3:25 · mp3 · 4.1 MB" """
+    if not isinstance(item, dict):
+        return ""
+    meta = item.get("meta") or {}
+    parts = []
+    if meta.get("width") and meta.get("height"):
+        parts.append(f"{meta['width']}×{meta['height']}")
+    if meta.get("duration") is not None:
+        minutes, seconds = divmod(int(round(meta["duration"])), 60)
+        hours, minutes = divmod(minutes, 60)
+        parts.append(f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}")
+    label = meta.get("codec") or meta.get("format") or meta.get("container")
+    if label:
+        parts.append(label)
+    if item.get("size"):
+        parts.append(_human_size(item["size"]))
+    return " · ".join(parts)
+
+# View media yang sudah difilter per user: "full" (pemilik/admin) dan "public"
+# (pengunjung lain). Dibangun ulang untuk satu user setiap halaman itu disimpan,
+# jadi view_user() cukup satu lookup dict, berapa pun besar galerinya.
+MEDIA_VIEWS = {}
+
+def build_media_view(page):
+    full = {kind: page.get(kind, []) for kind in MEDIA_KINDS}
+    public = {kind: [item for item in items if isinstance(item, dict) and item.get("visibility") == "public"]
+              for kind, items in full.items()}
+    # Background hanya tampil kalau gambarnya ada di daftar gambar view tersebut
+    bg = page.get("background_image")
+    full["background_image"] = bg if bg and any(media_filename(img) == bg for img in full["images"]) else None
+    public["background_image"] = bg if bg and any(img["filename"] == bg for img in public["images"]) else None
+    return {"full": full, "public": public}
+
+def refresh_media_view(username):
+    page = PERSONAL_PAGES.get(username)
+    if page is None:
+        MEDIA_VIEWS.pop(username, None)
+        return None
+    view = MEDIA_VIEWS[username] = build_media_view(page)
+    return view
+
+def rebuild_media_views():
+    global MEDIA_VIEWS
+    MEDIA_VIEWS = {owner: build_media_view(page) for owner, page in PERSONAL_PAGES.items()}
+
+def get_media_view(owner, full):
+    """Media + background yang boleh dilihat: full untuk pemilik/admin, selain itu public"""
+    view = MEDIA_VIEWS.get(owner) or refresh_media_view(owner)
+    return view["full" if full else "public"]
+
+# Cache HTML hasil render /view-user dan /public, key (owner, kelas viewer:
+# "owner" / "admin" / "other"). LRU dengan batas byte; request yang miss
+# bersamaan untuk key yang sama hanya me-render sekali (single-flight).
+PAGE_CACHE_BYTES = int(os.getenv("PAGE_CACHE_BYTES", str(32 * 1024 * 1024)))
+PAGE_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_page_cache = OrderedDict()
+_page_cache_size = 0
+_page_cache_lock = threading.Lock()
+_page_render_inflight = {}
+# Naik setiap invalidasi; hasil render yang dimulai sebelum invalidasi tidak disimpan
+_page_cache_epoch = 0
+_page_versions = {}
+
+def cached_page(owner, viewer_class, render):
+    """Return HTML (bytes) dari cache, atau render() sekali lalu simpan"""
+    global _page_cache_size
+    key = (owner, viewer_class)
+    with _page_cache_lock:
+        body = _page_cache.get(key)
+        if body is not None:
+            _page_cache.move_to_end(key)
+            PAGE_CACHE_STATS["hits"] += 1
+            return body
+        PAGE_CACHE_STATS["misses"] += 1
+        future = _page_render_inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _page_render_inflight[key] = Future()
+            version = (_page_cache_epoch, _page_versions.get(owner, 0))
+    if not leader:
+        return future.result()
+    try:
+        body = render().encode()
+    except BaseException as e:
+        with _page_cache_lock:
+            _page_render_inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+    with _page_cache_lock:
+        _page_render_inflight.pop(key, None)
+        if version == (_page_cache_epoch, _page_versions.get(owner, 0)) and len(body) <= PAGE_CACHE_BYTES:
+            _page_cache[key] = body
+            _page_cache_size += len(body)
+            while _page_cache_size > PAGE_CACHE_BYTES:
+                _, old_body = _page_cache.popitem(last=False)
+                _page_cache_size -= len(old_body)
+                PAGE_CACHE_STATS["evictions"] += 1
+    future.set_result(body)
+    return body
+
+def invalidate_page_cache(owner=None):
+    """Buang HTML ter-cache milik owner (None = semua)"""
+    global _page_cache_size, _page_cache_epoch
+    with _page_cache_lock:
+        if owner is None:
+            _page_cache_epoch += 1
+            _page_cache.clear()
+            _page_cache_size = 0
+            return
+        _page_versions[owner] = _page_versions.get(owner, 0) + 1
+        for viewer_class in ("owner", "admin", "other"):
+            body = _page_cache.pop((owner, viewer_class), None)
+            if body is not None:
+                _page_cache_size -= len(body)
+
+def page_cache_stats():
+    with _page_cache_lock:
+        lookups = PAGE_CACHE_STATS["hits"] + PAGE_CACHE_STATS["misses"]
+        return {**PAGE_CACHE_STATS, "hit_ratio": PAGE_CACHE_STATS["hits"] / lookups if lookups else 0.0,
+                "entries": len(_page_cache), "bytes": _page_cache_size}
+
+def replace_personal_page(username, page):
+    """Ganti (atau hapus, page=None) personal page satu user beserta entri MEDIA_INDEX-nya"""
+    old_page = PERSONAL_PAGES.pop(username, None)
+    if old_page:
+        for kind in MEDIA_KINDS:
+            for item in old_page.get(kind, []):
+                unindex_media(username, media_filename(item))
+    if page is not None:
+        PERSONAL_PAGES[username] = page
+        for kind in MEDIA_KINDS:
+            for item in page.get(kind, []):
+                index_media(username, kind, item)
+    refresh_media_view(username)
+    invalidate_page_cache(username)
+
+# Metrics in-process (counter + histogram), dibaca lewat /metrics dalam format
+# teks Prometheus. Dengan MULTI_WORKER setiap proses punya registry sendiri,
+# jadi scrape per worker (atau jumlahkan di sisi Prometheus).
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1 KB .. 1 GB
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+class Metrics:
+    """Registry counter/histogram; label berupa tuple pasangan (nama, nilai)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._histograms = {}
+
+    def counter(self, name, help_text):
+        self._meta[name] = ("counter", help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ("histogram", help_text, buckets)
+
+    def inc(self, name, value=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                buckets = self._meta[name][2]
+                # [jumlah per bucket (+Inf di akhir), sum, count]
+                series = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self._meta[name][2], value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        """Semua metric dalam format teks Prometheus (version 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, ([*series[0]], series[1], series[2]))
+                                for key, series in self._histograms.items())
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                lines.extend(f"{name}{self._labels(labels)} {value}"
+                             for (series_name, labels), value in counters if series_name == name)
+                continue
+            for (series_name, labels), (counts, total, count) in histograms:
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip((*buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+METRICS.counter("http_requests_total", "Jumlah request per route, method dan status")
+METRICS.histogram("http_request_duration_seconds", "Durasi request per route (sampai response dibuat)")
+METRICS.histogram("storage_save_duration_seconds", "Durasi save_users/save_personal_pages ke backend")
+METRICS.counter("storage_save_bytes_total", "Byte yang ditulis save_users/save_personal_pages")
+METRICS.counter("media_served_bytes_total", "Byte isi file yang dikirim /uploads")
+METRICS.histogram("upload_size_bytes", "Ukuran file upload", SIZE_BUCKETS)
+METRICS.histogram("upload_duration_seconds", "Durasi upload (menerima isi file sampai terdaftar)")
+METRICS.counter("log_records_dropped_total", "Record log yang dibuang sampling/rate limit")
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Pakai pola route (bukan path) supaya jumlah series tetap kecil
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        METRICS.observe("http_request_duration_seconds", time.perf_counter() - started,
+                        (("route", route), ("method", request.method)))
+        METRICS.inc("http_requests_total", 1,
+                    (("route", route), ("method", request.method), ("status", str(response.status_code))))
+    return response
+
+# Mode multi-worker (mis. gunicorn -w 4): semua proses berbagi DATA_DIR.
+# Setiap mutasi memegang file lock antar-proses, dan dua generation counter
+# (users, pages) di file yang di-mmap memberi tahu proses lain bahwa datanya
+# basi. Proses yang tertinggal hanya memuat ulang halaman yang berubah.
+MULTI_WORKER = os.getenv("MULTI_WORKER", "0") == "1"
+STATE_LOCK_FILE = os.path.join(DATA_DIR, ".state.lock")
+STATE_GENERATION_FILE = os.path.join(DATA_DIR, ".state.generation")
+
+if MULTI_WORKER and fcntl is None:
+    raise RuntimeError("MULTI_WORKER=1 membutuhkan fcntl (Linux/macOS)")
+
+_state_thread_lock = threading.RLock()
+_state_local = threading.local()
+_state_lock_fd = None
+_state_lock_pid = None
+_generation_map = None
+_seen_generation = [0, 0]
+
+def _state_lock():
+    """File descriptor lock milik proses ini (dibuka ulang setelah fork, flock terikat ke fd)"""
+    global _state_lock_fd, _state_lock_pid
+    if _state_lock_pid != os.getpid():
+        _state_lock_fd = os.open(STATE_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        _state_lock_pid = os.getpid()
+    return _state_lock_fd
+
+def _generation():
+    global _generation_map
+    if _generation_map is None:
+        fd = os.open(STATE_GENERATION_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < 16:
+                os.ftruncate(fd, 16)
+            _generation_map = mmap.mmap(fd, 16)
+        finally:
+            os.close(fd)
+    return _generation_map
+
+def read_generation():
+    """(generation users, generation pages) yang terakhir ditulis proses mana pun"""
+    return struct.unpack_from("<QQ", _generation())
+
+def refresh_state():
+    """Muat ulang data yang diubah proses lain sejak generation yang terakhir dilihat"""
+    users_generation, pages_generation = read_generation()
+    if users_generation != _seen_generation[0]:
+        load_users()
+        _seen_generation[0] = users_generation
+    if pages_generation != _seen_generation[1]:
+        changes = STORAGE.load_page_changes(_seen_generation[1])
+        if changes is None:
+            load_personal_pages()
+        else:
+            for username, page in changes.items():
+                replace_personal_page(username, page)
+        _seen_generation[1] = pages_generation
+
+@contextmanager
+def state_transaction():
+    """Bungkus setiap mutasi USERS, PENDING_USERS, ADMIN_PANEL_ENABLED dan PERSONAL_PAGES.
+
+    Single-process tidak melakukan apa-apa (write-behind biasa). Dengan
+    MULTI_WORKER: ambil lock antar-proses, muat ulang data basi, jalankan
+    mutasi, lalu simpan dan naikkan generation sebelum lock dilepas.
+    Data yang akan diubah harus diambil di dalam blok ini.
+    """
+    if not MULTI_WORKER or getattr(_state_local, "active", False):
+        yield
+        return
+    with _state_thread_lock:
+        fd = _state_lock()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        _state_local.active = True
+        try:
+            refresh_state()
+            yield
+        finally:
+            try:
+                users_generation, pages_generation = read_generation()
+                STORAGE.write_version = pages_generation + 1
+                wrote_users, wrote_pages = PERSISTER.flush()
+                if wrote_users or wrote_pages:
+                    users_generation += wrote_users
+                    pages_generation += wrote_pages
+                    struct.pack_into("<QQ", _generation(), 0, users_generation, pages_generation)
+                    _seen_generation[:] = [users_generation, pages_generation]
+            finally:
+                _state_local.active = False
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+@app.before_request
+def refresh_stale_state():
+    """Cek murah (baca mmap) apakah proses lain sudah mengubah data"""
+    if MULTI_WORKER and list(read_generation()) != _seen_generation:
+        with _state_thread_lock:
+            # Shared lock: jangan membaca file di tengah compaction proses lain
+            fd = _state_lock()
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                refresh_state()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+if MULTI_WORKER:
+    # Background thread tidak boleh menulis di luar lock
+    PERSISTER.auto_flush = False
+    if isinstance(STORAGE, JsonStorage):
+        STORAGE.background_compaction = False
+
+# Load users saat aplikasi dimulai
+if MULTI_WORKER:
+    # Baca generation sebelum load: data yang dimuat minimal sebaru ini
+    with _state_thread_lock:
+        fcntl.flock(_state_lock(), fcntl.LOCK_SH)
+        try:
+            _seen_generation[:] = read_generation()
+            load_users()
+            load_personal_pages()
+        finally:
+            fcntl.flock(_state_lock(), fcntl.LOCK_UN)
+else:
+    load_users()
+    load_personal_pages()
+
+USERS = USERS if USERS else DEFAULT_USERS.copy()
+PENDING_USERS = PENDING_USERS if PENDING_USERS else {}
+ADMIN_PANEL_ENABLED = ADMIN_PANEL_ENABLED if 'ADMIN_PANEL_ENABLED' in globals() else True
+
+REGISTER_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-position: center;
+    font-family: Arial, sans-serif;
+}
+.box {
+    background: rgba(0,0,0,0.65);
+    color: white;
+    padding: 30px;
+    width: 320px;
+    margin: auto;
+    margin-top: 8%;
+    border-radius: 10px;
+    text-align: center;
+}
+input, button {
+    width: 100%;
+    padding: 10px;
+    margin-top: 10px;
+    border-radius: 5px;
+    border: none;
+}
+button {
+    background: #00c6ff;
+    cursor: pointer;
+}
+button:hover {
+    background: #00a8d4;
+}
+.msg {
+    color: #ffdd57;
+    font-size: 12px;
+    margin-top: 10px;
+}
+.login-link {
+    margin-top: 15px;
+}
+.login-link a {
+    color: #00c6ff;
+    text-decoration: none;
+}
+"""
+
+REGISTER_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Register</title>
+    <link rel="stylesheet" href="{{ asset_url("register.css") }}">
+</head>
+<body>
+    <div class="box">
+        <h2>Register</h2>
+        {% if error %}
+            <p style="color: #ff4444;">{{ error }}</p>
+        {% endif %}
+        <form method="post">
+            <input name="username" placeholder="Username" required>
+            <input name="password" type="password" placeholder="Password" required>
+            <input name="confirm_password" type="password" placeholder="Confirm Password" required>
+            <button>Register</button>
+        </form>
+        <p class="msg">Akun Anda akan menunggu persetujuan admin</p>
+        <div class="login-link">
+            Sudah punya akun? <a href="/login">Login</a>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+ADMIN_PANEL_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.jpg');
+    background-size: cover;
+    background-position: center;
+    font-family: Arial, sans-serif;
+}
+.container {
+    background: rgba(0,0,0,0.85);
+    color: white;
+    padding: 20px;
+    height: 100vh;
+    display: flex;
+    flex-direction: column;
+}
+.navbar {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 20px;
+    padding-bottom: 20px;
+    border-bottom: 2px solid #00c6ff;
+}
+.navbar h1 {
+    margin: 0;
+}
+.navbar a {
+    color: white;
+    background: #00c6ff;
+    padding: 10px 20px;
+    text-decoration: none;
+    border-radius: 5px;
+    cursor: pointer;
+}
+.navbar a:hover {
+    background: #00a8d4;
+}
+.menu {
+    display: flex;
+    gap: 10px;
+    margin-bottom: 20px;
+    flex-wrap: wrap;
+}
+.menu button {
+    background: #333;
+    color: white;
+    border: 2px solid #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 14px;
+}
+.menu button:hover {
+    background: #00c6ff;
+    color: black;
+}
+.menu button.active {
+    background: #00c6ff;
+    color: black;
+}
+.content {
+    flex: 1;
+    overflow-y: auto;
+}
+.request-card {
+    background: rgba(0,0,0,0.6);
+    border: 1px solid #00c6ff;
+    padding: 15px;
+    margin-bottom: 10px;
+    border-radius: 5px;
+}
+.request-card h3 {
+    margin-top: 0;
+    color: #00c6ff;
+}
+.request-card .actions {
+    display: flex;
+    gap: 10px;
+    margin-top: 10px;
+}
+.request-card button {
+    padding: 8px 15px;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 12px;
+}
+.approve {
+    background: #00c600;
+    color: white;
+}
+.approve:hover {
+    background: #00a800;
+}
+.reject {
+    background: #c60000;
+    color: white;
+}
+.reject:hover {
+    background: #a80000;
+}
+.no-requests {
+    color: #888;
+    text-align: center;
+    padding: 50px;
+}
+.bulk-bar {
+    display: flex;
+    gap: 10px;
+    align-items: center;
+    margin-bottom: 15px;
+}
+.bulk-bar button {
+    padding: 8px 15px;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 12px;
+}
+.bulk-error {
+    background: rgba(198,0,0,0.3);
+    border: 2px solid #ff4444;
+    color: #ffdd57;
+    padding: 15px;
+    border-radius: 5px;
+    margin-bottom: 20px;
+}
+.request-card h3 label {
+    cursor: pointer;
+}
+.user-filter {
+    display: flex;
+    gap: 10px;
+    margin-bottom: 15px;
+}
+.user-filter input, .user-filter select {
+    padding: 8px;
+    border-radius: 5px;
+    border: 1px solid #00c6ff;
+    background: #222;
+    color: white;
+}
+.user-filter input {
+    flex: 1;
+}
+.load-more {
+    background: #333;
+    color: white;
+    border: 2px solid #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+    cursor: pointer;
+}
+"""
+
+ADMIN_PANEL_JS = """
+function showSection(id) {
+    // Hide all sections
+    document.querySelectorAll('.section').forEach(el => el.style.display = 'none');
+    document.querySelectorAll('.menu-btn').forEach(btn => btn.classList.remove('active'));
+    
+    // Show selected section
+    document.getElementById(id).style.display = 'block';
+    event.target.classList.add('active');
+}
+
+// Daftar user/pendaftaran: diambil per halaman dari /admin/api/users
+function bindUser(node, item) {
+    node.querySelectorAll('[data-bind-text]').forEach(el => { el.textContent = item[el.dataset.bindText]; });
+    node.querySelectorAll('[data-bind-value]').forEach(el => { el.value = item.username; });
+    node.querySelectorAll('[data-show-role]').forEach(el => { if (el.dataset.showRole !== item.role) el.remove(); });
+    node.querySelectorAll('[data-hide-self]').forEach(el => { if (item.is_self) el.remove(); });
+    return node;
+}
+
+document.querySelectorAll('.user-list').forEach(list => {
+    const rows = list.querySelector('.rows');
+    const more = list.querySelector('.load-more');
+    const empty = list.querySelector('.no-requests');
+    const search = list.querySelector('.user-search');
+    const role = list.querySelector('.user-role');
+    const template = document.getElementById(list.dataset.template);
+    let cursor = null;
+    let latest = 0;
+    let timer = null;
+
+    async function load(reset) {
+        const id = ++latest;
+        const params = new URLSearchParams({collection: list.dataset.collection, q: search.value.trim()});
+        if (role && role.value) params.set('role', role.value);
+        if (!reset && cursor) params.set('cursor', cursor);
+        const res = await fetch('/admin/api/users?' + params);
+        // Jawaban untuk pencarian yang sudah diganti diabaikan
+        if (!res.ok || id !== latest) return;
+        const page = await res.json();
+        if (reset) rows.replaceChildren();
+        page.items.forEach(item => {
+            rows.appendChild(bindUser(template.content.firstElementChild.cloneNode(true), item));
+        });
+        cursor = page.next_cursor;
+        more.style.display = cursor ? '' : 'none';
+        empty.style.display = rows.children.length ? 'none' : '';
+    }
+
+    search.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => load(true), 250);
+    });
+    if (role) role.addEventListener('change', () => load(true));
+    more.addEventListener('click', () => load(false));
+    load(true);
+});
+
+// Checkbox "Pilih semua" untuk form bulk
+document.querySelectorAll('[data-select-all]').forEach(toggle => {
+    toggle.addEventListener('change', () => {
+        const formId = toggle.dataset.selectAll;
+        document.querySelectorAll(`input[name="usernames"][form="${formId}"]`).forEach(box => {
+            box.checked = toggle.checked;
+        });
+    });
+});
+"""
+
+ADMIN_PANEL_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Admin Panel</title>
+    <link rel="stylesheet" href="{{ asset_url("admin_panel.css") }}">
+</head>
+<body>
+    <div class="container">
+        <div class="navbar">
+            <div style="display: flex; align-items: center; gap: 15px;">
+                <h1 style="margin: 0;">⚙️ Admin Panel</h1>
+                <form method="post" style="margin: 0; display: inline;">
+                    <input type="hidden" name="action" value="toggle_admin">
+                    <button type="submit" title="{% if admin_panel_enabled %}Tutup Admin Panel{% else %}Buka Admin Panel{% endif %}" style="padding: 8px 12px; background: {% if admin_panel_enabled %}#00c600{% else %}#c60000{% endif %}; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 16px; transition: 0.3s;">
+                        {% if admin_panel_enabled %}🔓{% else %}🔒{% endif %}
+                    </button>
+                </form>
+            </div>
+            <a href="/logout">Logout</a>
+        </div>
+        
+        <div class="menu">
+            <button class="menu-btn active" onclick="showSection('pending')">📋 Permintaan Pendaftaran</button>
+            <button class="menu-btn" onclick="showSection('users')">👥 Daftar Pengguna</button>
+            <button class="menu-btn" onclick="showSection('home')">🏠 Home</button>
+        </div>
+        
+        <div class="content">
+            {% if not admin_panel_enabled %}
+            <div style="background: rgba(198,0,0,0.3); border: 2px solid #ff4444; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
+                <p style="color: #ff4444; margin: 0; font-weight: bold;">⚠️ ADMIN PANEL SEDANG DITUTUP</p>
+                <p style="margin: 5px 0 0 0; color: #ffdd57;">Fitur moderasi tidak tersedia untuk pengguna reguler</p>
+            </div>
+            {% endif %}
+            {% if bulk_error %}
+            <div class="bulk-error">⚠️ {{ bulk_error }}</div>
+            {% endif %}
+            <div id="pending" class="section" style="display: block;">
+                <h2>Permintaan Pendaftaran Menunggu</h2>
+                <form id="bulk-pending" method="post" action="/admin/bulk" class="bulk-bar">
+                    <label><input type="checkbox" data-select-all="bulk-pending"> Pilih semua</label>
+                    <button type="submit" name="action" value="approve" class="approve">✓ Setujui terpilih</button>
+                    <button type="submit" name="action" value="reject" class="reject">✗ Tolak terpilih</button>
+                </form>
+                <div class="user-list" data-collection="pending" data-template="tpl-pending-row">
+                    <div class="user-filter">
+                        <input type="search" class="user-search" placeholder="Cari username...">
+                    </div>
+                    <div class="rows"></div>
+                    <div class="no-requests" style="display: none;">Tidak ada permintaan pendaftaran yang menunggu</div>
+                    <button type="button" class="load-more" style="display: none;">Muat lagi</button>
+                </div>
+                <template id="tpl-pending-row">
+                    <div class="request-card">
+                        <h3><label><input type="checkbox" name="usernames" data-bind-value form="bulk-pending"> <span data-bind-text="username"></span></label></h3>
+                        <p>Status: <span style="color: #ffdd57;">Menunggu Persetujuan</span></p>
+                        <div class="actions">
+                            <form method="post" style="display: inline;">
+                                <input type="hidden" name="action" value="approve">
+                                <input type="hidden" name="username" data-bind-value>
+                                <button type="submit" class="approve">✓ Setujui</button>
+                            </form>
+                            <form method="post" style="display: inline;">
+                                <input type="hidden" name="action" value="reject">
+                                <input type="hidden" name="username" data-bind-value>
+                                <button type="submit" class="reject">✗ Tolak</button>
+                            </form>
+                        </div>
+                    </div>
+                </template>
+            </div>
+            
+            <div id="users" class="section" style="display: none;">
+                <h2>Daftar Pengguna</h2>
+                <form id="bulk-users" method="post" action="/admin/bulk" class="bulk-bar">
+                    <label><input type="checkbox" data-select-all="bulk-users"> Pilih semua</label>
+                    <button type="submit" name="action" value="make_admin" style="background: #ffaa00; color: white;">👑 Jadikan Admin terpilih</button>
+                    <button type="submit" name="action" value="remove_admin" style="background: #c60000; color: white;">👤 Hapus Admin terpilih</button>
+                </form>
+                <div class="user-list" data-collection="users" data-template="tpl-user-row">
+                    <div class="user-filter">
+                        <input type="search" class="user-search" placeholder="Cari username...">
+                        <select class="user-role">
+                            <option value="">Semua role</option>
+                            <option value="user">user</option>
+                            <option value="admin">admin</option>
+                        </select>
+                    </div>
+                    <div class="rows"></div>
+                    <div class="no-requests" style="display: none;">Tidak ada pengguna yang cocok</div>
+                    <button type="button" class="load-more" style="display: none;">Muat lagi</button>
+                </div>
+                <template id="tpl-user-row">
+                    <div class="request-card">
+                        <h3><label><input type="checkbox" name="usernames" data-bind-value data-hide-self form="bulk-users"> <span data-bind-text="username"></span></label></h3>
+                        <p>Role: <span style="color: #00c6ff;" data-bind-text="role"></span></p>
+                        <div class="actions">
+                            <form method="post" style="display: inline;" data-show-role="user">
+                                <input type="hidden" name="action" value="make_admin">
+                                <input type="hidden" name="username" data-bind-value>
+                                <button type="submit" style="padding: 8px 15px; background: #ffaa00; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">👑 Jadikan Admin</button>
+                            </form>
+                            <form method="post" style="display: inline;" data-show-role="admin" data-hide-self>
+                                <input type="hidden" name="action" value="remove_admin">
+                                <input type="hidden" name="username" data-bind-value>
+                                <button type="submit" style="padding: 8px 15px; background: #c60000; color: white; border: none; border-radius: 5px; cursor: pointer; font-size: 12px;">👤 Hapus Admin</button>
+                            </form>
+                        </div>
+                    </div>
+                </template>
+            </div>
+            
+            <div id="home" class="section" style="display: none;">
+                <h2>Dashboard Admin</h2>
+                <div class="request-card">
+                    <h3>📊 Statistik</h3>
+                    <p>Total Pengguna: {{ user_count }}</p>
+                    <p>Permintaan Menunggu: {{ pending_count }}</p>
+                </div>
+                <div class="request-card">
+                    <h3>🔐 Kontrol Admin Panel</h3>
+                    <p>Status Admin Panel: 
+                        <span style="color: {% if admin_panel_enabled %}#00c600{% else %}#ff4444{% endif %};">
+                            {% if admin_panel_enabled %}✓ AKTIF{% else %}✗ NONAKTIF{% endif %}
+                        </span>
+                    </p>
+                    <form method="post" style="margin-top: 10px;">
+                        <input type="hidden" name="action" value="toggle_admin">
+                        <button type="submit" style="width: auto; padding: 8px 15px; background: {% if admin_panel_enabled %}#c60000{% else %}#00c600{% endif %}; color: white; border: none; border-radius: 5px; cursor: pointer;">
+                            {% if admin_panel_enabled %}🔒 Tutup Admin Panel{% else %}🔓 Buka Admin Panel{% endif %}
+                        </button>
+                    </form>
+                </div>
+            </div>
+        </div>
+    </div>
+    
+    <script src="{{ asset_url("admin_panel.js") }}"></script>
+</body>
+</html>
+"""
+
+LOGIN_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-position: center;
+    font-family: Arial, sans-serif;
+}
+.box {
+    background: rgba(0,0,0,0.65);
+    color: white;
+    padding: 30px;
+    width: 320px;
+    margin: auto;
+    margin-top: 12%;
+    border-radius: 10px;
+    text-align: center;
+}
+input, button {
+    width: 100%;
+    padding: 10px;
+    margin-top: 10px;
+    border-radius: 5px;
+    border: none;
+}
+button {
+    background: #00c6ff;
+    cursor: pointer;
+}
+.bottom-text {
+    position: fixed;
+    bottom: 100px;
+    left: 50%;
+    transform: translateX(-50%);
+    color: white;
+    font-size: 24px;
+    text-align: center;
+    background: transparent;
+    padding: 0;
+    z-index: 10;
+}
+.bottom-text h2 {
+    background: transparent;
+    margin: 0;
+    padding: 0;
+}
+.bottom-text a {
+    text-decoration: none;
+}
+.bottom-text button {
+    background: transparent !important;
+    color: white !important;
+    border: 1px solid white !important;
+    padding: 10px 20px !important;
+    width: auto !important;
+}
+"""
+
+HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Login</title>
+    <link rel="stylesheet" href="{{ asset_url("login.css") }}">
+</head>
+<body>
+    {% if user == "ma biche" %}
+        <div class="bottom-text">
+            <h2>{{ msg }}</h2>
+            <a href="/logout"><button>Logout</button></a>
+        </div>
+    {% else %}
+        <div class="box">
+            {% if msg %}
+                <h2>{{ msg }}</h2>
+                <a href="/logout"><button>Logout</button></a>
+            {% else %}
+                <h2>Login</h2>
+                <form method="post">
+                    <input name="username" placeholder="Username">
+                    <input name="password" type="password" placeholder="Password">
+                    <button>Login</button>
+                </form>
+                <p style="margin-top: 15px;">Belum punya akun? <a href="/register" style="color: #00c6ff;">Daftar</a></p>
+            {% endif %}
+        </div>
+    {% endif %}
+</body>
+</html>
+"""
+
+HOME_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-position: center;
+    background-color: var(--bg-color);
+    font-family: Arial, sans-serif;
+}
+.navbar {
+    background: rgba(0,0,0,0.7);
+    padding: 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+.navbar h2 {
+    color: var(--text-color);
+    margin: 0;
+}
+.navbar-buttons {
+    display: flex;
+    gap: 10px;
+}
+.navbar a {
+    color: white;
+    text-decoration: none;
+    background: #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+    cursor: pointer;
+}
+.navbar a:hover {
+    background: #00a8d4;
+}
+.content {
+    color: var(--text-color);
+    text-align: center;
+    padding: 50px 20px;
+}
+.content h1 {
+    font-size: 48px;
+    margin-bottom: 20px;
+    color: var(--text-color);
+}
+.content p {
+    font-size: 20px;
+    max-width: 600px;
+    margin: 0 auto;
+    color: var(--text-color);
+}
+.links {
+    margin-top: 50px;
+    display: flex;
+    gap: 20px;
+    justify-content: center;
+    flex-wrap: wrap;
+}
+.links a {
+    color: white;
+    text-decoration: none;
+    background: rgba(0,0,0,0.6);
+    padding: 15px 30px;
+    border-radius: 5px;
+    border: 2px solid #00c6ff;
+    font-size: 16px;
+    transition: 0.3s;
+}
+.links a:hover {
+    background: #00c6ff;
+    color: black;
+}
+"""
+
+HOME_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Home</title>
+    <link rel="stylesheet" href="{{ asset_url("home.css") }}">
+</head>
+<body style="--bg-color: {{ bg_color }}; --text-color: {{ text_color }};">
+    <div class="navbar">
+        <h2>Welcome, {{ user }}!</h2>
+        <div class="navbar-buttons">
+            {% if is_admin %}
+                <a href="/admin">⚙️ Admin Panel</a>
+            {% endif %}
+            <a href="/personal-page">🎨 Personal Page</a>
+            <a href="/edit-profile">✏️ Edit Profile</a>
+            <a href="/logout">Logout</a>
+        </div>
+    </div>
+    <div class="content">
+        <h1>Home</h1>
+        <p>{{ msg }}</p>
+        <div class="links">
+            <a href="https://www.instagram.com/muhammadaryamenoza/" target="_blank">My Instagram</a>
+            <a href="https://www.instagram.com" target="_blank">Instagram</a>
+            <a href="https://mail.google.com" target="_blank">Gmail</a>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+EDIT_PROFILE_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-position: center;
+    font-family: Arial, sans-serif;
+}
+.container {
+    background: rgba(0,0,0,0.85);
+    color: white;
+    padding: 30px;
+    width: 90%;
+    max-width: 600px;
+    margin: 20px auto;
+    border-radius: 10px;
+}
+.container h2 {
+    color: #00c6ff;
+    margin-top: 0;
+}
+.form-group {
+    margin-bottom: 20px;
+}
+.form-group label {
+    display: block;
+    margin-bottom: 5px;
+    font-weight: bold;
+    color: #00c6ff;
+}
+.form-group input,
+.form-group textarea {
+    width: 100%;
+    padding: 10px;
+    border: 2px solid #00c6ff;
+    border-radius: 5px;
+    background: rgba(0,0,0,0.5);
+    color: white;
+    font-family: Arial, sans-serif;
+    box-sizing: border-box;
+}
+.form-group textarea {
+    resize: vertical;
+    min-height: 80px;
+}
+.form-group input::placeholder,
+.form-group textarea::placeholder {
+    color: #888;
+}
+.color-preview {
+    display: inline-block;
+    width: 50px;
+    height: 50px;
+    border: 2px solid white;
+    border-radius: 5px;
+    margin-left: 10px;
+}
+.preview {
+    background: rgba(0,0,0,0.6);
+    padding: 20px;
+    border-radius: 5px;
+    margin-top: 20px;
+    border: 2px solid #00c6ff;
+}
+.preview h3 {
+    color: #00c6ff;
+}
+.preview-text {
+    padding: 10px;
+    border-radius: 5px;
+    margin: 10px 0;
+}
+.button-group {
+    display: flex;
+    gap: 10px;
+    margin-top: 20px;
+}
+.button-group button,
+.button-group a {
+    flex: 1;
+    padding: 12px;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 16px;
+    text-decoration: none;
+    text-align: center;
+}
+.button-group button {
+    background: #00c600;
+    color: white;
+}
+.button-group button:hover {
+    background: #00a800;
+}
+.button-group a {
+    background: #666;
+    color: white;
+}
+.button-group a:hover {
+    background: #888;
+}
+"""
+
+EDIT_PROFILE_JS = """
+// Update preview saat user mengetik
+document.getElementById('msg').addEventListener('input', updatePreview);
+document.getElementById('bg_color').addEventListener('change', updatePreview);
+document.getElementById('text_color').addEventListener('change', updatePreview);
+
+function updatePreview() {
+    const msg = document.getElementById('msg').value;
+    const bgColor = document.getElementById('bg_color').value;
+    const textColor = document.getElementById('text_color').value;
+    
+    const preview = document.getElementById('preview');
+    preview.style.backgroundColor = bgColor;
+    preview.style.color = textColor;
+    preview.textContent = msg;
+    
+    document.getElementById('bg_preview').style.background = bgColor;
+    document.getElementById('text_preview').style.background = textColor;
+}
+"""
+
+EDIT_PROFILE_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Edit Profile</title>
+    <link rel="stylesheet" href="{{ asset_url("edit_profile.css") }}">
+</head>
+<body>
+    <div class="container">
+        <h2>✏️ Edit Profile</h2>
+        <form method="post">
+            <div class="form-group">
+                <label for="msg">Pesan di Home Page:</label>
+                <textarea name="msg" id="msg" placeholder="Tulis pesan Anda..." required>{{ msg }}</textarea>
+            </div>
+            
+            <div class="form-group">
+                <label for="bg_color">Warna Background:</label>
+                <input type="color" name="bg_color" id="bg_color" value="{{ bg_color }}">
+                <span class="color-preview" id="bg_preview" style="background: {{ bg_color }};"></span>
+            </div>
+            
+            <div class="form-group">
+                <label for="text_color">Warna Text:</label>
+                <input type="color" name="text_color" id="text_color" value="{{ text_color }}">
+                <span class="color-preview" id="text_preview" style="background: {{ text_color }};"></span>
+            </div>
+            
+            <div class="preview">
+                <h3>Preview:</h3>
+                <div class="preview-text" id="preview" style="background-color: {{ bg_color }}; color: {{ text_color }};">
+                    {{ msg }}
+                </div>
+            </div>
+            
+            <div class="button-group">
+                <button type="submit">💾 Simpan Perubahan</button>
+                <a href="/home">Batal</a>
+            </div>
+        </form>
+    </div>
+    
+    <script src="{{ asset_url("edit_profile.js") }}"></script>
+</body>
+</html>
+"""
+
+PUBLIC_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-position: center;
+    font-family: Arial, sans-serif;
+}
+.navbar {
+    background: rgba(0,0,0,0.7);
+    padding: 20px;
+    text-align: right;
+}
+.navbar h2 {
+    color: white;
+    margin: 0 0 10px 0;
+}
+.navbar a {
+    color: white;
+    text-decoration: none;
+    background: #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+    cursor: pointer;
+    margin-left: 10px;
+}
+.navbar a:hover {
+    background: #00a8d4;
+}
+.content {
+    color: white;
+    text-align: center;
+    padding: 50px 20px;
+}
+.content h1 {
+    font-size: 48px;
+    margin-bottom: 20px;
+}
+.content p {
+    font-size: 20px;
+    max-width: 600px;
+    margin: 0 auto;
+}
+.links {
+    margin-top: 50px;
+    display: flex;
+    gap: 20px;
+    justify-content: center;
+    flex-wrap: wrap;
+}
+.links a {
+    color: white;
+    text-decoration: none;
+    background: rgba(0,0,0,0.6);
+    padding: 15px 30px;
+    border-radius: 5px;
+    border: 2px solid #00c6ff;
+    font-size: 16px;
+    transition: 0.3s;
+}
+.links a:hover {
+    background: #00c6ff;
+    color: black;
+}
+"""
+
+PUBLIC_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Public Home</title>
+    <link rel="stylesheet" href="{{ asset_url("public.css") }}">
+</head>
+<body>
+    <div class="navbar">
+        <h2>Welcome to My Site!</h2>
+        <div style="display: flex; gap: 10px;">
+            <a href="/register">📝 Register</a>
+            <a href="/login">🔐 Login</a>
+        </div>
+    </div>
+    <div class="content">
+        <h1>Welcome</h1>
+        <p>Access my social media and contact accounts</p>
+        <div class="links">
+            <a href="https://www.instagram.com/muhammadaryamenoza/" target="_blank">My Instagram</a>
+            <a href="https://www.instagram.com" target="_blank">Instagram</a>
+            <a href="https://mail.google.com" target="_blank">Gmail</a>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+PERSONAL_PAGE_CSS = """
+body {
+    margin: 0;
+    min-height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-attachment: fixed;
+    background-color: var(--bg-color);
+    font-family: Arial, sans-serif;
+}
+body.has-background {
+    background-image: var(--background-image) !important;
+    background-attachment: fixed;
+    background-position: center;
+    background-repeat: no-repeat;
+}
+body::before {
+    content: '';
+    position: fixed;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background: rgba(0,0,0,0.4);
+    pointer-events: none;
+    z-index: -1;
+}
+.navbar {
+    background: rgba(0,0,0,0.8);
+    padding: 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    gap: 20px;
+    flex-wrap: wrap;
+}
+.navbar h2 {
+    color: var(--text-color);
+    margin: 0;
+}
+.search-form {
+    display: flex;
+    gap: 10px;
+    align-items: center;
+}
+.search-form input {
+    padding: 10px 15px;
+    border: 2px solid #00c6ff;
+    border-radius: 5px;
+    background: rgba(0,0,0,0.5);
+    color: white;
+    min-width: 200px;
+}
+.search-form input::placeholder {
+    color: #888;
+}
+.search-form input:focus {
+    outline: none;
+    border-color: #00ff00;
+    box-shadow: 0 0 10px rgba(0,255,0,0.3);
+}
+.search-form button {
+    padding: 10px 20px;
+    background: #00c6ff;
+    color: black;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-weight: bold;
+}
+.search-form button:hover {
+    background: #00a8d4;
+}
+.navbar-buttons {
+    display: flex;
+    gap: 10px;
+}
+.navbar a {
+    color: white;
+    text-decoration: none;
+    background: #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+    cursor: pointer;
+}
+.navbar a:hover {
+    background: #00a8d4;
+}
+.container {
+    max-width: 1200px;
+    margin: 40px auto;
+    padding: 20px;
+    background: rgba(0,0,0,0.7);
+    border-radius: 10px;
+    color: var(--text-color);
+}
+.header {
+    text-align: center;
+    margin-bottom: 40px;
+}
+.header h1 {
+    font-size: 36px;
+    margin: 0 0 10px 0;
+    color: var(--text-color);
+}
+.header p {
+    font-size: 18px;
+    margin: 0;
+    color: var(--text-color);
+}
+.gallery {
+    display: grid;
+    grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
+    gap: 20px;
+    margin-bottom: 40px;
+}
+.gallery-item {
+    background: rgba(0,0,0,0.5);
+    border-radius: 8px;
+    overflow: hidden;
+    border: 2px solid #00c6ff;
+    position: relative;
+}
+.gallery-item img {
+    width: 100%;
+    height: 250px;
+    object-fit: cover;
+    display: block;
+}
+.gallery-item .delete-btn {
+    position: absolute;
+    top: 5px;
+    right: 5px;
+    background: #c60000;
+    color: white;
+    border: none;
+    padding: 5px 10px;
+    border-radius: 3px;
+    cursor: pointer;
+    font-size: 12px;
+}
+.gallery-item .delete-btn:hover {
+    background: #a80000;
+}
+.inline-form {
+    display: inline;
+}
+.empty-gallery {
+    grid-column: 1 / -1;
+    text-align: center;
+    padding: 40px;
+    color: #888;
+}
+.section-title {
+    color: var(--text-color);
+    margin-top: 40px;
+}
+.media-list {
+    display: flex;
+    flex-direction: column;
+    gap: 15px;
+}
+.media-item {
+    background: rgba(0,0,0,0.5);
+    padding: 15px;
+    border-radius: 8px;
+    border: 2px solid #00c6ff;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 10px;
+}
+.media-item-body {
+    flex: 1;
+    min-width: 200px;
+}
+.media-item.video .media-item-body {
+    min-width: 250px;
+}
+.media-title {
+    margin: 0 0 8px 0;
+    color: var(--text-color);
+    font-weight: bold;
+}
+.media-info {
+    margin: 0 0 8px 0;
+    color: #aaa;
+    font-size: 12px;
+}
+.media-item audio {
+    width: 100%;
+    max-width: 400px;
+}
+.media-item video {
+    width: 100%;
+    max-width: 500px;
+    border-radius: 5px;
+}
+"""
+
+PERSONAL_PAGE_JS = """
+// Saran username saat mengetik (debounce supaya tidak request per huruf)
+(function () {
+    const input = document.querySelector('.search-form input[name="username"]');
+    const list = document.getElementById('user-suggestions');
+    let timer = null;
+    let latest = 0;
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        if (!query) return list.replaceChildren();
+        timer = setTimeout(async function () {
+            const id = ++latest;
+            const res = await fetch('/api/users/autocomplete?' + new URLSearchParams({q: query}));
+            if (!res.ok || id !== latest) return;
+            const data = await res.json();
+            list.replaceChildren(...data.items.map(function (username) {
+                const option = document.createElement('option');
+                option.value = username;
+                return option;
+            }));
+        }, 200);
+    });
+})();
+"""
+
+PERSONAL_PAGE_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>{{ title }}</title>
+    <link rel="stylesheet" href="{{ asset_url("personal_page.css") }}">
+</head>
+<body style="--bg-color: {{ bg_color }}; --text-color: {{ text_color }};{% if background_image %} --background-image: url('/uploads/{{ background_image }}');{% endif %}"{% if background_image %} class="has-background"{% endif %}>
+    <div class="navbar">
+        <h2>🎨 Personal Page</h2>
+        <form method="get" action="/view-user" class="search-form">
+            <input type="text" name="username" placeholder="Cari user..." list="user-suggestions" autocomplete="off" required>
+            <datalist id="user-suggestions"></datalist>
+            <button type="submit">🔍 Cari</button>
+        </form>
+        <div class="navbar-buttons">
+            <a href="/edit-personal-page">✏️ Edit</a>
+            <a href="/home">🏠 Home</a>
+            <a href="/logout">Logout</a>
+        </div>
+    </div>
+    
+    <div class="container">
+        <div class="header">
+            <h1>{{ title }}</h1>
+            <p>{{ description }}</p>
+        </div>
+        
+        {% macro image_item(image) %}
+                    <div class="gallery-item">
+                        <img src="/uploads/{{ image.filename }}?w=640" data-bind-src="?w=640" srcset="{{ image_srcset(image.filename) }}" data-bind-srcset sizes="(max-width: 600px) 100vw, 400px" loading="lazy" alt="Image">
+                        {% if current_user == owner or is_admin %}
+                        <form method="post" class="inline-form" action="/delete-image">
+                            <input type="hidden" name="image" value="{{ image.filename }}" data-bind-value>
+                            <button type="submit" class="delete-btn">🗑️ Hapus</button>
+                        </form>
+                        {% endif %}
+                    </div>
+        {% endmacro %}
+        {% macro track_item(track) %}
+                <div class="media-item">
+                    <div class="media-item-body">
+                        <p class="media-title">🎵 <span data-bind-text="name">{{ track.filename.split('_')[-1] }}</span></p>
+                        <p class="media-info" data-bind-text="info">{{ media_info(track) }}</p>
+                        <audio controls preload="none">
+                            <source src="/uploads/{{ track.filename }}" data-bind-src="">
+                            Browser Anda tidak mendukung audio. <a href="/uploads/{{ track.filename }}" data-bind-href>Download lagu</a>
+                        </audio>
+                    </div>
+                    {% if current_user == owner or is_admin %}
+                    <form method="post" class="inline-form" action="/delete-image">
+                        <input type="hidden" name="image" value="{{ track.filename }}" data-bind-value>
+                        <button type="submit" class="delete-btn">🗑️ Hapus</button>
+                    </form>
+                    {% endif %}
+                </div>
+        {% endmacro %}
+        {% macro video_item(vid) %}
+                <div class="media-item video">
+                    <div class="media-item-body">
+                        <p class="media-title">🎬 <span data-bind-text="name">{{ vid.filename.split('_')[-1] }}</span></p>
+                        <p class="media-info" data-bind-text="info">{{ media_info(vid) }}</p>
+                        <video controls preload="none">
+                            <source src="/uploads/{{ vid.filename }}" data-bind-src="">
+                            Browser Anda tidak mendukung video. <a href="/uploads/{{ vid.filename }}" data-bind-href>Download video</a>
+                        </video>
+                    </div>
+                    {% if current_user == owner or is_admin %}
+                    <form method="post" class="inline-form" action="/delete-image">
+                        <input type="hidden" name="image" value="{{ vid.filename }}" data-bind-value>
+                        <button type="submit" class="delete-btn">🗑️ Hapus</button>
+                    </form>
+                    {% endif %}
+                </div>
+        {% endmacro %}
+        <div class="gallery">
+            {% if images %}
+                {% for image in images %}{{ image_item(image) }}{% endfor %}
+                {{ media_sentinel(owner, "images", images_cursor, "tpl-images") }}
+                <template id="tpl-images">{{ image_item(media_placeholder) }}</template>
+            {% else %}
+                <div class="empty-gallery">
+                    <p>Belum ada gambar. Klik Edit untuk menambahkan!</p>
+                </div>
+            {% endif %}
+        </div>
+
+        {% if audio %}
+        <h2 class="section-title">🎵 Lagu</h2>
+        <div class="media-list">
+            {% for track in audio %}{{ track_item(track) }}{% endfor %}
+            {{ media_sentinel(owner, "audio", audio_cursor, "tpl-audio") }}
+            <template id="tpl-audio">{{ track_item(media_placeholder) }}</template>
+        </div>
+        {% endif %}
+
+        {% if video %}
+        <h2 class="section-title">🎬 Video</h2>
+        <div class="media-list">
+            {% for vid in video %}{{ video_item(vid) }}{% endfor %}
+            {{ media_sentinel(owner, "video", video_cursor, "tpl-video") }}
+            <template id="tpl-video">{{ video_item(media_placeholder) }}</template>
+        </div>
+        {% endif %}
+    </div>
+    <script src="{{ asset_url("media_scroll.js") }}"></script>
+    <script src="{{ asset_url("personal_page.js") }}"></script>
+</body>
+</html>
+"""
+
+EDIT_PERSONAL_PAGE_CSS = """
+body {
+    margin: 0;
+    min-height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-color: #1a1a2e;
+    font-family: Arial, sans-serif;
+}
+.container {
+    background: rgba(0,0,0,0.85);
+    color: white;
+    padding: 30px;
+    width: 90%;
+    max-width: 600px;
+    margin: 20px auto;
+    border-radius: 10px;
+}
+.container h2 {
+    color: #00c6ff;
+    margin-top: 0;
+}
+.form-group {
+    margin-bottom: 20px;
+}
+.form-group label {
+    display: block;
+    margin-bottom: 5px;
+    font-weight: bold;
+    color: #00c6ff;
+}
+.form-group input,
+.form-group textarea {
+    width: 100%;
+    padding: 10px;
+    border: 2px solid #00c6ff;
+    border-radius: 5px;
+    background: rgba(0,0,0,0.5);
+    color: white;
+    font-family: Arial, sans-serif;
+    box-sizing: border-box;
+}
+.form-group textarea {
+    resize: vertical;
+    min-height: 80px;
+}
+.form-group input::placeholder,
+.form-group textarea::placeholder {
+    color: #888;
+}
+.upload-area {
+    border: 2px dashed #00c6ff;
+    padding: 20px;
+    border-radius: 5px;
+    text-align: center;
+    cursor: pointer;
+    background: rgba(0,0,0,0.3);
+    margin: 20px 0;
+}
+.upload-area:hover {
+    background: rgba(0,198,255,0.1);
+}
+.upload-area input[type="file"] {
+    display: none;
+}
+.color-preview {
+    display: inline-block;
+    width: 50px;
+    height: 50px;
+    border: 2px solid white;
+    border-radius: 5px;
+    margin-left: 10px;
+}
+.preview {
+    background: rgba(0,0,0,0.6);
+    padding: 20px;
+    border-radius: 5px;
+    margin-top: 20px;
+    border: 2px solid #00c6ff;
+}
+.preview h3 {
+    color: #00c6ff;
+}
+.preview-text {
+    padding: 10px;
+    border-radius: 5px;
+    margin: 10px 0;
+}
+.button-group {
+    display: flex;
+    gap: 10px;
+    margin-top: 20px;
+}
+.button-group button,
+.button-group a {
+    flex: 1;
+    padding: 12px;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 16px;
+    text-decoration: none;
+    text-align: center;
+}
+.button-group button {
+    background: #00c600;
+    color: white;
+}
+.button-group button:hover {
+    background: #00a800;
+}
+.button-group a {
+    background: #666;
+    color: white;
+}
+.button-group a:hover {
+    background: #888;
+}
+"""
+
+EDIT_PERSONAL_PAGE_JS = """
+const CHUNKED_UPLOAD_THRESHOLD = Number(document.currentScript.dataset.chunkedUploadThreshold);
+const CHUNK_SIZE = Number(document.currentScript.dataset.chunkSize);
+
+const CRC_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let n = 0; n < 256; n++) {
+        let c = n;
+        for (let k = 0; k < 8; k++) {
+            c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+        }
+        table[n] = c >>> 0;
+    }
+    return table;
+})();
+
+function crc32(bytes) {
+    let crc = 0xFFFFFFFF;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = CRC_TABLE[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+    }
+    return ((crc ^ 0xFFFFFFFF) >>> 0).toString(16).padStart(8, '0');
+}
+
+async function uploadChunked(file, onProgress) {
+    // upload_id disimpan per file supaya upload yang terputus bisa dilanjutkan
+    const key = 'upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+    let uploadId = localStorage.getItem(key);
+    let offset = 0;
+    if (uploadId) {
+        const res = await fetch('/upload-chunked/' + uploadId);
+        if (res.ok) {
+            offset = (await res.json()).offset;
+        } else {
+            uploadId = null;
+        }
+    }
+    if (!uploadId) {
+        const res = await fetch('/upload-chunked', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filename: file.name, size: file.size})
+        });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error);
+        uploadId = data.upload_id;
+        localStorage.setItem(key, uploadId);
+    }
+
+    let retries = 0;
+    while (offset < file.size) {
+        const chunk = new Uint8Array(await file.slice(offset, offset + CHUNK_SIZE).arrayBuffer());
+        let res;
+        try {
+            res = await fetch('/upload-chunked/' + uploadId + '?offset=' + offset, {
+                method: 'PUT',
+                headers: {'X-Chunk-CRC32': crc32(chunk)},
+                body: chunk
+            });
+        } catch (err) {
+            // Koneksi putus: tunggu sebentar lalu kirim ulang chunk yang sama
+            if (++retries > 5) throw err;
+            await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+            continue;
+        }
+        const data = await res.json();
+        if (res.status === 404) {
+            localStorage.removeItem(key);
+            throw new Error(data.error);
+        }
+        if (res.ok || res.status === 409 || (res.status === 400 && data.offset !== undefined)) {
+            // 409 = server punya offset lain, 400 = checksum salah; lanjut dari offset server
+            offset = data.offset;
+            if (!res.ok && ++retries > 5) throw new Error(data.error);
+            if (res.ok) retries = 0;
+            onProgress(offset / file.size);
+            continue;
+        }
+        throw new Error(data.error);
+    }
+
+    const res = await fetch('/upload-chunked/' + uploadId + '/finalize', {method: 'POST'});
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error);
+    localStorage.removeItem(key);
+    return data;
+}
+
+document.getElementById('title').addEventListener('input', updatePreview);
+document.getElementById('description').addEventListener('input', updatePreview);
+document.getElementById('bg_color').addEventListener('change', updatePreview);
+document.getElementById('text_color').addEventListener('change', updatePreview);
+
+function updatePreview() {
+    const title = document.getElementById('title').value;
+    const description = document.getElementById('description').value;
+    const bgColor = document.getElementById('bg_color').value;
+    const textColor = document.getElementById('text_color').value;
+    
+    const preview = document.getElementById('preview');
+    preview.style.backgroundColor = bgColor;
+    preview.style.color = textColor;
+    preview.innerHTML = '<strong>' + title + '</strong><br>' + description;
+    
+    document.getElementById('bg_preview').style.background = bgColor;
+    document.getElementById('text_preview').style.background = textColor;
+}
+
+document.getElementById('image_file').addEventListener('change', (e) => {
+    const file = e.target.files[0];
+    if (!file) return;
+    
+    const uploadArea = document.getElementById('uploadArea');
+    const uploadStatus = document.getElementById('uploadStatus');
+    
+    // Show loading
+    uploadArea.innerHTML = '⏳ Mengupload file...';
+    uploadArea.style.opacity = '0.5';
+    uploadStatus.innerHTML = '';
+    
+    // File besar dikirim bertahap supaya bisa dilanjutkan kalau koneksi putus
+    let upload;
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+        upload = uploadChunked(file, (fraction) => {
+            uploadArea.innerHTML = '⏳ Mengupload file... ' + Math.floor(fraction * 100) + '%';
+        });
+    } else {
+        // Create FormData
+        const formData = new FormData();
+        formData.append('image', file);
+        
+        // Upload via AJAX
+        upload = fetch('/upload-image-instant', {
+            method: 'POST',
+            body: formData
+        })
+        .then(response => response.json());
+    }
+    upload.then(data => {
+        if (data.success) {
+            uploadArea.innerHTML = '✅ ' + (data.message || 'File berhasil diupload!') + '<br><small>' + file.name + '</small>';
+            uploadArea.style.opacity = '1';
+            uploadStatus.innerHTML = '<div style="padding: 10px; background: rgba(0, 198, 0, 0.3); color: #00c600; border: 1px solid #00c600; border-radius: 5px; text-align: center;">✅ ' + data.message + '</div>';
+            // Reset file input
+            e.target.value = '';
+            setTimeout(() => {
+                uploadArea.innerHTML = '📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini';
+                uploadStatus.innerHTML = '';
+            }, 3000);
+        } else {
+            throw new Error(data.error);
+        }
+    })
+    .catch(error => {
+        uploadArea.innerHTML = '📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini';
+        uploadArea.style.opacity = '1';
+        uploadStatus.innerHTML = '<div style="padding: 10px; background: rgba(198, 0, 0, 0.3); color: #ff4444; border: 1px solid #ff4444; border-radius: 5px; text-align: center;">❌ Upload gagal: ' + error.message + '</div>';
+        e.target.value = '';
+    });
+});
+
+// Drag and drop
+const uploadArea = document.getElementById('uploadArea');
+uploadArea.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    uploadArea.style.background = 'rgba(0,198,255,0.2)';
+});
+uploadArea.addEventListener('dragleave', () => {
+    uploadArea.style.background = 'rgba(0,0,0,0.3)';
+});
+uploadArea.addEventListener('drop', (e) => {
+    e.preventDefault();
+    uploadArea.style.background = 'rgba(0,0,0,0.3)';
+    const files = e.dataTransfer.files;
+    if (files.length) {
+        document.getElementById('image_file').files = files;
+        // Trigger change event
+        const event = new Event('change', { bubbles: true });
+        document.getElementById('image_file').dispatchEvent(event);
+    }
+});
+"""
+
+EDIT_PERSONAL_PAGE_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Edit Personal Page</title>
+    <link rel="stylesheet" href="{{ asset_url("edit_personal_page.css") }}">
+</head>
+<body>
+    <div class="container">
+        <h2>✏️ Edit Personal Page</h2>
+        
+        <form method="post" enctype="multipart/form-data">
+            <div class="form-group">
+                <label for="title">Judul Halaman:</label>
+                <input type="text" name="title" id="title" value="{{ title }}" required>
+            </div>
+            
+            <div class="form-group">
+                <label for="description">Deskripsi:</label>
+                <textarea name="description" id="description" placeholder="Tulis deskripsi halaman Anda..." required>{{ description }}</textarea>
+            </div>
+            
+            <div class="form-group">
+                <label for="bg_color">Warna Background:</label>
+                <input type="color" name="bg_color" id="bg_color" value="{{ bg_color }}">
+                <span class="color-preview" id="bg_preview" style="background: {{ bg_color }};"></span>
+            </div>
+            
+            <div class="form-group">
+                <label for="text_color">Warna Text:</label>
+                <input type="color" name="text_color" id="text_color" value="{{ text_color }}">
+                <span class="color-preview" id="text_preview" style="background: {{ text_color }};"></span>
+            </div>
+            
+            <div class="form-group">
+                <label>Upload Gambar, Lagu, atau Video:</label>
+                <div class="upload-area" id="uploadArea" onclick="document.getElementById('image_file').click();">
+                    <p>📸/🎵/🎬 Klik untuk memilih file atau drag & drop di sini</p>
+                    <input type="file" id="image_file" name="image" accept="image/*,audio/*,video/*">
+                </div>
+                <div id="uploadStatus" style="margin-top: 10px;"></div>
+            </div>
+            
+            <div class="form-group">
+                <label>Atau Pilih dari Gallery:</label>
+                <a href="/image-gallery" style="display: inline-block; background: #00c6ff; color: black; padding: 10px 20px; border-radius: 5px; text-decoration: none; font-weight: bold;">🖼️ Buka Galeri</a>
+            </div>
+            
+            <div class="preview">
+                <h3>Preview:</h3>
+                <div class="preview-text" id="preview" style="background-color: {{ bg_color }}; color: {{ text_color }};">
+                    <strong>{{ title }}</strong><br>
+                    {{ description }}
+                </div>
+            </div>
+            
+            <div class="button-group">
+                <button type="submit">💾 Simpan Perubahan</button>
+                <a href="/personal-page">Batal</a>
+            </div>
+        </form>
+    </div>
+    
+    <script src="{{ asset_url("edit_personal_page.js") }}" data-chunked-upload-threshold="{{ chunked_upload_threshold }}" data-chunk-size="{{ chunk_size }}"></script>
+</body>
+</html>
+"""
+
+IMAGE_GALLERY_CSS = """
+body {
+    margin: 0;
+    min-height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    background-color: #1a1a2e;
+    font-family: Arial, sans-serif;
+}
+.navbar {
+    background: rgba(0,0,0,0.8);
+    padding: 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+.navbar h2 {
+    color: white;
+    margin: 0;
+}
+.navbar a {
+    color: white;
+    text-decoration: none;
+    background: #00c6ff;
+    padding: 10px 20px;
+    border-radius: 5px;
+}
+.navbar a:hover {
+    background: #00a8d4;
+}
+.container {
+    max-width: 1200px;
+    margin: 40px auto;
+    padding: 20px;
+}
+.container h2 {
+    color: white;
+    text-align: center;
+}
+.gallery {
+    display: grid;
+    grid-template-columns: repeat(auto-fill, minmax(250px, 1fr));
+    gap: 20px;
+}
+.gallery-item {
+    background: rgba(0,0,0,0.7);
+    border-radius: 8px;
+    overflow: hidden;
+    border: 2px solid #00c6ff;
+    cursor: pointer;
+    transition: 0.3s;
+    position: relative;
+}
+.gallery-item:hover {
+    border-color: #00ff00;
+    box-shadow: 0 0 10px rgba(0,255,0,0.3);
+}
+.gallery-item img {
+    width: 100%;
+    height: 250px;
+    object-fit: cover;
+    display: block;
+}
+.gallery-item-info {
+    padding: 10px;
+    color: white;
+    font-size: 12px;
+}
+.gallery-item-info p {
+    margin: 5px 0;
+}
+.set-bg-btn {
+    position: absolute;
+    bottom: 10px;
+    left: 10px;
+    right: 10px;
+    background: #00c600;
+    color: white;
+    border: none;
+    padding: 8px;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 12px;
+}
+.set-bg-btn:hover {
+    background: #00a800;
+}
+.no-images {
+    color: white;
+    text-align: center;
+    padding: 40px;
+    font-size: 18px;
+}
+.gallery-heading {
+    color: white;
+    grid-column: 1 / -1;
+}
+.gallery-actions {
+    display: flex;
+    gap: 8px;
+    width: 100%;
+    flex-wrap: wrap;
+}
+.gallery-actions form {
+    flex: 1;
+    min-width: 120px;
+}
+.gallery-actions .set-bg-btn {
+    width: 100%;
+}
+.file-item {
+    grid-column: 1 / -1;
+    background: rgba(0,0,0,0.7);
+    padding: 15px;
+    border: 2px solid #00c6ff;
+    border-radius: 8px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 10px;
+}
+.file-item-body {
+    flex: 1;
+    min-width: 200px;
+}
+.file-item.video .file-item-body {
+    min-width: 250px;
+}
+.file-title {
+    margin: 0 0 8px 0;
+    color: white;
+    font-weight: bold;
+}
+.file-meta {
+    margin: 5px 0;
+    color: #aaa;
+    font-size: 12px;
+}
+.file-actions {
+    display: flex;
+    gap: 8px;
+    flex-wrap: wrap;
+}
+.file-actions form {
+    display: inline;
+}
+.file-btn {
+    padding: 8px 12px;
+    background: #00c600;
+    color: white;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+    font-size: 12px;
+}
+.file-btn.delete {
+    background: #c60000;
+}
+"""
+
+IMAGE_GALLERY_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Image Gallery</title>
+    <link rel="stylesheet" href="{{ asset_url("image_gallery.css") }}">
+</head>
+<body>
+    <div class="navbar">
+        <h2>🖼️ Gallery (Images & Music)</h2>
+        <a href="/edit-personal-page">← Back</a>
+    </div>
+    
+    <div class="container">
+        <h2>Galeri Anda - Pilih Background atau Kelola File</h2>
+        {% macro image_item(image) %}
+                    <div class="gallery-item">
+                        <img src="/uploads/{{ image.filename }}?w=640" data-bind-src="?w=640" srcset="{{ image_srcset(image.filename) }}" data-bind-srcset sizes="(max-width: 600px) 100vw, 400px" loading="lazy" alt="Image">
+                        <div class="gallery-item-info">
+                            <p>Uploaded by you</p>
+                            <p data-bind-text="info">{{ media_info(image) }}</p>
+                            <p>Visibility: <strong data-bind-text="visibility">{{ image.visibility }}</strong></p>
+                        </div>
+                        <div class="gallery-actions">
+                            <form method="post" action="/set-background">
+                                <input type="hidden" name="image" value="{{ image.filename }}" data-bind-value>
+                                <button type="submit" class="set-bg-btn">🎨 Background</button>
+                            </form>
+                            <form method="post" action="/toggle-visibility">
+                                <input type="hidden" name="image" value="{{ image.filename }}" data-bind-value>
+                                <button type="submit" class="set-bg-btn">🔁 Visibility</button>
+                            </form>
+                        </div>
+                    </div>
+        {% endmacro %}
+        {% macro file_item(item, icon, kind) %}
+                    <div class="file-item {{ kind }}">
+                        <div class="file-item-body">
+                            <p class="file-title">{{ icon }} <span data-bind-text="name">{{ item.filename.split('_')[-1] }}</span></p>
+                            <p class="file-meta" data-bind-text="info">{{ media_info(item) }}</p>
+                            <p class="file-meta">Visibility: <strong data-bind-text="visibility">{{ item.visibility }}</strong></p>
+                        </div>
+                        <div class="file-actions">
+                            <form method="post" action="/toggle-visibility">
+                                <input type="hidden" name="image" value="{{ item.filename }}" data-bind-value>
+                                <button type="submit" class="file-btn">🔁 Toggle</button>
+                            </form>
+                            <form method="post" action="/delete-image">
+                                <input type="hidden" name="image" value="{{ item.filename }}" data-bind-value>
+                                <button type="submit" class="file-btn delete">🗑️ Delete</button>
+                            </form>
+                        </div>
+                    </div>
+        {% endmacro %}
+        <div class="gallery">
+            {% if images %}
+                <h3 class="gallery-heading">📸 Gambar</h3>
+                {% for image in images %}{{ image_item(image) }}{% endfor %}
+                {{ media_sentinel(owner, "images", images_cursor, "tpl-images") }}
+                <template id="tpl-images">{{ image_item(media_placeholder) }}</template>
+            {% endif %}
+            
+            {% if audio %}
+                <h3 class="gallery-heading">🎵 Lagu</h3>
+                {% for track in audio %}{{ file_item(track, "🎵", "audio") }}{% endfor %}
+                {{ media_sentinel(owner, "audio", audio_cursor, "tpl-audio") }}
+                <template id="tpl-audio">{{ file_item(media_placeholder, "🎵", "audio") }}</template>
+            {% endif %}
+
+            {% if video %}
+                <h3 class="gallery-heading">🎬 Video</h3>
+                {% for vid in video %}{{ file_item(vid, "🎬", "video") }}{% endfor %}
+                {{ media_sentinel(owner, "video", video_cursor, "tpl-video") }}
+                <template id="tpl-video">{{ file_item(media_placeholder, "🎬", "video") }}</template>
+            {% endif %}
+            
+            {% if not images and not audio and not video %}
+                <div class="no-images">Belum ada file di galeri</div>
+            {% endif %}
+        </div>
+    </div>
+    <script src="{{ asset_url("media_scroll.js") }}"></script>
+</body>
+</html>
+"""
+
+REGISTER_SUCCESS_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    font-family: Arial, sans-serif;
+}
+.box {
+    background: rgba(0,0,0,0.65);
+    color: white;
+    padding: 30px;
+    width: 320px;
+    margin: auto;
+    margin-top: 15%;
+    border-radius: 10px;
+    text-align: center;
+}
+a {
+    display: inline-block;
+    background: #00c6ff;
+    color: black;
+    padding: 10px 20px;
+    margin-top: 20px;
+    text-decoration: none;
+    border-radius: 5px;
+}
+"""
+
+REGISTER_SUCCESS_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Registrasi Berhasil</title>
+    <link rel="stylesheet" href="{{ asset_url("register_success.css") }}">
+</head>
+<body>
+    <div class="box">
+        <h2>✓ Registrasi Berhasil!</h2>
+        <p>Akun Anda telah terdaftar dan menunggu persetujuan admin.</p>
+        <p>Silakan tunggu hingga admin menyetujui akun Anda.</p>
+        <a href="/login">Kembali ke Login</a>
+    </div>
+</body>
+</html>
+"""
+
+USER_NOT_FOUND_CSS = """
+body {
+    margin: 0;
+    height: 100vh;
+    background: url('/static/bg.png');
+    background-size: cover;
+    font-family: Arial, sans-serif;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.box {
+    background: rgba(0,0,0,0.85);
+    color: white;
+    padding: 40px;
+    width: 400px;
+    border-radius: 10px;
+    text-align: center;
+    border: 2px solid #c60000;
+}
+.box h2 {
+    color: #ff4444;
+    margin-top: 0;
+}
+.box p {
+    font-size: 16px;
+    margin: 15px 0;
+}
+a {
+    display: inline-block;
+    background: #00c6ff;
+    color: black;
+    padding: 10px 20px;
+    text-decoration: none;
+    border-radius: 5px;
+    margin-top: 20px;
+}
+a:hover {
+    background: #00a8d4;
+}
+"""
+
+USER_NOT_FOUND_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>User Tidak Ditemukan</title>
+    <link rel="stylesheet" href="{{ asset_url("user_not_found.css") }}">
+</head>
+<body>
+    <div class="box">
+        <h2>❌ User Tidak Ditemukan</h2>
+        <p>Username '<strong>{{ search_username }}</strong>' tidak ditemukan.</p>
+        <a href="/personal-page">← Kembali</a>
+    </div>
+</body>
+</html>
+"""
+
+# Script infinite scroll bersama untuk personal page dan galeri: saat penanda
+# .media-more terlihat, halaman berikutnya diambil dari /api/media lalu setiap
+# item dibuat dari <template> yang di-render server (markup tetap satu sumber).
+MEDIA_SCROLL_JS = """
+(function () {
+    function bind(node, item) {
+        node.querySelectorAll('[data-bind-src]').forEach(function (el) { el.src = item.url + el.dataset.bindSrc; });
+        node.querySelectorAll('[data-bind-srcset]').forEach(function (el) { el.srcset = item.srcset || ''; });
+        node.querySelectorAll('[data-bind-href]').forEach(function (el) { el.href = item.url; });
+        node.querySelectorAll('[data-bind-value]').forEach(function (el) { el.value = item.filename; });
+        node.querySelectorAll('[data-bind-text]').forEach(function (el) { el.textContent = item[el.dataset.bindText]; });
+        return node;
+    }
+
+    async function loadMore(sentinel, observer) {
+        if (sentinel.dataset.loading || !sentinel.dataset.cursor) return;
+        sentinel.dataset.loading = '1';
+        try {
+            const params = new URLSearchParams({user: sentinel.dataset.owner, kind: sentinel.dataset.kind,
+                                                cursor: sentinel.dataset.cursor});
+            const res = await fetch('/api/media?' + params);
+            if (!res.ok) return;
+            const page = await res.json();
+            const template = document.getElementById(sentinel.dataset.template);
+            page.items.forEach(function (item) {
+                const node = template.content.firstElementChild.cloneNode(true);
+                sentinel.parentNode.insertBefore(bind(node, item), sentinel);
+            });
+            sentinel.dataset.cursor = page.next_cursor || '';
+            if (!page.next_cursor) observer.unobserve(sentinel);
+        } finally {
+            delete sentinel.dataset.loading;
+        }
+    }
+
+    const sentinels = document.querySelectorAll('.media-more');
+    if (!sentinels.length || !('IntersectionObserver' in window)) return;
+    const observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) loadMore(entry.target, observer);
+        });
+    }, {rootMargin: '800px'});
+    sentinels.forEach(function (sentinel) { observer.observe(sentinel); });
+})();
+"""
+
+# Semua template didaftarkan sekali di loader Jinja dan dikompilasi saat start,
+# jadi route cukup memanggil render_template dengan nama template + context.
+TEMPLATES = {
+    "register.html": REGISTER_HTML,
+    "register_success.html": REGISTER_SUCCESS_HTML,
+    "admin_panel.html": ADMIN_PANEL_HTML,
+    "login.html": HTML,
+    "home.html": HOME_HTML,
+    "edit_profile.html": EDIT_PROFILE_HTML,
+    "public.html": PUBLIC_HTML,
+    "personal_page.html": PERSONAL_PAGE_HTML,
+    "edit_personal_page.html": EDIT_PERSONAL_PAGE_HTML,
+    "image_gallery.html": IMAGE_GALLERY_HTML,
+    "user_not_found.html": USER_NOT_FOUND_HTML
+}
+TEMPLATE_CACHE_FOLDER = os.path.join(DATA_DIR, "template_cache")
+os.makedirs(TEMPLATE_CACHE_FOLDER, exist_ok=True)
+
+app.jinja_loader = DictLoader(TEMPLATES)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_FOLDER)
+for template_name in TEMPLATES:
+    app.jinja_env.get_template(template_name)
+
+# CSS/JS halaman dilayani terpisah dari HTML lewat URL yang memuat hash isinya
+# (/assets/<nama>.<hash>.<ext>), jadi browser boleh menyimpannya selamanya:
+# begitu isinya berubah, hash dan URL di template ikut berubah.
+ASSETS = {
+    "register.css": REGISTER_CSS,
+    "admin_panel.css": ADMIN_PANEL_CSS,
+    "admin_panel.js": ADMIN_PANEL_JS,
+    "login.css": LOGIN_CSS,
+    "home.css": HOME_CSS,
+    "edit_profile.css": EDIT_PROFILE_CSS,
+    "edit_profile.js": EDIT_PROFILE_JS,
+    "public.css": PUBLIC_CSS,
+    "personal_page.css": PERSONAL_PAGE_CSS,
+    "personal_page.js": PERSONAL_PAGE_JS,
+    "edit_personal_page.css": EDIT_PERSONAL_PAGE_CSS,
+    "edit_personal_page.js": EDIT_PERSONAL_PAGE_JS,
+    "image_gallery.css": IMAGE_GALLERY_CSS,
+    "register_success.css": REGISTER_SUCCESS_CSS,
+    "user_not_found.css": USER_NOT_FOUND_CSS,
+    "media_scroll.js": MEDIA_SCROLL_JS
+}
+ASSET_MIMETYPES = {".css": "text/css", ".js": "text/javascript"}
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# nama logis -> URL ber-hash, dan nama file ber-hash -> (isi, hash, mimetype)
+ASSET_URLS = {}
+ASSET_FILES = {}
+
+def build_assets():
+    """Hitung hash setiap aset sekali saat start (isi sama -> URL sama di semua worker)"""
+    for name, source in ASSETS.items():
+        body = source.lstrip("\n").encode()
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{digest}{ext}"
+        ASSET_URLS[name] = f"/assets/{filename}"
+        ASSET_FILES[filename] = (body, digest, ASSET_MIMETYPES[ext])
+
+build_assets()
+
+@app.template_global()
+def asset_url(name):
+    """URL ber-hash untuk aset, dipakai di <link>/<script> template"""
+    return ASSET_URLS[name]
+
+@app.route("/assets/<filename>")
+def asset(filename):
+    entry = ASSET_FILES.get(filename)
+    if entry is None:
+        return "Not found", 404
+    body, digest, mimetype = entry
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(digest)
+    response.headers["Cache-Control"] = ASSET_CACHE_CONTROL
+    return response.make_conditional(request)
+
+@app.route("/public")
+def public():
+    return cached_page(None, "other", lambda: render_template("public.html"))
+
+# Turunan gambar hasil resize (?w=...) disimpan di disk dengan batas ukuran total
+DERIVATIVE_FOLDER = os.path.join(DATA_DIR, "derivatives")
+os.makedirs(DERIVATIVE_FOLDER, exist_ok=True)
+DERIVATIVE_CACHE_BYTES = int(os.getenv("DERIVATIVE_CACHE_BYTES", str(256 * 1024 * 1024)))
+RESIZE_WORKERS = int(os.getenv("RESIZE_WORKERS", "2"))
+# Lebar diminta dibulatkan ke atas ke salah satu ukuran ini supaya cache tidak meledak
+RESIZE_WIDTHS = (160, 320, 640, 960, 1280)
+RESIZE_DEFAULT_QUALITY = 80
+# Jumlah "tidak ada turunan" (GIF, gambar rusak) yang diingat supaya tidak dibuka ulang tiap request
+DERIVATIVE_MISS_LIMIT = 4096
+
+_resize_pool = None
+_resize_inflight = {}
+_derivative_lock = threading.RLock()
+_derivative_sizes = None
+_derivative_misses = OrderedDict()
+
+def _image_pool():
+    """Process pool bersama untuk resize dan re-encode (dibuat saat pertama dipakai).
+
+    Worker dibuat lewat forkserver, bukan fork dari proses ini yang sudah punya
+    thread (log, persister, metadata); fungsi worker ada di imaging.py.
+    """
+    global _resize_pool
+    with _derivative_lock:
+        if _resize_pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["imaging"])
+            else:
+                # Windows: tidak ada forkserver
+                context = multiprocessing.get_context("spawn")
+            _resize_pool = ProcessPoolExecutor(max_workers=RESIZE_WORKERS, mp_context=context)
+        return _resize_pool
+
+def _derivative_index():
+    """Daftar LRU file turunan (path -> ukuran), dibangun dari disk saat pertama dipakai"""
+    global _derivative_sizes
+    if _derivative_sizes is None:
+        entries = []
+        for name in os.listdir(DERIVATIVE_FOLDER):
+            path = os.path.join(DERIVATIVE_FOLDER, name)
+            if name.endswith(".tmp"):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, path, stat.st_size))
+        _derivative_sizes = OrderedDict((path, size) for _, path, size in sorted(entries))
+    return _derivative_sizes
+
+def _remember_derivative(path, size):
+    """Catat file turunan baru lalu buang yang paling lama tidak dipakai kalau melebihi budget"""
+    with _derivative_lock:
+        sizes = _derivative_index()
+        sizes[path] = size
+        sizes.move_to_end(path)
+        total = sum(sizes.values())
+        while total > DERIVATIVE_CACHE_BYTES and len(sizes) > 1:
+            old_path, old_size = sizes.popitem(last=False)
+            total -= old_size
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+def get_image_derivative(source, width, quality, mimetype=None, out_format=None):
+    """Return (path, mimetype) versi kecil dari gambar, atau None kalau harus kirim asli.
+
+    mimetype = tipe file asli (blob tidak punya ekstensi untuk ditebak).
+    out_format = "webp"/"avif" untuk menyimpan turunan dalam format itu.
+    """
+    if Image is None:
+        return None
+    mimetype = mimetype or mimetypes.guess_type(source)[0]
+    # GIF dan format gambar lain yang tidak di-resize: tidak perlu dikirim ke worker
+    if mimetype and mimetype.startswith("image/") and mimetype not in imaging.RESIZE_FORMATS.values():
+        return None
+    width = next((w for w in RESIZE_WIDTHS if w >= width), RESIZE_WIDTHS[-1])
+    stat = os.stat(source)
+    key = hashlib.sha1(f"{source}:{stat.st_mtime_ns}:{stat.st_size}:{width}:{quality}:{out_format}".encode()).hexdigest()
+    path = os.path.join(DERIVATIVE_FOLDER, key)
+    if out_format:
+        mimetype = REENCODE_FORMATS[out_format][1]
+
+    with _derivative_lock:
+        sizes = _derivative_index()
+        if path in sizes:
+            # Index per proses: dengan MULTI_WORKER proses lain bisa sudah membuang file ini
+            if os.path.exists(path):
+                sizes.move_to_end(path)
+                return path, mimetype
+            del sizes[path]
+        # Key memuat mtime dan ukuran: file yang berubah dicoba lagi
+        if key in _derivative_misses:
+            _derivative_misses.move_to_end(key)
+            return None
+        # Single-flight: request lain untuk turunan yang sama menunggu hasil yang sama
+        future = _resize_inflight.get(key)
+        if future is None:
+            future = _image_pool().submit(imaging.resize_image, source, path, width, quality,
+                                          out_format and REENCODE_FORMATS[out_format][0], AVIF_SPEED)
+            _resize_inflight[key] = future
+            owner = True
+        else:
+            owner = False
+    try:
+        result = future.result()
+        declined = result is None
+    except Exception as e:
+        media_log.error("gagal resize %s: %s", source, e, extra={"fields": {"width": width}})
+        result = None
+        # Pool rusak bukan salah file: request berikutnya boleh mencoba lagi
+        declined = not isinstance(e, BrokenProcessPool)
+    finally:
+        if owner:
+            with _derivative_lock:
+                _resize_inflight.pop(key, None)
+    if result is None:
+        if owner and declined:
+            with _derivative_lock:
+                _derivative_misses[key] = True
+                if len(_derivative_misses) > DERIVATIVE_MISS_LIMIT:
+                    _derivative_misses.popitem(last=False)
+        return None
+    if owner:
+        _remember_derivative(path, result[0])
+    return path, result[1]
+
+# Re-encode gambar setelah upload (opsional), mis. IMAGE_REENCODE_FORMATS="avif,webp".
+# Hasil disimpan di samping blob (blobs/ab/<sha>.webp) tanpa EXIF, orientasi
+# sudah diterapkan, dan hanya kalau lebih kecil dari aslinya. /uploads memilih
+# format terbaik yang disebut di header Accept (Vary: Accept); versi ?w= juga.
+REENCODE_FORMATS = {"avif": ("AVIF", "image/avif"), "webp": ("WEBP", "image/webp")}
+REENCODE_QUALITY = {"avif": int(os.getenv("AVIF_QUALITY", "60")), "webp": int(os.getenv("WEBP_QUALITY", "80"))}
+# 0 (paling kecil, sangat lambat) .. 10; 8 ~9x lebih cepat dari default encoder dengan ukuran hampir sama
+AVIF_SPEED = int(os.getenv("AVIF_SPEED", "8"))
+# Urutan preferensi tetap avif -> webp (lebih kecil dulu), format yang tidak didukung Pillow dilewati
+IMAGE_REENCODE_FORMATS = [
+    fmt for fmt in REENCODE_FORMATS
+    if fmt in os.getenv("IMAGE_REENCODE_FORMATS", "").lower().replace(" ", "").split(",")
+    and Image is not None and features.check(fmt)
+]
+
+def variant_path(sha256, fmt):
+    return f"{blob_path(sha256)}.{fmt}"
+
+def _store_variants(filename):
+    """Job post-upload: buat versi AVIF/WebP dari gambar baru lalu catat di record["variants"]"""
+    try:
+        entry = MEDIA_INDEX.get(filename)
+        sha256 = entry and entry[1] == "image" and _blob_sha(entry[2])
+        if not sha256:
+            return
+        source = blob_path(sha256)
+        original_size = os.path.getsize(source)
+        jobs = {}
+        for fmt in IMAGE_REENCODE_FORMATS:
+            target = variant_path(sha256, fmt)
+            # Isi sama yang diupload ulang: hasil encode sebelumnya dipakai lagi
+            if not os.path.exists(target):
+                jobs[fmt] = _image_pool().submit(imaging.encode_image, source, target, REENCODE_FORMATS[fmt][0],
+                                                 REENCODE_QUALITY[fmt], AVIF_SPEED)
+        variants = {}
+        for fmt in IMAGE_REENCODE_FORMATS:
+            target = variant_path(sha256, fmt)
+            size = jobs[fmt].result() if fmt in jobs else os.path.getsize(target)
+            if size is None:
+                continue
+            if size < original_size:
+                variants[fmt] = size
+            else:
+                os.remove(target)
+        with state_transaction(), _blob_lock:
+            entry = MEDIA_INDEX.get(filename)
+            if entry and isinstance(entry[2], dict):
+                entry[2]["variants"] = variants
+                save_personal_pages(entry[0], [filename])
+            elif not BLOB_REFS.get(sha256):
+                # Media dihapus selama encode: jangan tinggalkan file yatim
+                remove_variants(sha256)
+    except Exception as e:
+        media_log.error("gagal re-encode %s: %s", filename, e)
+
+def remove_variants(sha256):
+    for fmt in REENCODE_FORMATS:
+        try:
+            os.remove(variant_path(sha256, fmt))
+        except FileNotFoundError:
+            pass
+
+def accepted_image_formats(available):
+    """Format re-encode (urut preferensi) yang tersedia dan disebut eksplisit di header Accept.
+
+    "*/*" atau "image/*" tidak dihitung: browser lama juga mengirimnya.
+    """
+    accepted = {value for value, q in request.accept_mimetypes if q > 0}
+    return [fmt for fmt in IMAGE_REENCODE_FORMATS if fmt in available and REENCODE_FORMATS[fmt][1] in accepted]
+
+@app.template_global()
+def image_srcset(filename):
+    """Nilai atribut srcset untuk <img> dari file upload"""
+    return ", ".join(f"/uploads/{filename}?w={w} {w}w" for w in RESIZE_WIDTHS[1:4])
+
+# Galeri dan personal page hanya me-render halaman pertama; sisanya diambil
+# lewat /api/media saat di-scroll.
+MEDIA_PAGE_SIZE = int(os.getenv("MEDIA_PAGE_SIZE", "24"))
+MEDIA_PAGE_MAX = 100
+
+def media_page(items, cursor=None, limit=MEDIA_PAGE_SIZE):
+    """Potong daftar media mulai setelah cursor, return (items, cursor berikutnya atau None).
+
+    Cursor = "posisi:filename" item terakhir yang sudah dikirim. Kalau daftar
+    berubah di depan cursor (ada yang dihapus), posisi dicari ulang lewat filename.
+    """
+    start = 0
+    if cursor:
+        position, _, filename = cursor.partition(":")
+        start = min(int(position), len(items)) if position.isdigit() else 0
+        if not (start and media_filename(items[start - 1]) == filename):
+            start = next((i + 1 for i, item in enumerate(items) if media_filename(item) == filename), start)
+    page = items[start:start + limit]
+    end = start + len(page)
+    next_cursor = f"{end}:{media_filename(items[end - 1])}" if end < len(items) else None
+    return page, next_cursor
+
+def first_media_pages(view):
+    """Context template: halaman pertama setiap jenis media + cursor lanjutannya"""
+    context = {}
+    for kind in MEDIA_KINDS:
+        context[kind], context[f"{kind}_cursor"] = media_page(view.get(kind, []))
+    return context
+
+@app.template_global()
+def media_sentinel(owner, kind, cursor, template_id):
+    """Penanda akhir daftar yang memicu infinite scroll (kosong kalau sudah habis)"""
+    if not cursor:
+        return ""
+    return Markup('<div class="media-more" style="grid-column: 1 / -1; height: 1px;" '
+                  'data-owner="{}" data-kind="{}" data-cursor="{}" data-template="{}"></div>'
+                  ).format(owner, kind, cursor, template_id)
+
+# Item kosong untuk <template> yang diisi JS dari hasil /api/media
+app.jinja_env.globals["media_placeholder"] = {"filename": "", "visibility": ""}
+
+# Ukuran potongan saat range dikirim tanpa wsgi.file_wrapper
+RANGE_CHUNK_SIZE = 256 * 1024
+
+def _read_file_range(path, start, length):
+    """Generator yang membaca byte [start, start + length) per potongan"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _satisfiable_ranges(range_header, size):
+    """Ubah header Range menjadi daftar (start, stop) yang sudah diurutkan dan digabung.
+
+    Return None kalau header tidak valid (diabaikan, kirim file utuh) dan []
+    kalau tidak ada range yang bisa dipenuhi (416).
+    """
+    parsed = parse_range_header(range_header)
+    if parsed is None or parsed.units != "bytes":
+        return None
+    ranges = []
+    for begin, end in parsed.ranges:
+        if begin < 0:
+            # Suffix range "bytes=-N": N byte terakhir
+            start, stop = max(0, size + begin), size
+        else:
+            start, stop = begin, size if end is None else min(end, size)
+        if start < stop:
+            ranges.append((start, stop))
+    # Range yang tumpang tindih/berdempetan digabung supaya byte tidak dikirim dua kali
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+def _range_response(path, size, mimetype, ranges):
+    """Response 206 untuk range yang sudah divalidasi (single atau multipart/byteranges).
+
+    Range yang sampai akhir file (pola seek pada <audio>/<video>) dikirim lewat
+    wsgi.file_wrapper, yang memakai os.sendfile kalau server mendukung
+    (mis. gunicorn). Range lain dikirim per potongan.
+    """
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        if stop == size:
+            f = open(path, 'rb')
+            f.seek(start)
+            body = wrap_file(request.environ, f, RANGE_CHUNK_SIZE)
+        else:
+            body = _read_file_range(path, start, stop - start)
+        response = app.response_class(body, status=206, mimetype=mimetype, direct_passthrough=True)
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        response.headers["Content-Length"] = str(stop - start)
+        return response
+
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (f"--{boundary}\r\nContent-Type: {mimetype}\r\n"
+         f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n").encode()
+        for start, stop in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+    content_length = (sum(len(h) for h in part_headers) + sum(stop - start for start, stop in ranges)
+                      + 2 * (len(ranges) - 1) + len(closing))
+
+    def generate():
+        for i, (start, stop) in enumerate(ranges):
+            if i:
+                yield b"\r\n"
+            yield part_headers[i]
+            yield from _read_file_range(path, start, stop - start)
+        yield closing
+
+    response = app.response_class(generate(), status=206, direct_passthrough=True,
+                                  content_type=f"multipart/byteranges; boundary={boundary}")
+    response.headers["Content-Length"] = str(content_length)
+    return response
+
+# Upload di blob store punya nama unik (new_media_filename) dan isi yang
+# dialamatkan sha256, jadi satu URL selalu berisi byte yang sama:
+# - pemilik/admin boleh menyimpan file itu selamanya (immutable);
+# - file lama di UPLOAD_FOLDER bisa saja ditimpa upload lain dengan nama sama
+#   (skema nama lama), jadi hanya boleh dipakai setelah revalidasi ETag;
+# - user lain yang melihat karena file "public" hanya boleh menyimpan sebentar,
+#   karena pemilik bisa mengubahnya kembali menjadi private kapan saja.
+# Selalu "private": /uploads butuh login, jadi shared cache tidak boleh menyimpannya.
+MEDIA_CACHE_CONTROL_OWNER = "private, max-age=31536000, immutable"
+MEDIA_CACHE_CONTROL_REVALIDATE = "private, no-cache"
+MEDIA_CACHE_CONTROL_SHARED = f"private, max-age={int(os.getenv('MEDIA_SHARED_MAX_AGE', '300'))}"
+# hits = dijawab 304 (browser memakai cache), misses = isi file dikirim
+MEDIA_CACHE_STATS = {"hits": 0, "misses": 0}
+
+def send_upload(path, mimetype, cache_control, etag=None):
+    """Kirim file upload dengan ETag/Last-Modified, 304, Range (206/416) dan Cache-Control"""
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = etag or f"{size:x}-{stat.st_mtime_ns:x}"
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+
+    def finish(response):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Accept-Ranges"] = "bytes"
+        return response
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        MEDIA_CACHE_STATS["hits"] += 1
+        return finish(app.response_class(status=304))
+    MEDIA_CACHE_STATS["misses"] += 1
+
+    range_header = request.headers.get("Range")
+    if range_header:
+        # If-Range: range hanya dipakai kalau versi di browser masih sama
+        if_range = parse_if_range_header(request.headers.get("If-Range"))
+        if if_range.etag is not None:
+            use_range = if_range.etag == etag
+        elif if_range.date is not None:
+            use_range = if_range.date == last_modified
+        else:
+            use_range = True
+        # Header Range tidak valid diabaikan (RFC 9110), kirim file utuh
+        ranges = _satisfiable_ranges(range_header, size) if use_range else None
+        if ranges == []:
+            response = app.response_class(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return finish(response)
+        if ranges:
+            return finish(_range_response(path, size, mimetype, ranges))
+
+    body = wrap_file(request.environ, open(path, 'rb'), RANGE_CHUNK_SIZE)
+    response = app.response_class(body, mimetype=mimetype, direct_passthrough=True)
+    response.headers["Content-Length"] = str(size)
+    return finish(response)
+
+def count_served(response):
+    """Catat byte isi file yang dikirim (304/416 tidak punya isi)"""
+    METRICS.inc("media_served_bytes_total", response.content_length or 0)
+    return response
+
+@app.route('/uploads/<filename>')
+def uploaded_file(filename):
+    """Serve uploaded files but allow owner, admin, or if image/audio is public."""
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+
+    entry = MEDIA_INDEX.get(filename)
+    if not entry:
+        return "Not found", 404
+    owner, file_type, record = entry
+    visibility = record.get("visibility", "private") if isinstance(record, dict) else "private"
+
+    # Allow if requester is owner, or file is public, or requester is admin
+    is_privileged = user == owner or USERS.get(user, {}).get("role") == "admin"
+    if is_privileged or visibility == "public":
+        file_path = media_path(record)
+        if not os.path.isfile(file_path):
+            return "Not found", 404
+        if not is_privileged:
+            cache_control = MEDIA_CACHE_CONTROL_SHARED
+        elif _blob_sha(record):
+            cache_control = MEDIA_CACHE_CONTROL_OWNER
+        else:
+            cache_control = MEDIA_CACHE_CONTROL_REVALIDATE
+
+        # For audio/video files, set correct MIME type
+        if file_type == "audio":
+            mime_type = get_audio_mime_type(filename)
+        elif file_type == "video":
+            mime_type = get_video_mime_type(filename)
+        else:
+            mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        etag = record.get("sha256") if isinstance(record, dict) else None
+        response = None
+        # Versi kecil gambar untuk thumbnail/srcset: /uploads/<file>?w=320&q=75
+        if file_type == "image" and request.args.get("w", "").isdigit():
+            out_format = next(iter(accepted_image_formats(IMAGE_REENCODE_FORMATS)), None)
+            quality = request.args.get("q", "")
+            if quality.isdigit():
+                quality = min(95, max(30, int(quality)))
+            else:
+                # Skala quality AVIF/WebP berbeda dengan JPEG, pakai default per format
+                quality = REENCODE_QUALITY[out_format] if out_format else RESIZE_DEFAULT_QUALITY
+            derivative = get_image_derivative(file_path, int(request.args["w"]), quality, mime_type, out_format)
+            if derivative:
+                try:
+                    response = send_upload(derivative[0], derivative[1], cache_control)
+                except FileNotFoundError:
+                    # Dibuang proses lain tepat setelah dicek: kirim file asli
+                    response = None
+        elif file_type == "image" and etag and record.get("variants"):
+            # Versi AVIF/WebP hasil re-encode saat upload
+            fmt = next(iter(accepted_image_formats(record["variants"])), None)
+            if fmt:
+                response = send_upload(variant_path(etag, fmt), REENCODE_FORMATS[fmt][1], cache_control,
+                                       f"{etag}.{fmt}")
+        if response is None:
+            response = send_upload(file_path, mime_type, cache_control, etag)
+        if file_type == "image" and IMAGE_REENCODE_FORMATS:
+            response.vary.add("Accept")
+        return count_served(response)
+
+    return "Forbidden", 403
+
+@app.route('/upload-image-instant', methods=['POST'])
+def upload_image_instant():
+    """Handle instant image or audio upload via AJAX"""
+    user = session.get("user")
+    if not user:
+        return {"error": "Not authenticated"}, 401
+    
+    # Body multipart di-parse langsung dari stream (tanpa request.files) supaya
+    # isi file hanya ditulis sekali, langsung ke folder tujuan
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
+        return {"error": "No file provided"}, 400
+    events = _multipart_events(request.stream, boundary.encode())
+    try:
+        for event in events:
+            if isinstance(event, File) and event.name == "image":
+                break
+        else:
+            return {"error": "No file provided"}, 400
+        if event.filename == '' or not allowed_file(event.filename):
+            return {"error": "Invalid file"}, 400
+        return register_upload(user, event.filename, lambda path: _write_file_part(events, path))
+    except ValueError:
+        return {"error": "Upload incomplete"}, 400
+
+UPLOAD_READ_SIZE = 256 * 1024
+
+def _multipart_events(stream, boundary):
+    """Event MultipartDecoder dari stream, dibaca per UPLOAD_READ_SIZE"""
+    decoder = MultipartDecoder(boundary)
+    while True:
+        chunk = stream.read(UPLOAD_READ_SIZE)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, NeedData):
+            yield event
+            if isinstance(event, Epilogue):
+                return
+            event = decoder.next_event()
+        if not chunk:
+            raise ValueError("multipart body terpotong")
+
+def _write_file_part(events, path):
+    """Tulis isi part file ke path sambil menghitung sha256 dan ukuran (satu kali baca)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as f:
+        for event in events:
+            if not isinstance(event, Data):
+                break
+            f.write(event.data)
+            digest.update(event.data)
+            size += len(event.data)
+            if not event.more_data:
+                return {"sha256": digest.hexdigest(), "size": size}
+    raise ValueError("part file terpotong")
+
+UPLOAD_MESSAGES = {
+    "audio": "Lagu berhasil diupload!",
+    "video": "Video berhasil diupload!",
+    "image": "Gambar berhasil diupload!"
+}
+
+def register_upload(user, original_name, save):
+    """Simpan file lewat save(path) lalu daftarkan ke personal page user.
+
+    save() boleh mengembalikan dict field tambahan untuk record (sha256, size).
+
+    Dipakai bersama oleh upload biasa dan finalize upload bertahap. File
+    ditulis ke nama sementara dulu supaya state lock hanya dipegang selama
+    rename + update halaman, bukan selama menulis isi file. Kalau sha256
+    diketahui, file masuk ke blob store (isi yang sama disimpan sekali).
+    """
+    file_type = get_file_type(original_name)
+    kind = {"audio": "audio", "video": "video"}.get(file_type, "images")
+    incoming_path = os.path.join(app.config['UPLOAD_FOLDER'], f".incoming-{secrets.token_hex(8)}")
+    started = time.perf_counter()
+    try:
+        extra = save(incoming_path) or {}
+        size = extra.get("size")
+        if size is None:
+            size = os.path.getsize(incoming_path)
+        with state_transaction():
+            page_data = get_user_personal_page(user)
+            with _blob_lock:
+                filename = new_media_filename(user, original_name)
+                if "sha256" in extra:
+                    store_blob(incoming_path, extra["sha256"])
+                    extra["blob"] = True
+                else:
+                    os.replace(incoming_path, os.path.join(app.config['UPLOAD_FOLDER'], filename))
+
+                if kind not in page_data:
+                    page_data[kind] = []
+                page_data[kind].append({"filename": filename, "visibility": "private", **extra})
+                index_media(user, kind, page_data[kind][-1])
+
+            PERSONAL_PAGES[user] = page_data
+            save_personal_pages(user, [filename])
+    finally:
+        if os.path.exists(incoming_path):
+            os.remove(incoming_path)
+    queue_post_upload(filename)
+
+    labels = (("type", file_type),)
+    METRICS.observe("upload_size_bytes", size, labels)
+    METRICS.observe("upload_duration_seconds", time.perf_counter() - started, labels)
+    return {"success": True, "filename": filename, "message": UPLOAD_MESSAGES[file_type], "type": file_type}
+
+# Upload bertahap (resumable): init -> PUT chunk per offset -> finalize.
+# File staging + metadata disimpan di disk supaya upload bisa dilanjutkan
+# setelah koneksi putus atau server restart.
+UPLOAD_STAGING_FOLDER = os.path.join(DATA_DIR, "upload_staging")
+os.makedirs(UPLOAD_STAGING_FOLDER, exist_ok=True)
+CHUNK_SIZE = 4 * 1024 * 1024
+CHUNKED_UPLOAD_THRESHOLD = int(os.getenv("CHUNKED_UPLOAD_THRESHOLD", str(8 * 1024 * 1024)))
+# Batas ukuran sama dengan upload biasa; jumlah sesi dan total byte yang
+# sedang di-staging per user dibatasi supaya sesi yang ditinggalkan tidak
+# bisa memenuhi disk sebelum dibersihkan TTL.
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv("CHUNKED_UPLOAD_MAX_SIZE", str(app.config['MAX_CONTENT_LENGTH'])))
+CHUNKED_UPLOAD_MAX_SESSIONS = int(os.getenv("CHUNKED_UPLOAD_MAX_SESSIONS", "4"))
+CHUNKED_UPLOAD_MAX_STAGED = int(os.getenv("CHUNKED_UPLOAD_MAX_STAGED", str(2 * CHUNKED_UPLOAD_MAX_SIZE)))
+# Upload yang tidak disentuh selama ini dianggap ditinggalkan dan dihapus
+CHUNKED_UPLOAD_TTL = 24 * 60 * 60
+UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_chunk_locks = {}
+_chunk_locks_guard = threading.Lock()
+
+def _staging_paths(upload_id):
+    base = os.path.join(UPLOAD_STAGING_FOLDER, upload_id)
+    return base + ".json", base + ".part"
+
+def _load_chunked_upload(upload_id, user):
+    """Return (meta, part_path) milik user, atau None kalau tidak ada"""
+    if not UPLOAD_ID_RE.match(upload_id):
+        return None
+    meta_path, part_path = _staging_paths(upload_id)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("user") != user or not os.path.exists(part_path):
+        return None
+    return meta, part_path
+
+def _purge_stale_uploads():
+    cutoff = time.time() - CHUNKED_UPLOAD_TTL
+    for name in os.listdir(UPLOAD_STAGING_FOLDER):
+        path = os.path.join(UPLOAD_STAGING_FOLDER, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def _staged_uploads(user):
+    """Ukuran (yang dideklarasikan) setiap upload bertahap milik user yang masih terbuka"""
+    sizes = []
+    for name in os.listdir(UPLOAD_STAGING_FOLDER):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(UPLOAD_STAGING_FOLDER, name), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if meta.get("user") == user:
+            sizes.append(meta.get("size", 0))
+    return sizes
+
+def _chunk_lock(upload_id):
+    with _chunk_locks_guard:
+        return _chunk_locks.setdefault(upload_id, threading.Lock())
+
+@app.route('/upload-chunked', methods=['POST'])
+def chunked_upload_init():
+    """Mulai upload bertahap: {filename, size} -> {upload_id, offset, chunk_size}"""
+    user = session.get("user")
+    if not user:
+        return {"error": "Not authenticated"}, 401
+
+    data = request.get_json(silent=True) or {}
+    filename = str(data.get("filename", ""))
+    size = data.get("size")
+    if not filename or not allowed_file(filename):
+        return {"error": "Invalid file"}, 400
+    if not isinstance(size, int) or size <= 0:
+        return {"error": "Invalid size"}, 400
+    if size > CHUNKED_UPLOAD_MAX_SIZE:
+        return {"error": "File too large"}, 413
+
+    _purge_stale_uploads()
+    with _chunk_locks_guard:
+        staged = _staged_uploads(user)
+        if len(staged) >= CHUNKED_UPLOAD_MAX_SESSIONS:
+            return {"error": "Too many pending uploads"}, 429
+        if sum(staged) + size > CHUNKED_UPLOAD_MAX_STAGED:
+            return {"error": "Too many pending upload bytes"}, 429
+        upload_id = secrets.token_urlsafe(24)
+        meta_path, part_path = _staging_paths(upload_id)
+        open(part_path, 'wb').close()
+        write_file_atomic(meta_path, json.dumps({"user": user, "filename": filename, "size": size}))
+    return {"upload_id": upload_id, "offset": 0, "chunk_size": CHUNK_SIZE}
+
+@app.route('/upload-chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Offset yang sudah diterima server, untuk melanjutkan upload"""
+    user = session.get("user")
+    if not user:
+        return {"error": "Not authenticated"}, 401
+    found = _load_chunked_upload(upload_id, user)
+    if not found:
+        return {"error": "Upload not found"}, 404
+    meta, part_path = found
+    return {"upload_id": upload_id, "offset": os.path.getsize(part_path), "size": meta["size"]}
+
+@app.route('/upload-chunked/<upload_id>', methods=['PUT'])
+def chunked_upload_put(upload_id):
+    """Tulis satu chunk di ?offset=N; body diverifikasi dengan header X-Chunk-CRC32"""
+    user = session.get("user")
+    if not user:
+        return {"error": "Not authenticated"}, 401
+    found = _load_chunked_upload(upload_id, user)
+    if not found:
+        return {"error": "Upload not found"}, 404
+    meta, part_path = found
+    expected_crc = request.headers.get("X-Chunk-CRC32", "")
+    try:
+        offset = int(request.args.get("offset", ""))
+        expected_crc = int(expected_crc, 16)
+    except ValueError:
+        return {"error": "offset dan X-Chunk-CRC32 wajib diisi"}, 400
+
+    with _chunk_lock(upload_id):
+        current = os.path.getsize(part_path)
+        if offset != current:
+            # Client tertinggal/terdepan: beri tahu offset yang benar supaya lanjut dari sana
+            return {"error": "Offset mismatch", "offset": current}, 409
+        crc = 0
+        written = 0
+        with open(part_path, 'r+b') as f:
+            f.seek(offset)
+            while True:
+                block = request.stream.read(64 * 1024)
+                if not block:
+                    break
+                if offset + written + len(block) > meta["size"]:
+                    f.truncate(offset)
+                    return {"error": "Chunk exceeds declared size", "offset": offset}, 400
+                f.write(block)
+                crc = zlib.crc32(block, crc)
+                written += len(block)
+            if crc != expected_crc:
+                # Buang chunk yang rusak, client mengirim ulang dari offset yang sama
+                f.truncate(offset)
+                return {"error": "Checksum mismatch", "offset": offset}, 400
+        os.utime(_staging_paths(upload_id)[0])
+    return {"upload_id": upload_id, "offset": offset + written, "size": meta["size"]}
+
+@app.route('/upload-chunked/<upload_id>/finalize', methods=['POST'])
+def chunked_upload_finalize(upload_id):
+    """Daftarkan file yang sudah lengkap persis seperti upload_image_instant"""
+    user = session.get("user")
+    if not user:
+        return {"error": "Not authenticated"}, 401
+    found = _load_chunked_upload(upload_id, user)
+    if not found:
+        return {"error": "Upload not found"}, 404
+    meta, part_path = found
+
+    with _chunk_lock(upload_id):
+        received = os.path.getsize(part_path)
+        if received != meta["size"]:
+            return {"error": "Upload incomplete", "offset": received}, 409
+        def save(path):
+            sha256 = file_sha256(part_path)
+            os.replace(part_path, path)
+            return {"sha256": sha256, "size": received}
+        result = register_upload(user, meta["filename"], save)
+        os.remove(_staging_paths(upload_id)[0])
+    with _chunk_locks_guard:
+        _chunk_locks.pop(upload_id, None)
+    return result
+
+@app.route("/home")
+def home():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    user_data = USERS.get(user, {})
+    msg = user_data.get("msg", "Welcome!")
+    bg_color = user_data.get("bg_color", "#000000")
+    text_color = user_data.get("text_color", "#ffffff")
+    is_admin = user_data.get("role") == "admin"
+    return render_template("home.html", user=user, msg=msg, bg_color=bg_color, text_color=text_color, is_admin=is_admin)
+
+@app.route("/edit-profile", methods=["GET", "POST"])
+def edit_profile():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    
+    if request.method == "POST":
+        msg = request.form.get("msg", "")
+        bg_color = request.form.get("bg_color", "#000000")
+        text_color = request.form.get("text_color", "#ffffff")
+        
+        with state_transaction():
+            # Update user data
+            if user in USERS:
+                USERS[user]["msg"] = msg
+                USERS[user]["bg_color"] = bg_color
+                USERS[user]["text_color"] = text_color
+                save_users(user)  # Simpan perubahan ke file
+        
+        return redirect(url_for("home"))
+    
+    user_data = USERS.get(user, {})
+    msg = user_data.get("msg", "")
+    bg_color = user_data.get("bg_color", "#000000")
+    text_color = user_data.get("text_color", "#ffffff")
+    
+    return render_template("edit_profile.html", msg=msg, bg_color=bg_color, text_color=text_color)
+
+@app.route("/")
+def index():
+    user = session.get("user")
+    if user:
+        return redirect(url_for("home"))
+    else:
+        return redirect(url_for("public"))
+
+# Password disimpan sebagai hash scrypt: "scrypt$n$r$p$salt$hash" (hex).
+# hashlib.scrypt melepas GIL, jadi verifikasi dijalankan di thread pool
+# berukuran tetap: login beruntun tidak menghabiskan CPU/memori worker.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "50"))
+PASSWORD_HASH_R = 8
+PASSWORD_HASH_P = 1
+PASSWORD_HASH_MIN_N = 2 ** 14
+PASSWORD_HASH_MAX_N = 2 ** 20
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r, dklen=32)
+
+def calibrate_password_hash(target_ms=PASSWORD_HASH_TARGET_MS):
+    """Cari n scrypt terbesar (pangkat 2) yang satu verifikasinya masih <= target_ms"""
+    n = PASSWORD_HASH_MIN_N
+    while n < PASSWORD_HASH_MAX_N:
+        start = time.perf_counter()
+        _scrypt("calibration", b"\0" * 16, n, PASSWORD_HASH_R, PASSWORD_HASH_P)
+        # n dua kali lipat = waktu dua kali lipat
+        if (time.perf_counter() - start) * 1000 * 2 > target_ms:
+            break
+        n *= 2
+    return n
+
+# Hasil kalibrasi disimpan sekali di DATA_DIR supaya semua worker (dan restart
+# berikutnya) memakai n yang sama; kalau tidak, worker yang kalibrasinya beda
+# akan saling me-rehash user yang sama di setiap login.
+PASSWORD_HASH_SETTINGS_FILE = os.path.join(DATA_DIR, "password_hash.json")
+
+def load_password_hash_n():
+    """n tersimpan, atau kalibrasi lalu simpan; worker yang kalah balapan memakai n pemenang"""
+    try:
+        with open(PASSWORD_HASH_SETTINGS_FILE, 'r') as f:
+            return int(json.load(f)["n"])
+    except (OSError, ValueError, KeyError):
+        pass
+    n = calibrate_password_hash()
+    tmp_path = f"{PASSWORD_HASH_SETTINGS_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"n": n}, f)
+    try:
+        # link() gagal kalau file sudah ada, jadi hanya satu hasil kalibrasi yang tersimpan
+        os.link(tmp_path, PASSWORD_HASH_SETTINGS_FILE)
+    except FileExistsError:
+        with open(PASSWORD_HASH_SETTINGS_FILE, 'r') as f:
+            n = int(json.load(f)["n"])
+    finally:
+        os.remove(tmp_path)
+    return n
+
+# PASSWORD_HASH_N bisa diset supaya semua worker memakai cost yang sama tanpa kalibrasi
+PASSWORD_HASH_N = int(os.getenv("PASSWORD_HASH_N", "0")) or load_password_hash_n()
+
+def hash_password(password):
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, PASSWORD_HASH_N, PASSWORD_HASH_R, PASSWORD_HASH_P)
+    return f"scrypt${PASSWORD_HASH_N}${PASSWORD_HASH_R}${PASSWORD_HASH_P}${salt.hex()}${digest.hex()}"
+
+def verify_password(stored, password):
+    """Return (cocok, perlu di-hash ulang). Format lama (plaintext) selalu perlu di-hash ulang."""
+    if not stored.startswith("scrypt$"):
+        return hmac.compare_digest(stored.encode(), password.encode()), True
+    _, n, r, p, salt, expected = stored.split("$")
+    n, r, p = int(n), int(r), int(p)
+    digest = _scrypt(password, bytes.fromhex(salt), n, r, p)
+    # Hanya naikkan cost: hash yang lebih kuat dari target tidak diturunkan
+    needs_rehash = n < PASSWORD_HASH_N or (r, p) != (PASSWORD_HASH_R, PASSWORD_HASH_P)
+    return hmac.compare_digest(digest, bytes.fromhex(expected)), needs_rehash
+
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+
+def check_password(stored, password):
+    """verify_password() di thread pool (request menunggu, CPU tetap dibatasi)"""
+    return _password_pool.submit(verify_password, stored, password).result()
+
+def make_password_hash(password):
+    return _password_pool.submit(hash_password, password).result()
+
+# Username yang tidak ada tetap diverifikasi ke hash ini supaya waktunya sama
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_hex(8))
+
+@app.route("/register", methods=["GET", "POST"])
+def register():
+    error = None
+    if request.method == "POST":
+        u = request.form.get("username", "").strip()
+        p = request.form.get("password", "")
+        cp = request.form.get("confirm_password", "")
+        
+        # Hash di luar state lock (mahal); dipakai hanya kalau validasi lolos
+        password_hash = make_password_hash(p) if p and p == cp and len(p) >= 3 else None
+        with state_transaction():
+            if not u or not p or not cp:
+                error = "Semua field harus diisi"
+            elif len(u) < 3:
+                error = "Username harus minimal 3 karakter"
+            elif len(p) < 3:
+                error = "Password harus minimal 3 karakter"
+            elif p != cp:
+                error = "Password tidak cocok"
+            elif u in USERS:
+                error = "Username sudah terdaftar"
+            elif u in PENDING_USERS:
+                error = "Username sudah dalam antrian persetujuan"
+            else:
+                PENDING_USERS[u] = {"password": password_hash}
+                index_user("pending", u)
+                save_users(u)  # Simpan perubahan ke file
+                return redirect(url_for("register_success"))
+    
+    return render_template("register.html", error=error)
+
+@app.route("/register-success")
+def register_success():
+    return render_template("register_success.html")
+
+@app.route("/admin", methods=["GET", "POST"])
+def admin_panel():
+    global ADMIN_PANEL_ENABLED
+    user = session.get("user")
+    if not user or USERS.get(user, {}).get("role") != "admin":
+        return redirect(url_for("login"))
+    
+    if request.method == "POST":
+        action = request.form.get("action")
+        username = request.form.get("username")
+        
+        with state_transaction():
+            if action == "toggle_admin":
+                ADMIN_PANEL_ENABLED = not ADMIN_PANEL_ENABLED
+                save_settings()
+                return redirect(url_for("admin_panel"))
+            elif admin_action_error(action, username, user) is None:
+                apply_admin_action(action, username)
+                save_users(username)  # Simpan perubahan ke file
+        
+        return redirect(url_for("admin_panel"))
+    
+    # Daftar user/pendaftaran diambil per halaman oleh JS lewat /admin/api/users
+    return render_template(
+        "admin_panel.html",
+        user_count=len(USERS),
+        pending_count=len(PENDING_USERS) if ADMIN_PANEL_ENABLED else 0,
+        admin_panel_enabled=ADMIN_PANEL_ENABLED,
+        bulk_error=request.args.get("bulk_error")
+    )
+
+@app.route("/admin/api/users")
+def admin_api_users():
+    """Daftar user aktif/pendaftaran per halaman (JSON) untuk admin panel.
+
+    Query: collection (users/pending), q (prefix username), role (user/admin), cursor, limit.
+    """
+    user = session.get("user")
+    if not user or USERS.get(user, {}).get("role") != "admin":
+        return {"error": "Forbidden"}, 403
+    collection = request.args.get("collection", "users")
+    if collection not in USER_INDEX:
+        return {"error": "Invalid collection"}, 400
+    limit = request.args.get("limit", "")
+    limit = min(USER_PAGE_MAX, max(1, int(limit))) if limit.isdigit() else USER_PAGE_SIZE
+    if collection == "pending" and not ADMIN_PANEL_ENABLED:
+        return {"items": [], "next_cursor": None}
+    usernames, next_cursor = search_users(collection, request.args.get("q", "").strip(),
+                                          request.args.get("role") or None, request.args.get("cursor"), limit)
+    if collection == "pending":
+        items = [{"username": u} for u in usernames]
+    else:
+        items = [{"username": u, "role": USERS.get(u, {}).get("role", "user"), "is_self": u == user}
+                 for u in usernames]
+    return {"items": items, "next_cursor": next_cursor}
+
+ADMIN_BULK_MAX = 1000
+
+def admin_action_error(action, username, current_user):
+    """Pesan error kalau aksi admin tidak bisa dijalankan, None kalau valid"""
+    if action in ("approve", "reject"):
+        return None if username in PENDING_USERS else "bukan pendaftaran yang menunggu"
+    if action == "make_admin":
+        if USERS.get(username, {}).get("role") != "user":
+            return "bukan user biasa"
+        return None
+    if action == "remove_admin":
+        if username == current_user:
+            return "tidak bisa menghapus admin diri sendiri"
+        if USERS.get(username, {}).get("role") != "admin":
+            return "bukan admin"
+        return None
+    return "aksi tidak dikenal"
+
+def admin_action_noop(action, username):
+    """True kalau user sudah punya role tujuan aksi (dilewati, bukan error)"""
+    role = USERS.get(username, {}).get("role")
+    return (action, role) in (("make_admin", "admin"), ("remove_admin", "user"))
+
+def apply_admin_action(action, username):
+    """Terapkan satu aksi admin di memori (pemanggil yang menyimpan)"""
+    if action == "approve":
+        USERS[username] = {
+            "password": PENDING_USERS[username]["password"],
+            "msg": f"Selamat datang, {username}!",
+            "role": "user",
+            "bg_color": "#000000",
+            "text_color": "#ffffff",
+            "theme": "dark"
+        }
+        del PENDING_USERS[username]
+        unindex_user("pending", username)
+        index_user("users", username)
+    elif action == "reject":
+        del PENDING_USERS[username]
+        unindex_user("pending", username)
+    elif action == "make_admin":
+        USERS[username]["role"] = "admin"
+        reindex_user_role(username, "user")
+    elif action == "remove_admin":
+        USERS[username]["role"] = "user"
+        reindex_user_role(username, "admin")
+
+@app.route("/admin/bulk", methods=["POST"])
+def admin_bulk():
+    """Jalankan banyak aksi admin sekaligus: semua divalidasi dulu, lalu disimpan sekali.
+
+    JSON: {"actions": [{"action": "approve", "username": "x"}, ...]}
+    Form (checkbox admin panel): action=<aksi>&usernames=a&usernames=b
+    User yang sudah punya role tujuan dilewati (mis. "Pilih semua" lalu
+    "Jadikan admin"). Kalau satu saja tidak valid, tidak ada yang dijalankan;
+    form dikembalikan ke admin panel dengan pesan error, JSON mendapat 400.
+    """
+    user = session.get("user")
+    if not user or USERS.get(user, {}).get("role") != "admin":
+        return {"error": "Forbidden"}, 403
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        actions = payload.get("actions") if isinstance(payload, dict) else None
+        if not isinstance(actions, list) or not all(isinstance(a, dict) for a in actions):
+            return {"error": "actions harus berupa list"}, 400
+        actions = [(str(a.get("action", "")), str(a.get("username", ""))) for a in actions]
+    else:
+        action = request.form.get("action", "")
+        actions = [(action, username) for username in request.form.getlist("usernames")]
+
+    def fail(message, invalid=None):
+        if request.is_json:
+            return {"error": message, **({"invalid": invalid} if invalid else {})}, 400
+        if invalid:
+            details = ", ".join(f"{row['username']} ({row['error']})" for row in invalid[:5])
+            more = f" dan {len(invalid) - 5} lainnya" if len(invalid) > 5 else ""
+            message = f"{message}: {details}{more}"
+        return redirect(url_for("admin_panel", bulk_error=message))
+
+    if not actions:
+        return fail("Tidak ada aksi")
+    if len(actions) > ADMIN_BULK_MAX:
+        return fail(f"Maksimal {ADMIN_BULK_MAX} aksi per request")
+
+    with state_transaction():
+        invalid = []
+        skipped = []
+        pending = []
+        seen = set()
+        for action, username in actions:
+            if username in seen:
+                error = "username muncul lebih dari sekali"
+            elif admin_action_noop(action, username):
+                error = None
+                skipped.append(username)
+            else:
+                error = admin_action_error(action, username, user)
+                pending.append((action, username))
+            seen.add(username)
+            if error:
+                invalid.append({"action": action, "username": username, "error": error})
+        if invalid:
+            return fail("Aksi tidak valid, tidak ada yang dijalankan", invalid)
+        for action, username in pending:
+            apply_admin_action(action, username)
+        save_users_many({username for _, username in pending})
+
+    if request.is_json:
+        return {"success": True, "applied": len(pending), "skipped": skipped}
+    return redirect(url_for("admin_panel"))
+
+@app.route("/admin/stats")
+def admin_stats():
+    """Counter cache untuk admin (JSON)"""
+    user = session.get("user")
+    if not user or USERS.get(user, {}).get("role") != "admin":
+        return {"error": "Forbidden"}, 403
+    return {"media_cache": dict(MEDIA_CACHE_STATS), "page_cache": page_cache_stats()}
+
+@app.route("/metrics")
+def metrics():
+    """Metrics format Prometheus; untuk admin, atau scraper dengan Bearer METRICS_TOKEN"""
+    user = session.get("user")
+    is_admin = user and USERS.get(user, {}).get("role") == "admin"
+    auth = request.headers.get("Authorization", "")
+    has_token = METRICS_TOKEN and hmac.compare_digest(auth.encode(), f"Bearer {METRICS_TOKEN}".encode())
+    if not is_admin and not has_token:
+        return {"error": "Forbidden"}, 403
+    return app.response_class(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    if request.method == "POST":
+        u = request.form.get("username", "")
+        p = request.form.get("password", "")
+
+        stored = USERS.get(u, {}).get("password")
+        valid, needs_rehash = check_password(stored or _DUMMY_PASSWORD_HASH, p)
+        if stored is not None and valid:
+            if needs_rehash:
+                # Plaintext lama / cost lama -> ganti dengan hash baru saat login berhasil
+                password_hash = make_password_hash(p)
+                with state_transaction():
+                    if USERS.get(u, {}).get("password") == stored:
+                        USERS[u]["password"] = password_hash
+                        save_users(u)
+            session["user"] = u
+            auth_log.info("login berhasil", extra={"fields": {"user": u}})
+            # Redirect based on user type
+            if u == "guest":
+                return redirect("https://www.instagram.com/muhammadaryamenoza/")
+            else:
+                return redirect(url_for("home"))
+        else:
+            auth_log.info("login gagal", extra={"fields": {"user": u, "remote_addr": request.remote_addr}})
+
+    user = session.get("user")
+    return render_template("login.html", msg=USERS.get(user, {}).get("msg") if user else None)
+
+@app.route("/logout")
+def logout():
+    session.clear()
+    return redirect(url_for("public"))
+
+@app.route("/personal-page")
+def personal_page():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    
+    page_data = get_user_personal_page(user)
+    audio_list = page_data.get("audio", [])
+    video_list = page_data.get("video", [])
+    if pages_log.isEnabledFor(logging.DEBUG):
+        pages_log.debug("personal_page", extra={"fields": {"user": user, "audio": len(audio_list), "video": len(video_list)}})
+    return render_template(
+        "personal_page.html",
+        title=page_data.get("title", ""),
+        description=page_data.get("description", ""),
+        bg_color=page_data.get("bg_color", "#1a1a2e"),
+        text_color=page_data.get("text_color", "#ffffff"),
+        background_image=page_data.get("background_image", None),
+        owner=user,
+        current_user=user,
+        is_admin=(USERS.get(user, {}).get("role") == "admin"),
+        **first_media_pages(page_data)
+    )
+
+@app.route("/view-user")
+def view_user():
+    """Melihat personal page user lain"""
+    search_username = request.args.get("username", "").strip()
+    current_user = session.get("user")
+
+    if not current_user:
+        return redirect(url_for("login"))
+
+    # Cari pada USERS (bukan hanya PERSONAL_PAGES), karena personal page dibuat
+    # secara lazy. Jika user ada di USERS, pastikan personal page dibuat lalu tampilkan.
+    if not search_username or search_username not in USERS:
+        # User tidak ditemukan
+        return render_template("user_not_found.html", search_username=search_username)
+
+    # Pastikan ada data personal page untuk user yang dicari
+    page_data = get_user_personal_page(search_username)
+
+    # Pemilik dan admin melihat semua media, user lain hanya yang public
+    is_admin = USERS.get(current_user, {}).get("role") == "admin"
+    viewer_class = "owner" if search_username == current_user else "admin" if is_admin else "other"
+    return cached_page(search_username, viewer_class,
+                       lambda: render_view_user(search_username, current_user, is_admin, page_data))
+
+def render_view_user(search_username, current_user, is_admin, page_data):
+    view = get_media_view(search_username, full=search_username == current_user or is_admin)
+    return render_template(
+        "personal_page.html",
+        title=page_data.get("title", ""),
+        description=page_data.get("description", ""),
+        bg_color=page_data.get("bg_color", "#1a1a2e"),
+        text_color=page_data.get("text_color", "#ffffff"),
+        background_image=view["background_image"],
+        owner=search_username,
+        current_user=current_user,
+        is_admin=is_admin,
+        **first_media_pages(view)
+    )
+
+@app.route("/api/users/autocomplete")
+def api_users_autocomplete():
+    """Saran username untuk kotak pencarian /view-user (JSON, bisa di-cache browser)"""
+    if not session.get("user"):
+        return {"error": "Not authenticated"}, 401
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", "")
+    limit = min(AUTOCOMPLETE_LIMIT, max(1, int(limit))) if limit.isdigit() else AUTOCOMPLETE_LIMIT
+    items = autocomplete_users(query, limit)
+    body = json.dumps({"query": query, "items": items})
+    response = app.response_class(body, mimetype="application/json")
+    # ETag dari isi response, bukan _user_index_version: counter itu per proses,
+    # jadi dengan MULTI_WORKER dua worker bisa memberi versi sama untuk isi berbeda
+    response.set_etag(hashlib.sha1(body.encode()).hexdigest())
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return response.make_conditional(request)
+
+@app.route("/api/media")
+def api_media():
+    """Daftar media user per halaman (JSON), aturan visibility sama dengan view_user().
+
+    Query: user (default diri sendiri), kind (images/audio/video), cursor, limit.
+    """
+    current_user = session.get("user")
+    if not current_user:
+        return {"error": "Not authenticated"}, 401
+    owner = request.args.get("user", current_user)
+    kind = request.args.get("kind", "images")
+    if kind not in MEDIA_KINDS:
+        return {"error": "Invalid kind"}, 400
+    if owner not in USERS:
+        return {"error": "User not found"}, 404
+    limit = request.args.get("limit", "")
+    limit = min(MEDIA_PAGE_MAX, max(1, int(limit))) if limit.isdigit() else MEDIA_PAGE_SIZE
+
+    get_user_personal_page(owner)
+    is_admin = USERS.get(current_user, {}).get("role") == "admin"
+    view = get_media_view(owner, full=owner == current_user or is_admin)
+    items, next_cursor = media_page(view[kind], request.args.get("cursor"), limit)
+    result = []
+    for item in items:
+        filename = media_filename(item)
+        entry = {"filename": filename, "url": f"/uploads/{filename}", "name": filename.split("_")[-1],
+                 "visibility": item.get("visibility", "private") if isinstance(item, dict) else "private",
+                 "info": media_info(item)}
+        if kind == "images":
+            entry["srcset"] = image_srcset(filename)
+        result.append(entry)
+    return {"items": result, "next_cursor": next_cursor}
+
+@app.route("/edit-personal-page", methods=["GET", "POST"])
+def edit_personal_page():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    
+    page_data = get_user_personal_page(user)
+    
+    if request.method == "POST":
+        # Update text data only (image upload sudah via AJAX)
+        title = request.form.get("title", "")
+        description = request.form.get("description", "")
+        bg_color = request.form.get("bg_color", "#1a1a2e")
+        text_color = request.form.get("text_color", "#ffffff")
+        
+        with state_transaction():
+            page_data = get_user_personal_page(user)
+            page_data["title"] = title
+            page_data["description"] = description
+            page_data["bg_color"] = bg_color
+            page_data["text_color"] = text_color
+            
+            PERSONAL_PAGES[user] = page_data
+            save_personal_pages(user, ())
+        return redirect(url_for("personal_page"))
+    
+    return render_template(
+        "edit_personal_page.html",
+        title=page_data.get("title", ""),
+        description=page_data.get("description", ""),
+        bg_color=page_data.get("bg_color", "#1a1a2e"),
+        text_color=page_data.get("text_color", "#ffffff"),
+        chunked_upload_threshold=CHUNKED_UPLOAD_THRESHOLD,
+        chunk_size=CHUNK_SIZE
+    )
+
+@app.route("/delete-image", methods=["POST"])
+def delete_image():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    
+    filename = request.form.get("image", "")
+    with state_transaction():
+        page_data = get_user_personal_page(user)
+        removed_records = [item for kind in MEDIA_KINDS for item in page_data.get(kind, [])
+                           if media_filename(item) == filename]
+
+        # Check and remove from images
+        new_images = []
+        removed = False
+        for img in page_data.get("images", []):
+            if isinstance(img, dict) and img.get("filename") == filename:
+                removed = True
+                continue
+            if isinstance(img, str) and img == filename:
+                removed = True
+                continue
+            new_images.append(img)
+
+        if removed:
+            page_data["images"] = new_images
+
+        # Check and remove from audio
+        new_audio = []
+        for track in page_data.get("audio", []):
+            if isinstance(track, dict) and track.get("filename") == filename:
+                continue
+            if isinstance(track, str) and track == filename:
+                continue
+            new_audio.append(track)
+
+        audio_removed = len(new_audio) != len(page_data.get("audio", []))
+        if audio_removed:
+            page_data["audio"] = new_audio
+
+        # Check and remove from video
+        new_video = []
+        for vid in page_data.get("video", []):
+            if isinstance(vid, dict) and vid.get("filename") == filename:
+                continue
+            if isinstance(vid, str) and vid == filename:
+                continue
+            new_video.append(vid)
+
+        video_removed = len(new_video) != len(page_data.get("video", []))
+        if video_removed:
+            page_data["video"] = new_video
+
+        if removed or audio_removed or video_removed:
+            with _blob_lock:
+                unindex_media(user, filename)
+                for record in removed_records:
+                    release_blob(record)
+                for record in removed_records:
+                    remove_media_file(record)
+            PERSONAL_PAGES[user] = page_data
+            save_personal_pages(user, [filename])
+    
+    return redirect(url_for("personal_page"))
+
+@app.route("/image-gallery")
+def image_gallery():
+    """Menampilkan galeri gambar, lagu, dan video user"""
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    # Show only current user's images, audio, and video (uploads are private)
+    page_data = get_user_personal_page(user)
+    return render_template("image_gallery.html", owner=user, **first_media_pages(page_data))
+
+@app.route("/set-background", methods=["POST"])
+def set_background():
+    """Set gambar sebagai background personal page user"""
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+    
+    image = request.form.get("image", "")
+    with state_transaction():
+        page_data = get_user_personal_page(user)
+        # Only allow setting an image that the current user actually uploaded
+        found = False
+        for img in page_data.get("images", []):
+            if isinstance(img, dict) and img.get("filename") == image:
+                found = True
+                break
+            if isinstance(img, str) and img == image:
+                found = True
+                break
+        if found:
+            page_data["background_image"] = image
+            PERSONAL_PAGES[user] = page_data
+            save_personal_pages(user, ())
+    
+    return redirect(url_for("edit_personal_page"))
+
+
+@app.route("/toggle-visibility", methods=["POST"])
+def toggle_visibility():
+    user = session.get("user")
+    if not user:
+        return redirect(url_for("login"))
+
+    filename = request.form.get("image", "")
+    with state_transaction():
+        page_data = get_user_personal_page(user)
+        changed = False
+    
+        # Check images
+        for img in page_data.get("images", []):
+            if isinstance(img, dict) and img.get("filename") == filename:
+                img["visibility"] = "public" if img.get("visibility") == "private" else "private"
+                changed = True
+                break
+    
+        # Check audio if not found in images
+        if not changed:
+            for track in page_data.get("audio", []):
+                if isinstance(track, dict) and track.get("filename") == filename:
+                    track["visibility"] = "public" if track.get("visibility") == "private" else "private"
+                    changed = True
+                    break
+
+        # Check video if not found in images or audio
+        if not changed:
+            for vid in page_data.get("video", []):
+                if isinstance(vid, dict) and vid.get("filename") == filename:
+                    vid["visibility"] = "public" if vid.get("visibility") == "private" else "private"
+                    changed = True
+                    break
+
+        # Record yang diubah sama dengan yang dirujuk MEDIA_INDEX, jadi index ikut terbarui
+        if changed:
+            PERSONAL_PAGES[user] = page_data
+            save_personal_pages(user, [filename])
+
+    return redirect(url_for("image_gallery"))
+
+def main():
+    """CLI: server development atau perintah maintenance (dipanggil dari run.py)"""
+    # SIGTERM -> SystemExit supaya hook atexit (flush_state) tetap berjalan
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    if sys.argv[1:2] == ["migrate-sqlite"]:
+        # python latihan.py migrate-sqlite [path.sqlite3]
+        print(migrate_json_to_sqlite(*sys.argv[2:3]))
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["dedup-uploads"]:
+        # python latihan.py dedup-uploads -> pindahkan uploads/ lama ke blob store
+        print(dedup_uploads())
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["backfill-metadata"]:
+        # python latihan.py backfill-metadata -> isi metadata media yang diupload sebelum fitur ini
+        print(backfill_metadata())
+        sys.exit(0)
+
     port = int(os.getenv("PORT", "5000"))
     debug = os.getenv("FLASK_DEBUG", "0") == "1"
     app.run(debug=debug, host="0.0.0.0", port=port)
@@ -0,0 +1,10 @@
+"""Entrypoint `python latihan.py` (atau langsung `python run.py`).
+
+Sengaja hanya berisi ini: worker process pool gambar mengimpor ulang script
+utama sebagai __mp_main__, jadi script utama harus ringan diimpor.
+"""
+
+if __name__ == "__main__":
+    import latihan
+
+    latihan.main()
@@ -0,0 +1,41 @@
+"""Fixture bersama: latihan diimpor sekali dengan DATA_DIR sementara.
+
+Data contoh (DEFAULT_USERS) dipakai apa adanya: admin/1234, arya/4321, friend/1111.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Harus diset sebelum latihan diimpor: DATA_DIR dan setting lain dibaca saat import
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="latihan-test-")
+os.environ["PERSIST_INTERVAL_MS"] = "0"
+os.environ.setdefault("PASSWORD_HASH_N", "16384")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import latihan  # noqa: E402
+
+PASSWORDS = {"admin": "1234", "arya": "4321", "friend": "1111"}
+
+
+def login(username):
+    client = latihan.app.test_client()
+    response = client.post("/login", data={"username": username, "password": PASSWORDS[username]})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def admin():
+    return login("admin")
+
+
+@pytest.fixture
+def arya():
+    return login("arya")
+
+
+@pytest.fixture
+def friend():
+    return login("friend")
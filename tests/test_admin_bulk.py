@@ -0,0 +1,59 @@
+import pytest
+
+import latihan
+
+
+@pytest.fixture
+def pending():
+    names = [f"bulk{len(latihan.USERS) + len(latihan.PENDING_USERS)}_{i}" for i in range(5)]
+    for name in names:
+        latihan.PENDING_USERS[name] = {"password": "x"}
+    yield names
+    for name in names:
+        latihan.PENDING_USERS.pop(name, None)
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    calls = []
+    save_users = latihan.STORAGE.save_users
+    monkeypatch.setattr(latihan.STORAGE, "save_users", lambda *a, **k: calls.append(a) or save_users(*a, **k))
+    return calls
+
+
+def test_invalid_entry_applies_nothing(admin, pending, saves):
+    actions = [{"action": "approve", "username": pending[0]}, {"action": "approve", "username": "nobody"}]
+    response = admin.post("/admin/bulk", json={"actions": actions})
+    assert response.status_code == 400
+    assert [entry["username"] for entry in response.json["invalid"]] == ["nobody"]
+    assert pending[0] in latihan.PENDING_USERS and pending[0] not in latihan.USERS
+    assert not saves
+
+
+def test_batch_saved_once(admin, pending, saves):
+    actions = [{"action": "approve", "username": name} for name in pending]
+    response = admin.post("/admin/bulk", json={"actions": actions})
+    assert response.json == {"success": True, "applied": len(pending), "skipped": []}
+    assert all(latihan.USERS[name]["role"] == "user" for name in pending)
+    assert len(saves) == 1
+
+
+def test_noop_actions_skipped(admin, pending):
+    admin.post("/admin/bulk", json={"actions": [{"action": "approve", "username": name} for name in pending]})
+    actions = [{"action": "make_admin", "username": "admin"}, {"action": "make_admin", "username": pending[0]}]
+    response = admin.post("/admin/bulk", json={"actions": actions})
+    assert response.json == {"success": True, "applied": 1, "skipped": ["admin"]}
+    assert latihan.USERS[pending[0]]["role"] == "admin"
+
+
+def test_form_error_redirects_to_panel(admin, pending):
+    response = admin.post("/admin/bulk", data={"action": "remove_admin", "usernames": ["admin"]})
+    assert response.status_code == 302 and "bulk_error" in response.location
+    assert latihan.USERS["admin"]["role"] == "admin"
+    assert "bulk-error" in admin.get(response.location).text
+
+
+def test_requires_admin(arya, pending):
+    response = arya.post("/admin/bulk", json={"actions": [{"action": "approve", "username": pending[0]}]})
+    assert response.status_code == 403
+    assert pending[0] in latihan.PENDING_USERS
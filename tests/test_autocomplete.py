@@ -0,0 +1,23 @@
+import latihan
+
+
+def test_etag_follows_response_body(arya, admin):
+    response = arya.get("/api/users/autocomplete", query_string={"q": "etagcase"})
+    assert response.json["items"] == []
+    etag = response.headers["ETag"]
+    assert arya.get("/api/users/autocomplete", query_string={"q": "etagcase"},
+                    headers={"If-None-Match": etag}).status_code == 304
+
+    latihan.PENDING_USERS["etagcase_one"] = {"password": "x"}
+    admin.post("/admin", data={"action": "approve", "username": "etagcase_one"})
+    response = arya.get("/api/users/autocomplete", query_string={"q": "etagcase"},
+                        headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json["items"] == ["etagcase_one"]
+    assert response.headers["ETag"] != etag
+
+    # Isi sama (user baru tidak cocok dengan query): ETag tetap, walau index sudah berubah
+    etag = response.headers["ETag"]
+    latihan.PENDING_USERS["zz_other"] = {"password": "x"}
+    admin.post("/admin", data={"action": "approve", "username": "zz_other"})
+    assert arya.get("/api/users/autocomplete", query_string={"q": "etagcase"},
+                    headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,89 @@
+import os
+import zlib
+
+import pytest
+
+import latihan
+
+
+@pytest.fixture(autouse=True)
+def clean_staging():
+    yield
+    for name in os.listdir(latihan.UPLOAD_STAGING_FOLDER):
+        os.remove(os.path.join(latihan.UPLOAD_STAGING_FOLDER, name))
+
+
+def put_chunk(client, upload_id, offset, chunk, crc=None):
+    crc = zlib.crc32(chunk) if crc is None else crc
+    return client.put(f"/upload-chunked/{upload_id}?offset={offset}", data=chunk,
+                      headers={"X-Chunk-CRC32": "%08x" % crc})
+
+
+def start(client, size, filename="big.mp4"):
+    response = client.post("/upload-chunked", json={"filename": filename, "size": size})
+    assert response.status_code == 200
+    return response.json["upload_id"]
+
+
+def test_resume_from_server_offset(arya):
+    data = os.urandom(3000)
+    upload_id = start(arya, len(data))
+    assert put_chunk(arya, upload_id, 0, data[:1000]).json["offset"] == 1000
+
+    # Chunk yang dikirim ulang ditolak dengan offset yang benar
+    response = put_chunk(arya, upload_id, 0, data[:1000])
+    assert response.status_code == 409 and response.json["offset"] == 1000
+    assert arya.post(f"/upload-chunked/{upload_id}/finalize").status_code == 409
+
+    offset = arya.get(f"/upload-chunked/{upload_id}").json["offset"]
+    assert offset == 1000
+    assert put_chunk(arya, upload_id, offset, data[offset:]).json["offset"] == len(data)
+
+    response = arya.post(f"/upload-chunked/{upload_id}/finalize")
+    assert response.json["success"] and response.json["type"] == "video"
+    assert arya.get("/uploads/" + response.json["filename"]).data == data
+    assert os.listdir(latihan.UPLOAD_STAGING_FOLDER) == []
+
+
+def test_crc_mismatch_discards_chunk(arya):
+    data = os.urandom(2000)
+    upload_id = start(arya, len(data))
+    assert put_chunk(arya, upload_id, 0, data[:1000]).status_code == 200
+
+    response = put_chunk(arya, upload_id, 1000, data[1000:], crc=zlib.crc32(data[1000:]) ^ 1)
+    assert response.status_code == 400 and response.json["offset"] == 1000
+    assert arya.get(f"/upload-chunked/{upload_id}").json["offset"] == 1000
+
+    assert put_chunk(arya, upload_id, 1000, data[1000:]).json["offset"] == 2000
+
+
+def test_chunk_beyond_declared_size_rejected(arya):
+    upload_id = start(arya, 100)
+    response = put_chunk(arya, upload_id, 0, b"x" * 101)
+    assert response.status_code == 400 and response.json["offset"] == 0
+    assert arya.get(f"/upload-chunked/{upload_id}").json["offset"] == 0
+
+
+def test_upload_belongs_to_its_user(arya, friend):
+    upload_id = start(arya, 100)
+    assert friend.get(f"/upload-chunked/{upload_id}").status_code == 404
+    assert put_chunk(friend, upload_id, 0, b"x" * 100).status_code == 404
+
+
+def test_pending_uploads_are_capped(arya, monkeypatch):
+    monkeypatch.setattr(latihan, "CHUNKED_UPLOAD_MAX_SESSIONS", 2)
+    start(arya, 100)
+    start(arya, 100)
+    response = arya.post("/upload-chunked", json={"filename": "big.mp4", "size": 100})
+    assert response.status_code == 429
+
+    monkeypatch.setattr(latihan, "CHUNKED_UPLOAD_MAX_SESSIONS", 10)
+    monkeypatch.setattr(latihan, "CHUNKED_UPLOAD_MAX_STAGED", 250)
+    response = arya.post("/upload-chunked", json={"filename": "big.mp4", "size": 100})
+    assert response.status_code == 429
+
+
+def test_declared_size_limit(arya):
+    response = arya.post("/upload-chunked", json={"filename": "big.mp4",
+                                                   "size": latihan.CHUNKED_UPLOAD_MAX_SIZE + 1})
+    assert response.status_code == 413
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from PIL import Image
+
+import latihan
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seperti `python latihan.py`, tapi app.run diganti: tanya modul apa saja yang dimuat worker pool
+SCRIPT = textwrap.dedent("""
+    import runpy, sys, flask
+
+    def run(self, *args, **kwargs):
+        import latihan
+        probe = "(lambda m: [sorted(set(m) & {'flask', 'latihan'}), m['__mp_main__'].__file__])(__import__('sys').modules)"
+        print(latihan._image_pool().submit(eval, probe).result())
+
+    flask.Flask.run = run
+    sys.argv = ["latihan.py"]
+    runpy.run_path("latihan.py", run_name="__main__")
+""")
+
+
+def test_worker_does_not_import_app(tmp_path):
+    env = dict(os.environ, DATA_DIR=str(tmp_path), PERSIST_INTERVAL_MS="0", PASSWORD_HASH_N="16384")
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    modules, main_file = eval(result.stdout.strip().splitlines()[-1])
+    assert modules == []
+    assert os.path.basename(main_file) == "run.py"
+
+
+def test_missing_derivative_is_regenerated(tmp_path):
+    source = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (800, 600), "red").save(source, "JPEG")
+    path, mimetype = latihan.get_image_derivative(source, 300, 80)
+    assert mimetype == "image/jpeg"
+
+    # Proses lain membuang file dari cache-nya sendiri
+    os.remove(path)
+    assert latihan.get_image_derivative(source, 300, 80) == (path, mimetype)
+    with Image.open(path) as img:
+        assert img.width == 320
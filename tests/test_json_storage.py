@@ -0,0 +1,84 @@
+import copy
+import json
+import os
+
+import pytest
+
+import latihan
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = latihan.JsonStorage(str(tmp_path / "users.json"), str(tmp_path / "pages.json"))
+    storage.background_compaction = False
+    return storage
+
+
+def reload(storage):
+    return latihan.JsonStorage(storage.users_file, storage.pages_file).load_pages()
+
+
+def page(msg, *images):
+    return {"title": msg, "images": [{"filename": name, "visibility": "private"} for name in images]}
+
+
+def test_replay_after_appends(storage):
+    pages = {"arya": page("satu", "a.png")}
+    storage.save_pages(pages, ["arya"])
+    pages["friend"] = page("dua")
+    storage.save_pages(pages, ["friend"])
+    pages["arya"] = page("tiga", "a.png", "b.png")
+    storage.save_pages(pages, ["arya"])
+    del pages["friend"]
+    storage.save_pages(pages, ["friend"])
+
+    assert not os.path.exists(storage.pages_file)
+    assert reload(storage) == pages
+
+
+def test_torn_last_line_ignored_and_repaired(storage):
+    pages = {"arya": page("satu")}
+    storage.save_pages(pages, ["arya"])
+    # Proses mati di tengah menulis record berikutnya
+    with open(storage.journal_file, "ab") as f:
+        f.write(b'{"user": "friend", "page": {"tit')
+
+    assert reload(storage) == pages
+
+    pages["friend"] = page("dua")
+    storage.save_pages(pages, ["friend"])
+    assert reload(storage) == pages
+    with open(storage.journal_file, "rb") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["user"] for record in records] == ["arya", "friend"]
+
+
+def test_compaction_keeps_state(storage, monkeypatch):
+    pages = {"arya": page("satu", "a.png"), "friend": page("dua")}
+    storage.save_pages(pages, ["arya", "friend"])
+    pages["arya"]["title"] = "diubah"
+    storage.save_pages(pages, ["arya"])
+    before = copy.deepcopy(reload(storage))
+
+    storage.compact(pages)
+    assert not os.path.exists(storage.journal_file)
+    assert reload(storage) == before == pages
+
+    # Journal yang melewati batas langsung di-compact
+    monkeypatch.setattr(latihan, "JOURNAL_COMPACT_BYTES", 1)
+    pages["friend"] = page("tiga", "c.png")
+    storage.save_pages(pages, ["friend"])
+    assert not os.path.exists(storage.journal_file)
+    with open(storage.pages_file) as f:
+        assert json.load(f) == pages
+
+
+def test_interrupted_compaction_replays_old_journal(storage):
+    pages = {"arya": page("satu")}
+    storage.save_pages(pages, ["arya"])
+    # Compaction terhenti setelah journal diganti nama, sebelum snapshot ditulis
+    os.replace(storage.journal_file, storage.journal_file + ".old")
+    pages["friend"] = page("dua")
+    storage.save_pages(pages, ["friend"])
+
+    assert reload(storage) == pages
@@ -0,0 +1,88 @@
+import io
+import os
+
+import pytest
+
+import latihan
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", [(0, 10)]),
+    ("bytes=90-", [(90, 100)]),
+    ("bytes=-10", [(90, 100)]),
+    ("bytes=-500", [(0, 100)]),
+    ("bytes=50-200", [(50, 100)]),
+    ("bytes=0-9,10-19", [(0, 20)]),
+    ("bytes=0-9,50-59", [(0, 10), (50, 60)]),
+    ("bytes=100-", []),
+    ("bytes=200-300", []),
+    ("items=0-9", None),
+    ("bytes=abc", None),
+    ("bytes=9-0", None),
+    # Werkzeug menolak range yang tumpang tindih/tidak urut: header diabaikan
+    ("bytes=0-9,5-19", None),
+    ("bytes=10-19,0-9", None),
+])
+def test_satisfiable_ranges(header, expected):
+    assert latihan._satisfiable_ranges(header, 100) == expected
+
+
+@pytest.fixture
+def video(arya):
+    data = os.urandom(5000)
+    response = arya.post("/upload-image-instant", data={"image": (io.BytesIO(data), "clip.mp4")},
+                         content_type="multipart/form-data")
+    return response.json["filename"], data
+
+
+def test_single_range(arya, video):
+    filename, data = video
+    response = arya.get("/uploads/" + filename, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(data)}"
+    assert response.data == data[10:20]
+
+
+def test_multiple_ranges(arya, video):
+    filename, data = video
+    response = arya.get("/uploads/" + filename, headers={"Range": "bytes=0-3,100-103"})
+    assert response.status_code == 206 and response.mimetype == "multipart/byteranges"
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert data[0:4] in response.data and data[100:104] in response.data
+    assert f"Content-Range: bytes 100-103/{len(data)}".encode() in response.data
+
+
+def test_unsatisfiable_range(arya, video):
+    filename, data = video
+    response = arya.get("/uploads/" + filename, headers={"Range": f"bytes={len(data)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(data)}"
+
+
+def test_conditional_requests(arya, video):
+    filename, data = video
+    response = arya.get("/uploads/" + filename)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert response.data == data
+
+    assert arya.get("/uploads/" + filename, headers={"If-None-Match": etag}).status_code == 304
+    assert arya.get("/uploads/" + filename, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert arya.get("/uploads/" + filename, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    response = arya.get("/uploads/" + filename, headers={"Range": "bytes=10-19", "If-Range": etag})
+    assert response.status_code == 206 and response.data == data[10:20]
+    # Versi di browser sudah basi: kirim file utuh
+    response = arya.get("/uploads/" + filename, headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.data == data
+
+
+def test_cache_control_by_viewer(arya, friend, video):
+    filename, _ = video
+    response = arya.get("/uploads/" + filename)
+    assert response.headers["Cache-Control"] == latihan.MEDIA_CACHE_CONTROL_OWNER
+
+    assert friend.get("/uploads/" + filename).status_code == 403
+    arya.post("/toggle-visibility", data={"image": filename})
+    response = friend.get("/uploads/" + filename)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == latihan.MEDIA_CACHE_CONTROL_SHARED
@@ -0,0 +1,45 @@
+import io
+
+from PIL import Image
+
+import latihan
+
+
+def view(client, owner="arya"):
+    response = client.get("/view-user", query_string={"username": owner})
+    assert response.status_code == 200
+    return response.text
+
+
+def edit(client, title):
+    client.post("/edit-personal-page", data={"title": title, "description": "", "bg_color": "#000000",
+                                              "text_color": "#ffffff"})
+
+
+def test_edit_invalidates_cached_page(arya, friend):
+    edit(arya, "Judul Pertama")
+    assert "Judul Pertama" in view(friend)
+    assert ("arya", "other") in latihan._page_cache
+    assert "Judul Pertama" in view(friend)
+
+    edit(arya, "Judul Kedua")
+    body = view(friend)
+    assert "Judul Kedua" in body and "Judul Pertama" not in body
+
+
+def test_visibility_change_invalidates_each_viewer_class(arya, friend):
+    png = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(png, "PNG")
+    png.seek(0)
+    response = arya.post("/upload-image-instant", data={"image": (png, "cache.png")},
+                         content_type="multipart/form-data")
+    filename = response.json["filename"]
+    assert filename in view(arya)
+    assert filename not in view(friend)
+
+    arya.post("/toggle-visibility", data={"image": filename})
+    assert filename in view(friend)
+
+    arya.post("/toggle-visibility", data={"image": filename})
+    assert filename not in view(friend)
+    assert filename in view(arya)
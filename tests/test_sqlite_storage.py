@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import latihan
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return latihan.SQLiteStorage(str(tmp_path / "app_data.sqlite3"))
+
+
+def reload(storage):
+    return latihan.SQLiteStorage(storage.path).load_pages()
+
+
+def item(name, visibility="private"):
+    return {"filename": name, "visibility": visibility}
+
+
+def page(title, images=(), audio=()):
+    return {"title": title, "images": [item(n) for n in images], "audio": [item(n) for n in audio], "video": []}
+
+
+def test_round_trip(storage):
+    pages = {"arya": page("satu", ["a.png", "b.png"], ["c.mp3"]), "friend": page("dua")}
+    storage.save_pages(pages)
+    assert reload(storage) == pages
+
+
+def test_diff_save_after_mutate_reorder_delete(storage):
+    pages = {"arya": page("satu", ["a.png", "b.png", "c.png", "d.png"])}
+    storage.save_pages(pages)
+    images = pages["arya"]["images"]
+
+    images[1]["visibility"] = "public"
+    storage.save_pages(pages, ["arya"])
+    assert reload(storage) == pages
+
+    del images[0]
+    images.append(item("e.png"))
+    storage.save_pages(pages, ["arya"])
+    assert reload(storage) == pages
+
+    images.reverse()
+    pages["arya"]["title"] = "diubah"
+    storage.save_pages(pages, ["arya"])
+    assert reload(storage) == pages
+
+    images[:] = images[1:3]
+    storage.save_pages(pages, ["arya"])
+    assert reload(storage) == pages
+
+
+def test_item_level_changes(storage):
+    pages = {"arya": page("satu", ["a.png", "b.png"]), "friend": page("dua", ["f.png"])}
+    storage.save_pages(pages)
+    images = pages["arya"]["images"]
+
+    images[1]["visibility"] = "public"
+    written = storage.save_pages(pages, {"arya": ["b.png"]})
+    assert written == len(json.dumps({"title": "satu"})) + len(json.dumps(images[1]))
+    assert reload(storage) == pages
+
+    images.append(item("c.png"))
+    storage.save_pages(pages, {"arya": ["c.png"]})
+    del images[0]
+    storage.save_pages(pages, {"arya": ["a.png"]})
+    pages["arya"]["title"] = "judul baru"
+    storage.save_pages(pages, {"arya": ()})
+    assert reload(storage) == pages
+
+
+def test_deleted_page_removes_media(storage):
+    pages = {"arya": page("satu", ["a.png"]), "friend": page("dua", ["f.png"])}
+    storage.save_pages(pages)
+    del pages["friend"]
+    storage.save_pages(pages, ["friend"])
+    assert reload(storage) == pages
+    assert storage.conn.execute("SELECT COUNT(*) FROM media WHERE owner = 'friend'").fetchone()[0] == 0
+
+
+def test_diff_media_rows_only_touches_changed_rows():
+    stored = [(0, "a", "A"), (2, "b", "B"), (5, "c", "C")]
+    assert latihan._diff_media_rows(stored, [("a", "A"), ("b", "B2"), ("c", "C")]) == ([(2, "b", "B2")], [])
+    assert latihan._diff_media_rows(stored, [("a", "A"), ("c", "C")]) == ([], [2])
+    assert latihan._diff_media_rows(stored, [("a", "A"), ("b", "B"), ("c", "C"), ("d", "D")]) == ([(6, "d", "D")], [])
+    # Urutan berubah: item yang dipindah ditulis ulang setelah position terakhir
+    assert latihan._diff_media_rows(stored, [("b", "B"), ("a", "A"), ("c", "C")]) == (
+        [(6, "a", "A"), (7, "c", "C")], [0, 5])
@@ -0,0 +1,85 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+import latihan
+
+
+def upload(client, name, data):
+    response = client.post("/upload-image-instant", data={"image": (io.BytesIO(data), name)},
+                           content_type="multipart/form-data")
+    assert response.status_code == 200
+    return response.json["filename"]
+
+
+def record(filename):
+    return latihan.MEDIA_INDEX[filename][2]
+
+
+def test_streamed_upload_is_hashed(arya):
+    data = b"streamed" * 10000
+    filename = upload(arya, "stream.png", data)
+    assert record(filename)["sha256"] == hashlib.sha256(data).hexdigest()
+    assert record(filename)["size"] == len(data)
+    assert arya.get("/uploads/" + filename).data == data
+
+
+def test_reupload_after_delete_gets_new_name(arya):
+    # Regresi: nama yang sudah dipakai tidak boleh dibuat lagi setelah ada media yang dihapus
+    first = upload(arya, "a.png", b"A" * 100)
+    second = upload(arya, "b.png", b"B" * 100)
+    arya.post("/delete-image", data={"image": first})
+    third = upload(arya, "b.png", b"C" * 100)
+
+    assert third != second
+    assert arya.get("/uploads/" + second).data == b"B" * 100
+    assert arya.get("/uploads/" + third).data == b"C" * 100
+
+    arya.post("/delete-image", data={"image": third})
+    assert arya.get("/uploads/" + second).data == b"B" * 100
+
+
+def test_same_content_shares_blob(arya):
+    data = b"shared blob content"
+    first = upload(arya, "one.png", data)
+    second = upload(arya, "two.png", data)
+    sha256 = record(first)["sha256"]
+    assert latihan.BLOB_REFS[sha256] == {first, second}
+
+    arya.post("/delete-image", data={"image": first})
+    assert latihan.BLOB_REFS[sha256] == {second}
+    assert arya.get("/uploads/" + second).data == data
+
+
+def test_index_rejects_duplicate_name(arya):
+    filename = upload(arya, "mine.png", b"mine")
+    with pytest.raises(ValueError):
+        latihan.index_media("friend", "images", {"filename": filename, "visibility": "private"})
+    assert latihan.MEDIA_INDEX[filename][0] == "arya"
+
+
+def test_dedup_converts_every_record_of_a_legacy_file(arya):
+    # Skema nama lama: dua record (halaman berbeda) menunjuk ke file yang sama di UPLOAD_FOLDER
+    data = b"legacy shared file"
+    with open(os.path.join(latihan.UPLOAD_FOLDER, "legacy_shared.png"), "wb") as f:
+        f.write(data)
+    first = {"filename": "legacy_shared.png", "visibility": "public"}
+    latihan.PERSONAL_PAGES.setdefault("arya", {}).setdefault("images", []).append(first)
+    latihan.PERSONAL_PAGES.setdefault("friend", {}).setdefault("images", []).append("legacy_shared.png")
+    latihan.rebuild_media_index()
+
+    report = latihan.dedup_uploads()
+    assert report["files"] == 1 and report["missing"] == 0
+
+    second = latihan.PERSONAL_PAGES["friend"]["images"][-1]
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert first["sha256"] == second["sha256"] == sha256
+    assert second["visibility"] == "private" and second["blob"]
+    assert not os.path.exists(os.path.join(latihan.UPLOAD_FOLDER, "legacy_shared.png"))
+    assert arya.get("/uploads/legacy_shared.png").data == data
+
+    latihan.PERSONAL_PAGES["arya"]["images"].remove(first)
+    latihan.PERSONAL_PAGES["friend"]["images"].remove(second)
+    latihan.rebuild_media_index()